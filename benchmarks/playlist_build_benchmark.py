@@ -0,0 +1,104 @@
+import argparse
+import os
+import tempfile
+import time
+import uuid
+from typing import Callable, List
+
+from PyRetroPlayer.playlist.playlist import Playlist
+from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry
+from PyRetroPlayer.playlist.song import Song
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+# Share of entries whose song is no longer in the library
+DANGLING_RATIO = 0.01
+
+
+def make_playlist(song_library: SongLibrary, count: int) -> Playlist:
+    songs = [
+        Song(
+            id=str(uuid.uuid4()),
+            file_path=f"/music/mods/artist_{i % 500}/song_{i}.mod",
+            title=f"Song {i}",
+            artist=f"Artist {i % 500}",
+            duration=120000 + i,
+            md5=uuid.uuid4().hex,
+            sha1=uuid.uuid4().hex,
+        )
+        for i in range(count)
+    ]
+    song_library.add_songs(songs)
+
+    song_ids = [song.id for song in songs]
+    for i in range(0, count, int(1 / DANGLING_RATIO)):
+        song_ids[i] = str(uuid.uuid4())
+    return Playlist(name="Benchmark", entries=[PlaylistEntry(sid) for sid in song_ids])
+
+
+def copy_playlist(playlist: Playlist) -> Playlist:
+    return Playlist(
+        name=playlist.name,
+        entries=[
+            PlaylistEntry(entry.song_id, entry.entry_id) for entry in playlist.entries
+        ],
+    )
+
+
+def build_per_entry(playlist: Playlist, song_library: SongLibrary) -> List[Song]:
+    # The former path: an existence check per entry, dangling entries removed
+    # one by one, then a second lookup per entry for the row data
+    for entry in list(playlist.entries):
+        if song_library.get_song_by_id(entry.song_id) is None:
+            playlist.remove_song(entry.song_id)
+    rows: List[Song] = []
+    for entry in playlist.entries:
+        song = song_library.get_song_by_id(entry.song_id)
+        if song is not None:
+            rows.append(song)
+    return rows
+
+
+def build_batched(playlist: Playlist, song_library: SongLibrary) -> List[Song]:
+    songs = playlist.resolve_songs(song_library)
+    return [songs[entry.song_id] for entry in playlist.entries]
+
+
+def measure(
+    label: str,
+    build: Callable[[Playlist, SongLibrary], List[Song]],
+    playlist: Playlist,
+    song_library: SongLibrary,
+) -> float:
+    start = time.perf_counter()
+    rows = build(playlist, song_library)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<12} {elapsed:8.3f} s  ({len(rows)} rows)")
+    return elapsed
+
+
+def main(counts: List[int]) -> None:
+    for count in counts:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            song_library = SongLibrary(os.path.join(tmp_dir, "library.db"))
+            try:
+                playlist = make_playlist(song_library, count)
+                print(f"{count} entries")
+                per_entry = measure(
+                    "per entry",
+                    build_per_entry,
+                    copy_playlist(playlist),
+                    song_library,
+                )
+                batched = measure(
+                    "batched", build_batched, copy_playlist(playlist), song_library
+                )
+                print(f"  {per_entry / batched:.1f}x faster")
+            finally:
+                song_library.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Playlist build benchmark")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+    main(args.counts)
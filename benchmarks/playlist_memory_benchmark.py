@@ -0,0 +1,111 @@
+import argparse
+import gc
+import json
+import tracemalloc
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry
+from PyRetroPlayer.playlist.song import Song
+
+BACKENDS = ["LibUADE", "LibOpenMPT", "LibGME"]
+
+
+class LegacyPlaylistEntry:
+    # dict-backed entry with a uuid4 string, as before slots were added
+    def __init__(self, song_id: str, entry_id: Optional[str] = None):
+        self.song_id = song_id
+        self.entry_id = entry_id or str(uuid.uuid4())
+
+
+class LegacySong:
+    def __init__(self, **kwargs: Any) -> None:
+        self.id = kwargs["id"]
+        self.file_path = kwargs["file_path"]
+        self.title = kwargs["title"]
+        self.artist = kwargs["artist"]
+        self.available_backends = kwargs["available_backends"]
+        self.duration = kwargs["duration"]
+        self.md5 = kwargs["md5"]
+        self.sha1 = kwargs["sha1"]
+        self.custom_metadata = kwargs["custom_metadata"]
+        self.is_ready = False
+
+
+def make_song_data(count: int) -> List[Dict[str, Any]]:
+    # Round-trip through JSON like rows read from the library, so no strings
+    # are shared by accident
+    return json.loads(
+        json.dumps(
+            [
+                {
+                    "id": str(uuid.uuid4()),
+                    "file_path": f"/music/mods/artist_{i % 500}/song_{i}.mod",
+                    "title": f"Song {i}",
+                    "artist": f"Artist {i % 500}",
+                    "available_backends": [BACKENDS[i % 3], BACKENDS[(i + 1) % 3]],
+                    "duration": 120000 + i,
+                    "md5": uuid.uuid4().hex,
+                    "sha1": uuid.uuid4().hex + uuid.uuid4().hex[:8],
+                    "custom_metadata": {},
+                }
+                for i in range(count)
+            ]
+        )
+    )
+
+
+def measure(label: str, build: Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{label:<28} {size / 1024 / 1024:8.1f} MiB")
+    return size
+
+
+def main(count: int) -> None:
+    song_data = make_song_data(count)
+    entry_data = json.loads(
+        json.dumps(
+            [
+                {"song_id": data["id"], "entry_id": str(uuid.uuid4())}
+                for data in song_data
+            ]
+        )
+    )
+    print(f"Synthetic playlist with {count} entries and songs")
+
+    legacy_entries = measure(
+        "legacy entries",
+        lambda: [
+            LegacyPlaylistEntry(data["song_id"], data["entry_id"])
+            for data in json.loads(json.dumps(entry_data))
+        ],
+    )
+    entries = measure(
+        "slotted entries",
+        lambda: [
+            PlaylistEntry.from_dict(data) for data in json.loads(json.dumps(entry_data))
+        ],
+    )
+    legacy_songs = measure(
+        "legacy songs",
+        lambda: [LegacySong(**data) for data in json.loads(json.dumps(song_data))],
+    )
+    songs = measure(
+        "slotted songs",
+        lambda: [Song(**data) for data in json.loads(json.dumps(song_data))],
+    )
+
+    print(f"entries: {legacy_entries / entries:.2f}x smaller")
+    print(f"songs:   {legacy_songs / songs:.2f}x smaller")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Playlist memory benchmark")
+    parser.add_argument("--count", type=int, default=200_000)
+    args = parser.parse_args()
+    main(args.count)
@@ -121,6 +121,13 @@ class ActionsManager:
             "Create a new playlist",
             lambda main_window: main_window.playlist_ui_manager.create_new_playlist,
         ),
+        (
+            "new_smart_playlist",
+            "edit-find",
+            "New &Smart Playlist...",
+            "Create a playlist of the library songs matching a query",
+            lambda main_window: main_window.playlist_ui_manager.create_new_smart_playlist,
+        ),
         (
             "import_playlist",
             "document-open",
@@ -156,6 +163,13 @@ class ActionsManager:
             "Load all songs from the library",
             lambda main_window: main_window.load_all_songs_from_library,
         ),
+        (
+            "library_browser",
+            "view-list-tree",
+            "Library &Browser",
+            "Show or hide the library browser",
+            lambda main_window: main_window.playlist_ui_manager.toggle_library_browser,
+        ),
         (
             "remove_missing_files",
             "edit-delete",
@@ -0,0 +1,59 @@
+from typing import Optional
+
+from PySide6.QtCore import QModelIndex, Signal
+from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QComboBox,
+    QTreeView,
+    QVBoxLayout,
+    QWidget,
+)
+
+from PyRetroPlayer.playlist.library_browser_model import (
+    BROWSE_COLUMNS,
+    LibraryBrowserModel,
+)
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+
+class LibraryBrowser(QWidget):
+    # Emits the song ids of a double clicked group or song
+    songs_activated = Signal(list)
+
+    def __init__(
+        self, song_library: SongLibrary, parent: Optional[QWidget] = None
+    ) -> None:
+        super().__init__(parent)
+
+        self.group_combo = QComboBox(self)
+        for column, label in BROWSE_COLUMNS:
+            self.group_combo.addItem(label, column)
+        self.group_combo.currentIndexChanged.connect(self.on_group_changed)
+
+        self.model = LibraryBrowserModel(song_library, BROWSE_COLUMNS[0][0], self)
+        self.tree_view = QTreeView(self)
+        self.tree_view.setModel(self.model)
+        self.tree_view.setHeaderHidden(True)
+        # Rows are laid out without asking for each one's size
+        self.tree_view.setUniformRowHeights(True)
+        self.tree_view.setSelectionMode(
+            QAbstractItemView.SelectionMode.ExtendedSelection
+        )
+        self.tree_view.setDragEnabled(True)
+        self.tree_view.setDragDropMode(QAbstractItemView.DragDropMode.DragOnly)
+        self.tree_view.doubleClicked.connect(self.on_double_clicked)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.group_combo)
+        layout.addWidget(self.tree_view)
+
+    def on_group_changed(self, index: int) -> None:
+        self.model.set_column(self.group_combo.itemData(index))
+
+    def on_double_clicked(self, index: QModelIndex) -> None:
+        payload = self.model.mime_payload([index])
+        self.songs_activated.emit(self.model.song_ids_of(payload))
+
+    def refresh(self) -> None:
+        self.model.refresh()
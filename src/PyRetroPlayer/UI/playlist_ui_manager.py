@@ -1,20 +1,34 @@
 import json
 import os
+import time
 from typing import Any, Dict, List, Optional
 
 from importlib_resources import files
 from loguru import logger
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QAction
-from PySide6.QtWidgets import QFileDialog
+from PySide6.QtWidgets import (
+    QDockWidget,
+    QFileDialog,
+    QInputDialog,
+    QLabel,
+    QLineEdit,
+    QMessageBox,
+)
 from SettingsManager import SettingsManager
 
 from PyRetroPlayer.main_window import MainWindow
 from PyRetroPlayer.playlist.column_manager import ColumnManager
 from PyRetroPlayer.playlist.playlist import Playlist
 from PyRetroPlayer.playlist.playlist_manager import PlaylistManager
+from PyRetroPlayer.playlist.playlist_placeholder import PlaylistPlaceholder
+from PyRetroPlayer.playlist.playlist_stats import PlaylistStats
 from PyRetroPlayer.playlist.playlist_tab_widget import PlaylistTabWidget
+from PyRetroPlayer.playlist.playlist_table_model import format_duration
 from PyRetroPlayer.playlist.playlist_tree_view import PlaylistTreeView
+from PyRetroPlayer.playlist.smart_playlist import SmartQuery
 from PyRetroPlayer.UI.actions_manager import ActionsManager
+from PyRetroPlayer.UI.library_browser import LibraryBrowser
 
 
 class PlaylistUIManager:
@@ -32,17 +46,55 @@ class PlaylistUIManager:
         )
 
         self.column_managers: Dict[str, ColumnManager] = {}
-        self.playlist_manager = PlaylistManager(self.main_window.application_name)
+        self.playlist_manager = PlaylistManager(
+            self.main_window.application_name, self.main_window.song_library
+        )
+
+        # Narrows the current playlist view while typing
+        self.filter_edit = QLineEdit(self.main_window)
+        self.filter_edit.setPlaceholderText("Filter playlist")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.on_filter_text_changed)
+        self.main_window.ui_manager.add_widget(self.filter_edit)
 
         self.tab_widget: PlaylistTabWidget = PlaylistTabWidget(
             self.main_window, self.playlist_manager
         )
         self.tab_widget.tab_added.connect(self.create_new_playlist)
         self.tab_widget.tab_deleted.connect(self.on_delete_playlist)
-        self.tab_widget.currentChanged.connect(self.on_current_tab_changed)
         self.main_window.ui_manager.add_widget(self.tab_widget)
 
-        # Load playlists and add tabs
+        # Statistics of the current playlist; changes are collected and
+        # applied together
+        self.stats_label = QLabel()
+        self.main_window.statusBar().addPermanentWidget(self.stats_label)
+        self.stats_timer = QTimer(self.main_window)
+        self.stats_timer.setSingleShot(True)
+        self.stats_timer.setInterval(200)
+        self.stats_timer.timeout.connect(self.update_stats)
+
+        # The shown smart playlist catches up with library changes
+        self.smart_timer = QTimer(self.main_window)
+        self.smart_timer.setInterval(2000)
+        self.smart_timer.timeout.connect(self.refresh_current_smart_playlist)
+
+        # Library browser, docked beside the playlists and hidden at first
+        self.library_browser = LibraryBrowser(self.main_window.song_library)
+        self.library_browser.songs_activated.connect(self.add_songs_to_current)
+        self.library_dock = QDockWidget("Library", self.main_window)
+        self.library_dock.setObjectName("library_dock")
+        self.library_dock.setWidget(self.library_browser)
+        self.library_dock.visibilityChanged.connect(self.on_library_visibility)
+        self.main_window.addDockWidget(
+            Qt.DockWidgetArea.LeftDockWidgetArea, self.library_dock
+        )
+        self.library_dock.hide()
+
+        # Actions shared by all playlist views, added to each view it is built
+        self.view_actions: List[QAction] = []
+
+        # Tabs start out as placeholders, the view is built when a tab is
+        # first shown
         self.playlist_manager.load_playlists()
         for playlist in self.playlist_manager.playlists:
             self.add_playlist(
@@ -54,26 +106,72 @@ class PlaylistUIManager:
         if not self.playlist_manager.playlists:
             self.create_new_playlist()
 
-        self.current_tree_view = self.tab_widget.currentWidget()
+        self.current_tree_view: Optional[PlaylistTreeView] = None
+        self.tab_widget.currentChanged.connect(self.on_current_tab_changed)
+
+        # Views of tabs not shown for this many seconds are unloaded again,
+        # 0 keeps them
+        self.unload_timeout: int = self.main_window.settings_manager.get(
+            "playlist_unload_timeout", 0
+        )
+        self.last_shown: Dict[str, float] = {}
+        self.unload_timer = QTimer(self.main_window)
+        self.unload_timer.timeout.connect(self.unload_inactive_tabs)
+        if self.unload_timeout > 0:
+            self.unload_timer.start(min(self.unload_timeout, 60) * 1000)
+
+        # Stored totals are shown right away, anything to look up waits until
+        # the window is up
+        self.show_stats()
+        self.stats_timer.start()
+        self.smart_timer.start()
 
     def create_new_playlist(self) -> None:
         playlist = Playlist(name="New Playlist")
         self.playlist_manager.add_playlist(playlist)
         self.add_playlist_with_manager(playlist)
 
+    def create_new_smart_playlist(self) -> None:
+        text, ok = QInputDialog.getText(
+            self.main_window,
+            "New Smart Playlist",
+            "Songs where (e.g. format = AHX and duration > 3m and added < 7d):",
+        )
+        if not ok or not text.strip():
+            return
+        try:
+            query = SmartQuery(text)
+        except ValueError as e:
+            QMessageBox.warning(self.main_window, "New Smart Playlist", str(e))
+            return
+
+        # Filled in when first shown
+        playlist = Playlist(name=text.strip())
+        playlist.query = query
+        self.playlist_manager.add_playlist(playlist)
+        self.add_playlist_with_manager(playlist)
+        self.tab_widget.setCurrentIndex(self.tab_widget.count() - 1)
+
     def add_playlist(self, playlist: Playlist, column_manager: ColumnManager) -> None:
+        playlist.name = playlist.name or ""
+        self.column_managers[playlist.id] = column_manager
+        self.tab_widget.addTab(
+            PlaylistPlaceholder(playlist, column_manager), playlist.name
+        )
+        playlist.stats.changed = self.stats_timer.start
+
+    def create_playlist_view(
+        self, playlist: Playlist, column_manager: ColumnManager
+    ) -> PlaylistTreeView:
         playlist_view = PlaylistTreeView(
             self.playlist_settings_manager,
             playlist,
             column_manager,
             self.column_default_definitions,
-            self.main_window.song_library,
+            self.main_window.async_song_library,
             self.main_window,
         )
 
-        playlist.name = playlist.name or ""
-        self.tab_widget.addTab(playlist_view, playlist.name)
-        self.column_managers[playlist.id] = column_manager
         playlist_view.select_current_song(playlist.current_song_index)
         playlist_view.item_double_clicked.connect(
             lambda index: self.on_playlist_item_double_clicked(index, playlist_view)
@@ -84,6 +182,56 @@ class PlaylistUIManager:
                 file_paths, playlist
             )
         )
+        playlist_view.library_dropped.connect(
+            lambda payload: playlist.add_songs(
+                self.library_browser.model.song_ids_of(payload)
+            )
+        )
+
+        for action in self.view_actions:
+            playlist_view.addAction(action)
+        return playlist_view
+
+    def materialize_tab(self, index: int) -> Optional[PlaylistTreeView]:
+        widget = self.tab_widget.widget(index)
+        if isinstance(widget, PlaylistPlaceholder):
+            playlist_view = self.create_playlist_view(
+                widget.playlist, widget.column_manager
+            )
+            self.tab_widget.replace_tab(index, playlist_view)
+            widget.deleteLater()
+            logger.debug(f"Built view for playlist: {widget.playlist.name}")
+            return playlist_view
+        if isinstance(widget, PlaylistTreeView):
+            return widget
+        return None
+
+    def unload_tab(self, index: int) -> None:
+        widget = self.tab_widget.widget(index)
+        if not isinstance(widget, PlaylistTreeView):
+            return
+        widget.update_column_width()
+        widget.release()
+        self.tab_widget.replace_tab(
+            index, PlaylistPlaceholder(widget.playlist, widget.column_manager)
+        )
+        widget.deleteLater()
+        logger.debug(f"Unloaded view for playlist: {widget.playlist.name}")
+
+    def unload_inactive_tabs(self) -> None:
+        now = time.monotonic()
+        current_index = self.tab_widget.currentIndex()
+        playing_playlist = self.main_window.player_control_manager.current_playlist
+        for index in range(self.tab_widget.count()):
+            widget = self.tab_widget.widget(index)
+            if (
+                index != current_index
+                and isinstance(widget, PlaylistTreeView)
+                and widget.playlist is not playing_playlist
+                and now - self.last_shown.get(widget.playlist.id, now)
+                >= self.unload_timeout
+            ):
+                self.unload_tab(index)
 
     def on_delete_playlist(self) -> None:
         current_index = self.tab_widget.currentIndex()
@@ -95,7 +243,7 @@ class PlaylistUIManager:
             self.main_window, "Import Playlist", "", "JSON Files (*.json)"
         )
         if file_path:
-            playlist = Playlist.load_playlist(file_path)
+            playlist = Playlist.load_playlist(file_path, new_ids=True)
             if playlist:
                 self.add_playlist_with_manager(playlist)
                 logger.info(f"Imported playlist: {playlist.name}")
@@ -161,7 +309,93 @@ class PlaylistUIManager:
                 tree_view.start_currently_playing()
 
     def on_current_tab_changed(self, index: int) -> None:
-        self.current_tree_view = self.tab_widget.widget(index)
+        if self.current_tree_view is not None:
+            self.last_shown[self.current_tree_view.playlist.id] = time.monotonic()
+        if 0 <= index < len(self.playlist_manager.playlists):
+            self.playlist_manager.refresh_smart_playlist(
+                self.playlist_manager.playlists[index]
+            )
+        self.current_tree_view = self.materialize_tab(index)
+
+        self.show_stats()
+
+        # The filter box shows the filter of the view it applies to
+        self.filter_edit.blockSignals(True)
+        self.filter_edit.setText(
+            self.current_tree_view.filter_text if self.current_tree_view else ""
+        )
+        self.filter_edit.blockSignals(False)
+
+    def toggle_library_browser(self) -> None:
+        self.library_dock.setVisible(not self.library_dock.isVisible())
+
+    def on_library_visibility(self, visible: bool) -> None:
+        if visible:
+            self.library_browser.refresh()
+
+    def add_songs_to_current(self, song_ids: List[str]) -> None:
+        index = self.tab_widget.currentIndex()
+        if 0 <= index < len(self.playlist_manager.playlists):
+            self.playlist_manager.playlists[index].add_songs(song_ids)
+
+    def refresh_current_smart_playlist(self) -> None:
+        index = self.tab_widget.currentIndex()
+        if 0 <= index < len(self.playlist_manager.playlists):
+            self.playlist_manager.refresh_smart_playlist(
+                self.playlist_manager.playlists[index]
+            )
+
+    def update_stats(self) -> None:
+        for playlist in self.playlist_manager.playlists:
+            self.playlist_manager.update_stats(playlist)
+        self.show_stats()
+
+    def show_stats(self) -> None:
+        for index, playlist in enumerate(self.playlist_manager.playlists):
+            self.tab_widget.setTabToolTip(index, self.stats_details(playlist.stats))
+        current_index = self.tab_widget.currentIndex()
+        if 0 <= current_index < len(self.playlist_manager.playlists):
+            stats = self.playlist_manager.playlists[current_index].stats
+            self.stats_label.setText(self.stats_summary(stats))
+        else:
+            self.stats_label.clear()
+
+    def stats_summary(self, stats: PlaylistStats) -> str:
+        text = f"{stats.entry_count} songs, {format_duration(stats.total_duration)}"
+        if stats.unplayable_count:
+            text += f", {stats.unplayable_count} unplayable"
+        if stats.unscanned_count:
+            text += f", {stats.unscanned_count} unscanned"
+        return text
+
+    def stats_details(self, stats: PlaylistStats) -> str:
+        lines = [self.stats_summary(stats)]
+        for title, counts in (
+            ("Formats", stats.format_counts),
+            ("Backends", stats.backend_counts),
+        ):
+            if counts:
+                by_count = sorted(counts.items(), key=lambda item: -item[1])
+                lines.append(
+                    f"{title}: "
+                    + ", ".join(f"{name} {count}" for name, count in by_count)
+                )
+        return "\n".join(lines)
+
+    def on_filter_text_changed(self, text: str) -> None:
+        tree_view = self.get_current_tree_view()
+        if tree_view is not None:
+            tree_view.set_filter_text(text)
+
+    def update_songs(self, song_ids: List[str]) -> None:
+        # Only built views show songs; the others fetch them when built
+        affected = self.playlist_manager.songs_changed(song_ids)
+        for index in range(self.tab_widget.count()):
+            widget = self.tab_widget.widget(index)
+            if isinstance(widget, PlaylistTreeView):
+                entries = affected.get(widget.playlist.id)
+                if entries:
+                    widget.update_entries(entries)
 
     def get_current_tree_view(self) -> Optional[PlaylistTreeView]:
         if isinstance(self.current_tree_view, PlaylistTreeView):
@@ -184,9 +418,9 @@ class PlaylistUIManager:
                 "save_selected_entries_as_audio",
             ],
         )
+        self.view_actions = actions
         for i in range(self.tab_widget.count()):
             widget = self.tab_widget.widget(i)
             if isinstance(widget, PlaylistTreeView):
                 for action in actions:
-                    action.setParent(widget)
                     widget.addAction(action)
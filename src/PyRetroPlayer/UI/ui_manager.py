@@ -1,4 +1,5 @@
 from PySide6.QtCore import Qt
+from PySide6.QtGui import QAction, QActionGroup
 from PySide6.QtWidgets import (
     QLabel,
     QMenu,
@@ -11,6 +12,7 @@ from PySide6.QtWidgets import (
 )
 
 from PyRetroPlayer.main_window import MainWindow
+from PyRetroPlayer.playing.playing_modes import ShuffleMode
 from PyRetroPlayer.UI.actions_manager import ActionsManager
 from PyRetroPlayer.UI.font_manager import FontManager
 
@@ -57,6 +59,7 @@ class UIManager:
         menu_bar: QMenuBar = self.main_window.menuBar()
         self.create_file_menu(menu_bar)
         self.create_library_menu(menu_bar)
+        self.create_playback_menu(menu_bar)
         return menu_bar
 
     def create_file_menu(self, menu_bar: QMenuBar) -> None:
@@ -68,6 +71,7 @@ class UIManager:
         file_menu.addSeparator()
 
         self.add_menu_qaction(file_menu, "new_playlist")
+        self.add_menu_qaction(file_menu, "new_smart_playlist")
         self.add_menu_qaction(file_menu, "import_playlist")
         self.add_menu_qaction(file_menu, "export_playlist")
         self.add_menu_qaction(file_menu, "delete_playlist")
@@ -80,10 +84,32 @@ class UIManager:
     def create_library_menu(self, menu_bar: QMenuBar) -> None:
         library_menu = menu_bar.addMenu("&Library")
 
+        self.add_menu_qaction(library_menu, "library_browser")
         self.add_menu_qaction(library_menu, "load_all_songs")
         self.add_menu_qaction(library_menu, "remove_missing_files")
         self.add_menu_qaction(library_menu, "clear_song_library")
 
+    def create_playback_menu(self, menu_bar: QMenuBar) -> None:
+        playback_menu = menu_bar.addMenu("&Playback")
+
+        player_control_manager = self.main_window.player_control_manager
+        shuffle_menu = playback_menu.addMenu("&Shuffle")
+        shuffle_group = QActionGroup(shuffle_menu)
+        for mode, text in [
+            (ShuffleMode.OFF, "&Off"),
+            (ShuffleMode.RANDOM, "&Random"),
+            (ShuffleMode.BY_RATING, "By &Rating"),
+            (ShuffleMode.BY_PLAY_COUNT, "By &Play Count"),
+        ]:
+            action = QAction(text, shuffle_menu)
+            action.setCheckable(True)
+            action.setChecked(mode == player_control_manager.shuffle_mode)
+            action.triggered.connect(
+                lambda _=False, mode=mode: player_control_manager.set_shuffle_mode(mode)
+            )
+            shuffle_group.addAction(action)
+            shuffle_menu.addAction(action)
+
     def update_song_progress_bar(self, current_position: int, song_length: int) -> None:
         if song_length > 0:
             self.song_progress_slider.setMaximum(song_length)
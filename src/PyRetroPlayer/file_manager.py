@@ -5,6 +5,7 @@ from typing import Any, Dict, List, Optional
 
 import requests
 from loguru import logger
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import (
     QFileDialog,
     QInputDialog,
@@ -37,6 +38,8 @@ class FileManager:
         self.file_loader: Optional[AbstractLoader] = None
         self.total_files = 0
         self.files_remaining = 0
+        self.loaded_songs: List[Song] = []
+        self.flush_scheduled = False
         self.web_helper = WebHelper()
         self.session = requests.Session()
 
@@ -80,25 +83,42 @@ class FileManager:
 
     def on_song_loaded(self, song: Optional[Song]) -> None:
         self.files_remaining -= 1
+
+        if song is None:
+            logger.error("Failed to load song.")
+        else:
+            self.loaded_songs.append(song)
+            logger.info(f"Loaded song: {song.title} by {song.artist}")
+
+        # Songs loaded during one event loop iteration are added together
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            QTimer.singleShot(0, self.flush_loaded_songs)
+
+    def flush_loaded_songs(self) -> None:
+        self.flush_scheduled = False
+        songs = self.loaded_songs
+        self.loaded_songs = []
+
         self.main_window.ui_manager.update_loading_progress_bar(
             self.total_files - self.files_remaining, self.total_files
         )
 
-        if song is None:
-            logger.error("Failed to load song.")
+        if not songs:
             return
 
-        id = self.main_window.song_library.add_song(song)
+        song_ids = self.main_window.song_library.add_songs(songs)
 
-        if id != "":
-            playlist = self.get_current_playlist()
-            if playlist:
-                entry = playlist.add_song(id)
+        playlist = self.get_current_playlist()
+        if playlist is None:
+            return
 
-                if self.main_window.settings_manager.get("auto_scan_on_load", False):
-                    self.main_window.scan_entries([entry])
+        entries = playlist.add_songs(song_ids[song] for song in songs if song_ids[song])
 
-        logger.info(f"Loaded song: {song.title} by {song.artist}")
+        if entries and self.main_window.settings_manager.get(
+            "auto_scan_on_load", False
+        ):
+            self.main_window.scan_entries(entries)
 
     # def on_all_songs_loaded(self) -> None:
     #     self.main_window.ui_manager.update_loading_progress_bar(
@@ -110,12 +130,12 @@ class FileManager:
     #         self.file_loader = None
 
     def load_all_songs_from_library(self) -> None:
-        songs = self.main_window.song_library.get_all_songs()
         playlist = self.get_current_playlist()
-        for song in songs:
-            id = song.id
-            if playlist:
-                playlist.add_song(id)
+        if not playlist:
+            return
+        playlist.add_songs(
+            song.id for song in self.main_window.song_library.iter_songs()
+        )
 
     def add_files(self) -> None:
         file_paths, _ = QFileDialog.getOpenFileNames(
@@ -11,11 +11,9 @@ def clear_library(db_path: str):
 
 def main(db_path: str):
     with SongLibrary(db_path) as library:
-        songs = library.get_all_songs()
-        if not songs:
-            print("No songs found in the library.")
-            return
-        for song in songs:
+        found = False
+        for song in library.iter_songs():
+            found = True
             print(f"ID: {song.id}")
             print(f"Title: {song.title}")
             print(f"Artist: {song.artist}")
@@ -28,6 +26,9 @@ def main(db_path: str):
             print(f"Custom Metadata: {song.custom_metadata}")
             print("-" * 40)
 
+        if not found:
+            print("No songs found in the library.")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Song library tools")
@@ -1,7 +1,7 @@
 import os
 import sys
 import webbrowser
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import dbus  # type: ignore
 import dbus.mainloop.glib  # type: ignore
@@ -28,11 +28,13 @@ from PyRetroPlayer.player_backends.libuade.player_backend_libuade import (
 from PyRetroPlayer.player_thread.recorder_player_thread_manager import (
     RecorderPlayerThreadManager,
 )
+from PyRetroPlayer.playlist.async_song_library import AsyncSongLibrary
 from PyRetroPlayer.playlist.playlist import Playlist
 from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry
 from PyRetroPlayer.playlist.song import Song
 from PyRetroPlayer.playlist.song_info_dialog import SongInfoDialog
 from PyRetroPlayer.playlist.song_library import SongLibrary
+from PyRetroPlayer.remove_missing_files_worker import RemoveMissingFilesWorker
 from PyRetroPlayer.scraping.modarchive_scraper import ModArchiveScraper
 from PyRetroPlayer.scraping.msm_scraper import MSMScraper
 from PyRetroPlayer.settings.custom_settings_dialog import CustomSettingsDialog
@@ -61,8 +63,13 @@ class MainWindow(QMainWindow):
         self.setWindowTitle(f"{self.application_name} v{self.application_version}")
 
         self.song_library = SongLibrary(
-            os.path.join(self.data_dir, "song_library.db"), self.settings_manager
+            os.path.join(self.data_dir, "song_library.db"),
+            self.settings_manager,
+            song_cache_size=self.settings_manager.get("song_cache_size", 0),
         )
+        # UI code reads songs through this, so SQLite stays off the GUI thread
+        self.async_song_library = AsyncSongLibrary(self.song_library, parent=self)
+        self.remove_missing_files_worker: Optional[RemoveMissingFilesWorker] = None
 
         self.player_backends: Dict[str, Any] = {
             "LibUADE": lambda: PlayerBackendLibUADE(),
@@ -144,6 +151,10 @@ class MainWindow(QMainWindow):
         self.playlist_ui_manager.tab_widget.setCurrentIndex(
             self.settings_manager.get("last_active_playlist_index", 0)
         )
+        # Builds the view of the active tab when the index did not change
+        self.playlist_ui_manager.on_current_tab_changed(
+            self.playlist_ui_manager.tab_widget.currentIndex()
+        )
 
     def save_settings(self) -> None:
         geo = self.geometry()
@@ -164,6 +175,14 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event: QCloseEvent) -> None:
         self.save_settings()
+        if self.remove_missing_files_worker is not None:
+            # The sweep reads and writes the library, let it stop first
+            self.remove_missing_files_worker.cancel()
+            self.remove_missing_files_thread.quit()
+            self.remove_missing_files_thread.wait()
+        self.player_control_manager.history.flush()
+        self.async_song_library.close()
+        self.song_library.close()
         event.accept()
 
     def save_column_managers(self) -> None:
@@ -180,10 +199,47 @@ class MainWindow(QMainWindow):
             column_manager.save_to_json(config_path)
 
     def remove_missing_files(self) -> None:
-        self.song_library.remove_missing_files()
+        # Triggering the action again while a sweep is running cancels it
+        if self.remove_missing_files_worker is not None:
+            self.remove_missing_files_worker.cancel()
+            return
+
+        self.remove_missing_files_thread = QThread(self)
+        self.remove_missing_files_worker = RemoveMissingFilesWorker(
+            self.song_library,
+            self.settings_manager.get("missing_files_max_workers", 8),
+        )
+        worker = self.remove_missing_files_worker
+        worker.moveToThread(self.remove_missing_files_thread)
+        self.remove_missing_files_thread.started.connect(worker.run)
+        worker.progress.connect(self.ui_manager.update_loading_progress_bar)
+        worker.finished.connect(self.on_missing_files_removed)
+        worker.cancelled.connect(self.on_missing_files_cancelled)
+        for signal in (worker.finished, worker.cancelled):
+            signal.connect(self.remove_missing_files_thread.quit)
+            signal.connect(worker.deleteLater)
+        self.remove_missing_files_thread.finished.connect(
+            self.remove_missing_files_thread.deleteLater
+        )
+        self.remove_missing_files_thread.start()
+
+    def on_missing_files_removed(self, song_ids: List[str]) -> None:
+        self.remove_missing_files_worker = None
+        self.ui_manager.loading_progress_bar.setVisible(False)
+        if not song_ids:
+            self.statusBar().showMessage("No missing files found", 5000)
+            return
+
+        self.playlist_ui_manager.playlist_manager.remove_songs(song_ids)
+
+    def on_missing_files_cancelled(self) -> None:
+        self.remove_missing_files_worker = None
+        self.ui_manager.loading_progress_bar.setVisible(False)
+        self.statusBar().showMessage("Removing missing files was cancelled", 5000)
 
     def clear_song_library(self) -> None:
         self.song_library.clear()
+        self.playlist_ui_manager.playlist_manager.clear_songs()
 
     def load_all_songs_from_library(self) -> None:
         self.file_manager.load_all_songs_from_library()
@@ -194,30 +250,29 @@ class MainWindow(QMainWindow):
     def on_song_loaded(self, song: Optional[Song]) -> None:
         self.file_manager.on_song_loaded(song)
 
-    def get_current_song(self) -> Optional[Song]:
+    def request_current_song(
+        self, callback: Callable[[Song], None], with_details: bool = False
+    ) -> None:
         current_tree_view = self.playlist_ui_manager.get_current_tree_view()
         if current_tree_view is None:
-            return None
+            return
 
-        return current_tree_view.get_current_song()
+        current_tree_view.request_current_song(callback, with_details)
 
     def on_lookup_modarchive(self) -> None:
-        current_song = self.get_current_song()
-
-        if current_song is None:
-            return
+        self.request_current_song(self.lookup_modarchive)
 
-        url = self.modarchive_scraper.get_url_by_song(current_song)
+    def lookup_modarchive(self, song: Song) -> None:
+        url = self.modarchive_scraper.get_url_by_song(song)
 
         if url:
             webbrowser.open(url)
 
     def on_lookup_msm(self) -> None:
-        current_song = self.get_current_song()
-        if current_song is None:
-            return
+        self.request_current_song(self.lookup_msm)
 
-        url = self.msm_scraper.get_url(current_song)
+    def lookup_msm(self, song: Song) -> None:
+        url = self.msm_scraper.get_url(song)
 
         if url:
             webbrowser.open(url)
@@ -249,10 +304,11 @@ class MainWindow(QMainWindow):
             self.load_files(downloaded_files, playlist)
 
     def on_song_info_dialog(self) -> None:
-        current_song = self.get_current_song()
-        if current_song:
-            dialog = SongInfoDialog(current_song, self.ui_manager.font_manager, self)
-            dialog.exec()
+        self.request_current_song(self.show_song_info_dialog, with_details=True)
+
+    def show_song_info_dialog(self, song: Song) -> None:
+        dialog = SongInfoDialog(song, self.ui_manager.font_manager, self)
+        dialog.exec()
 
     def get_selected_entries(self) -> List[PlaylistEntry]:
         current_tree_view = self.playlist_ui_manager.get_current_tree_view()
@@ -285,11 +341,7 @@ class MainWindow(QMainWindow):
     def update_playlist_entry(
         self, entry: PlaylistEntry, current: int, total: int
     ) -> None:
-        current_tree_view = self.playlist_ui_manager.get_current_tree_view()
-        if current_tree_view is None:
-            return
-
-        current_tree_view.update_entry(entry)
+        self.playlist_ui_manager.update_songs([entry.song_id])
         # self.ui_manager.update_loading_progress_bar(current, total)
 
     def save_selected_entries_as_audio(self) -> None:
@@ -297,14 +349,10 @@ class MainWindow(QMainWindow):
         song_ids = [entry.song_id for entry in selected_entries if entry.song_id != ""]
 
         for song_id in song_ids:
-            song = self.song_library.get_song_by_id(song_id)
-            if song:
-                self.save_song_as_audio(song)
+            self.async_song_library.request_song(song_id, self.save_song_as_audio)
 
     def save_current_song_as_audio(self) -> None:
-        current_song = self.get_current_song()
-        if current_song:
-            self.save_song_as_audio(current_song)
+        self.request_current_song(self.save_song_as_audio)
 
     def save_song_as_audio(self, song: Song) -> None:
         output_dir = self.settings_manager.get("default_record_path", self.data_dir)
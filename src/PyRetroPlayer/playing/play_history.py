@@ -0,0 +1,150 @@
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, List, NamedTuple, Optional
+
+from loguru import logger
+
+from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+
+class HistoryItem(NamedTuple):
+    entry: PlaylistEntry
+    played_at: float
+
+
+class HistoryRow(NamedTuple):
+    id: int
+    song_id: str
+    entry_id: str
+    played_at: float
+
+
+class PlayHistory:
+    # The latest plays are kept in memory, at most max_length of them; every
+    # play is also appended to the play_history table in batches, where the
+    # whole history can be paged through
+    def __init__(
+        self,
+        song_library: Optional[SongLibrary] = None,
+        max_length: int = 1000,
+        batch_size: int = 20,
+    ) -> None:
+        self.song_library = song_library
+        self.items: deque[HistoryItem] = deque(maxlen=max(1, max_length))
+        # Index of the item playing, behind the newest after going back
+        self.cursor = -1
+        self.batch_size = batch_size
+        # Plays not written to the table yet
+        self.pending: List[HistoryItem] = []
+        # Plays of every song over the whole history, counted once by load()
+        # and kept up to date by add()
+        self.counts: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, entry: PlaylistEntry) -> None:
+        item = HistoryItem(entry, time.time())
+        self.items.append(item)
+        self.cursor = len(self.items) - 1
+        self.pending.append(item)
+        self.counts[entry.song_id] = self.counts.get(entry.song_id, 0) + 1
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def current(self) -> Optional[HistoryItem]:
+        return self.items[self.cursor] if self.cursor >= 0 else None
+
+    def back(self) -> Optional[HistoryItem]:
+        # The cursor stays near the newest end, where indexing the deque
+        # takes constant time
+        if self.cursor <= 0:
+            return None
+        self.cursor -= 1
+        return self.items[self.cursor]
+
+    def forward(self) -> Optional[HistoryItem]:
+        # Only after going back; at the newest item playing goes on from the
+        # queue
+        if self.cursor >= len(self.items) - 1:
+            return None
+        self.cursor += 1
+        return self.items[self.cursor]
+
+    def reset_cursor(self) -> None:
+        self.cursor = len(self.items) - 1
+
+    def flush(self) -> Optional[Future[None]]:
+        if self.song_library is None or not self.pending:
+            self.pending = []
+            return None
+        rows = [
+            (item.entry.song_id, item.entry.entry_id, item.played_at)
+            for item in self.pending
+        ]
+        self.pending = []
+
+        def insert(conn: sqlite3.Connection) -> None:
+            conn.executemany(
+                "INSERT INTO play_history (song_id, entry_id, played_at) VALUES (?, ?, ?)",
+                rows,
+            )
+
+        return self.song_library.submit_write(insert)
+
+    def load(self) -> None:
+        # The newest plays of earlier sessions
+        if self.song_library is None:
+            return
+        with self.song_library.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT song_id, entry_id, played_at FROM play_history ORDER BY id DESC LIMIT ?",
+                (self.items.maxlen,),
+            ).fetchall()
+            counts = {
+                row["song_id"]: row["plays"]
+                for row in conn.execute(
+                    "SELECT song_id, COUNT(*) AS plays FROM play_history GROUP BY song_id"
+                )
+            }
+        # Plays added before loading may not be in the table yet
+        for item in self.pending:
+            counts[item.entry.song_id] = counts.get(item.entry.song_id, 0) + 1
+        self.counts = counts
+        self.items.clear()
+        self.items.extend(
+            HistoryItem(
+                PlaylistEntry(row["song_id"], row["entry_id"]), row["played_at"]
+            )
+            for row in reversed(rows)
+        )
+        self.reset_cursor()
+        logger.info(f"Loaded {len(rows)} entries of play history")
+
+    def play_counts(self) -> Dict[str, int]:
+        # Number of plays of every song played before, without a query
+        return dict(self.counts)
+
+    def page(
+        self, before_id: Optional[int] = None, limit: int = 100
+    ) -> List[HistoryRow]:
+        # Newest first; pass the id of the last row to get the next page.
+        # Only reads what was written, so plays still pending are missing
+        # until flush() and its write are done; this does not wait for them
+        if self.song_library is None:
+            return []
+        query = "SELECT id, song_id, entry_id, played_at FROM play_history"
+        params: List[object] = []
+        if before_id is not None:
+            query += " WHERE id < ?"
+            params.append(before_id)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self.song_library.get_connection() as conn:
+            return [
+                HistoryRow(row["id"], row["song_id"], row["entry_id"], row["played_at"])
+                for row in conn.execute(query, params).fetchall()
+            ]
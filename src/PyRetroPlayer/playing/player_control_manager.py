@@ -1,3 +1,4 @@
+from concurrent.futures import Future
 from enum import Enum, auto
 from typing import Callable, Optional
 
@@ -7,8 +8,13 @@ from SettingsManager import SettingsManager
 from PyRetroPlayer.main_window import MainWindow
 from PyRetroPlayer.mpris.mpris_controller import MPRISPlayer
 from PyRetroPlayer.player_thread.player_thread_manager import PlayerThreadManager
+from PyRetroPlayer.playing.play_history import PlayHistory
+from PyRetroPlayer.playing.playing_modes import ShuffleMode
 from PyRetroPlayer.playing.queue_manager import QueueManager
+from PyRetroPlayer.playing.rating_cache import RatingCache
+from PyRetroPlayer.playing.shuffle import LazyShuffle, Shuffle, WeightedShuffle
 from PyRetroPlayer.playlist.playlist import Playlist
+from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry
 from PyRetroPlayer.playlist.song import Song
 
 
@@ -31,6 +37,7 @@ class PlayerControlManager:
         volume_changed_callback: Optional[Callable[[int], None]] = None,
     ) -> None:
         self.main_window = main_window
+        self.settings_manager = settings_manager
         self.state = self.PlayerState.STOPPED
         self.player_thread_manager = PlayerThreadManager(
             audio_backend=self.main_window.audio_backend,
@@ -38,11 +45,25 @@ class PlayerControlManager:
             on_position_changed=self.on_position_changed,
             on_song_finished=self.on_song_finished,
         )
-        self.history_playlist = Playlist(name="History")
-        self.queue_manager = QueueManager(self.history_playlist)
+        self.history = PlayHistory(
+            self.main_window.song_library,
+            settings_manager.get("play_history_length", 1000),
+        )
+        self.history.load()
+        self.queue_manager = QueueManager(self.history)
         self.current_playlist: Optional[Playlist] = None
         self.current_playlist_index = -1
         self.current_backend = None
+        self.pending_entry: Optional[PlaylistEntry] = None
+        self.shuffle_mode = ShuffleMode[settings_manager.get("shuffle_mode", "OFF")]
+        # Order of the current playlist while shuffling
+        self.shuffle: Optional[Shuffle] = None
+        # Read on the library's reader thread, not while switching modes
+        self.rating_cache = RatingCache(
+            self.main_window.song_library, self.main_window.async_song_library.executor
+        )
+        if self.shuffle_mode == ShuffleMode.BY_RATING:
+            self.rating_cache.get()
 
         from PyRetroPlayer.mpris.mpris_controller_core import MPRISControllerCore
 
@@ -76,29 +97,8 @@ class PlayerControlManager:
                         )
                         return
 
-                song = self.main_window.song_library.get_song_by_id(
-                    next_entry.song_id if next_entry else ""
-                )
-
-                if song:
-                    self.on_current_song_changed(song)
-
-                    meta_data = {
-                        "title": (
-                            song.file_path.split("/")[-1]
-                            if song.title == ""
-                            else song.title
-                        ),
-                    }
-
-                    self.main_window.audio_backend.set_meta_data(meta_data)
-                    self.play_song(song)
-
                 if next_entry:
-                    self.history_playlist.add_entry(next_entry)
-
-                    if self.current_playlist:
-                        self.current_playlist.set_currently_playing_entry(next_entry)
+                    self.play_entry(next_entry)
             case (
                 self.PlayerState.PAUSED,
                 self.PlayerState.PLAYING | self.PlayerState.PAUSED,
@@ -134,6 +134,47 @@ class PlayerControlManager:
             case _:
                 pass
 
+    def play_entry(self, entry: PlaylistEntry) -> None:
+        if self.current_playlist:
+            self.current_playlist.set_currently_playing_entry(entry)
+
+        # The song is read off the GUI thread; only the latest request may
+        # start playback
+        self.pending_entry = entry
+        self.main_window.async_song_library.get_song(
+            entry.song_id, with_details=True
+        ).add_done_callback(lambda future: self.on_entry_song_loaded(entry, future))
+
+    def on_entry_song_loaded(
+        self, entry: PlaylistEntry, future: "Future[Optional[Song]]"
+    ) -> None:
+        if self.pending_entry is not entry:
+            return
+        self.pending_entry = None
+
+        if self.state != self.PlayerState.PLAYING:
+            return
+
+        if future.exception() is not None:
+            logger.error(f"Failed to load song {entry.song_id}: {future.exception()}")
+            return
+
+        song = future.result()
+        if song is None:
+            logger.warning(f"Song ID {entry.song_id} not found in library")
+            return
+
+        self.on_current_song_changed(song)
+
+        meta_data = {
+            "title": (
+                song.file_path.split("/")[-1] if song.title == "" else song.title
+            ),
+        }
+
+        self.main_window.audio_backend.set_meta_data(meta_data)
+        self.play_song(song)
+
     def on_current_song_changed(self, song: Song) -> None:
         song_title = song.title
         if song_title == "":
@@ -149,7 +190,7 @@ class PlayerControlManager:
             }
         )
 
-        comments = song.custom_metadata.get("comments", [])
+        comments = song.get_metadata("comments", [])
 
         for comment in comments:
             self.main_window.tray_manager.show_tray_notification(
@@ -183,8 +224,9 @@ class PlayerControlManager:
 
     def on_previous_pressed(self) -> None:
         if self.state in (self.PlayerState.PLAYING, self.PlayerState.PAUSED):
-            if self.current_backend:
-                self.current_backend.previous()
+            if self.queue_manager.previous_entry() is not None:
+                self.set_player_state(self.PlayerState.STOPPED)
+                self.set_player_state(self.PlayerState.PLAYING)
 
     def on_next_pressed(self) -> None:
         if self.state in (self.PlayerState.PLAYING, self.PlayerState.PAUSED):
@@ -231,13 +273,58 @@ class PlayerControlManager:
         self.current_playlist = playlist
         self.current_playlist_index = start_index
         self.queue_manager.clear()
+        if self.shuffle_mode != ShuffleMode.OFF:
+            # The chosen entry plays first, the rest in shuffled order
+            self.shuffle = self.create_shuffle(playlist)
+            entries = playlist.get_entries_from_index(start_index, 1)
+            for entry in entries:
+                self.shuffle.mark_played(entry)
+            self.queue_manager.add_entries(entries)
         self.add_more_songs_to_queue(playlist, start_index)
         self.play_queue()
 
+    def create_shuffle(self, playlist: Playlist) -> Shuffle:
+        # Neither queries the library: ratings not read yet weigh the same,
+        # and play counts are kept up to date by the history
+        match self.shuffle_mode:
+            case ShuffleMode.BY_RATING:
+                return WeightedShuffle(playlist, self.rating_cache.get())
+            case ShuffleMode.BY_PLAY_COUNT:
+                return WeightedShuffle(playlist, self.history.counts)
+            case _:
+                return LazyShuffle(playlist)
+
+    def set_shuffle_mode(self, mode: ShuffleMode) -> None:
+        logger.info(f"Shuffle mode set to {mode.name}")
+        self.shuffle_mode = mode
+        self.settings_manager.set("shuffle_mode", mode.name)
+        self.shuffle = None
+        # Songs queued in the old order are dropped, those queued by hand
+        # stay; playing goes on after the current song, or shuffles the others
+        self.queue_manager.drop_auto_entries()
+        playlist = self.current_playlist
+        if playlist is None or playlist.current_song_index < 0:
+            return
+        if mode == ShuffleMode.OFF:
+            self.current_playlist_index = playlist.current_song_index + 1
+        else:
+            self.shuffle = self.create_shuffle(playlist)
+            self.shuffle.mark_played(playlist.entries[playlist.current_song_index])
+
     def add_more_songs_to_queue(
         self, playlist: Playlist, start_index: int, count: int = 10
     ) -> int:
-        entries = playlist.get_entries_from_index(start_index, count)
-        self.queue_manager.add_entries(entries)
-        self.current_playlist_index += len(entries)
+        if self.shuffle_mode != ShuffleMode.OFF:
+            if self.shuffle is None or self.shuffle.playlist is not playlist:
+                self.shuffle = self.create_shuffle(playlist)
+            elif self.shuffle_mode == ShuffleMode.BY_RATING and isinstance(
+                self.shuffle, WeightedShuffle
+            ):
+                # Ratings read or changed since the shuffle was created
+                self.shuffle.set_scores(self.rating_cache.get())
+            entries = self.shuffle.next_entries(count)
+        else:
+            entries = playlist.get_entries_from_index(start_index, count)
+            self.current_playlist_index += len(entries)
+        self.queue_manager.add_entries(entries, auto=True)
         return len(entries)
@@ -6,6 +6,13 @@ class PlayingMode(Enum):
     RANDOM = auto()
 
 
+class ShuffleMode(Enum):
+    OFF = auto()
+    RANDOM = auto()
+    BY_RATING = auto()
+    BY_PLAY_COUNT = auto()
+
+
 class PlayingSource(Enum):
     LOCAL = auto()
     MODARCHIVE = auto()
@@ -1,42 +1,67 @@
 from collections import deque
-from typing import List, Optional
+from typing import List, Optional, Set
 
 from loguru import logger
 
-from PyRetroPlayer.playlist.playlist import Playlist
-from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry
+from PyRetroPlayer.playing.play_history import PlayHistory
+from PyRetroPlayer.playlist.playlist_entry import CompactId, PlaylistEntry
 
 
 class QueueManager:
-    def __init__(self, history_playlist: Playlist) -> None:
+    def __init__(self, history: PlayHistory) -> None:
         self.queue: deque[PlaylistEntry] = deque()
-        self.history_playlist = history_playlist
-
-        # Set current song index to -1 to indicate that no song is playing
-        self.history_playlist.current_song_index = -1
+        self.history = history
+        # Entry of the history to play again next, set by going back
+        self.replay_entry: Optional[PlaylistEntry] = None
+        # Entries queued by the player to go on with the playlist, as opposed
+        # to those queued by hand
+        self.auto_keys: Set[CompactId] = set()
 
     def add_entry(self, entry: PlaylistEntry) -> None:
         self.queue.append(entry)
 
-    def add_entries(self, entries: List[PlaylistEntry]) -> None:
+    def add_entries(self, entries: List[PlaylistEntry], auto: bool = False) -> None:
         self.queue.extend(entries)
+        if auto:
+            self.auto_keys.update(entry.entry_key for entry in entries)
 
     def set_queue(self, entries: List[PlaylistEntry]) -> None:
         self.queue = deque(entries)
+        self.auto_keys = set()
+
+    def drop_auto_entries(self) -> None:
+        # Keeps what was queued by hand, in its order
+        if self.auto_keys:
+            self.queue = deque(
+                entry for entry in self.queue if entry.entry_key not in self.auto_keys
+            )
+            self.auto_keys = set()
 
     def update_entry(self, entry: PlaylistEntry) -> None:
         for idx, e in enumerate(self.queue):
-            if e.entry_id == entry.entry_id:
+            if e.entry_key == entry.entry_key:
                 self.queue[idx] = entry
                 break
 
+    def previous_entry(self) -> Optional[PlaylistEntry]:
+        item = self.history.back()
+        self.replay_entry = item.entry if item is not None else None
+        return self.replay_entry
+
     def pop_next_entry(self) -> Optional[PlaylistEntry]:
+        if self.replay_entry is not None:
+            entry, self.replay_entry = self.replay_entry, None
+            return entry
+
+        # After going back, playing goes forward through the history again
+        item = self.history.forward()
+        if item is not None:
+            return item.entry
+
         if self.queue:
             entry = self.queue.popleft()
-
-            # Add entry to history playlist
-            self.history_playlist.entries.append(entry)
-            self.history_playlist.current_song_index += 1
+            self.auto_keys.discard(entry.entry_key)
+            self.history.add(entry)
 
             if len(self.queue) > 0:
                 logger.debug(
@@ -52,13 +77,18 @@ class QueueManager:
 
     def prioritize_entry(self, entry: PlaylistEntry) -> None:
         for e in self.queue:
-            if e.entry_id == entry.entry_id:
+            if e.entry_key == entry.entry_key:
                 self.queue.remove(e)
                 self.queue.appendleft(e)
+                # Chosen by hand now
+                self.auto_keys.discard(e.entry_key)
                 break
 
     def clear(self) -> None:
         self.queue.clear()
+        self.auto_keys = set()
+        self.replay_entry = None
+        self.history.reset_cursor()
 
     def get_queue(self) -> List[PlaylistEntry]:
         return list(self.queue)
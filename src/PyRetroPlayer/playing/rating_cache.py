@@ -0,0 +1,52 @@
+from concurrent.futures import Executor, Future
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+
+class RatingCache:
+    # Ratings of the library for shuffling by rating. They are read on the
+    # executor: once in full, then only the songs changed since. Results are
+    # taken over by get() on the calling thread, which never waits for them
+    def __init__(self, song_library: SongLibrary, executor: Executor) -> None:
+        self.song_library = song_library
+        self.executor = executor
+        # Replaced rather than changed, so handed out dicts stay as they were
+        self.ratings: Dict[str, float] = {}
+        # Library change the ratings are up to date with, None before loading
+        self.seq: Optional[int] = None
+        self.future: Optional[Future[Tuple[int, Dict[str, float]]]] = None
+
+    def get(self) -> Dict[str, float]:
+        # The ratings read so far; starts reading what changed since
+        if self.future is not None and self.future.done():
+            future, self.future = self.future, None
+            try:
+                self.seq, self.ratings = future.result()
+            except Exception as e:
+                logger.error(f"Failed to load ratings: {e}")
+        if self.future is None:
+            self.future = self.executor.submit(self.load, self.seq, self.ratings)
+        return self.ratings
+
+    def load(
+        self, seq: Optional[int], ratings: Dict[str, float]
+    ) -> Tuple[int, Dict[str, float]]:
+        if seq is None:
+            # Read the change first, so nothing written meanwhile is missed
+            seq = self.song_library.last_change()
+            return seq, self.song_library.get_ratings()
+        seq, song_ids = self.song_library.changes_since(seq)
+        if not song_ids:
+            return seq, ratings
+        # Removed and unrated songs drop out
+        changed_ids = set(song_ids)
+        ratings = {
+            song_id: rating
+            for song_id, rating in ratings.items()
+            if song_id not in changed_ids
+        }
+        ratings.update(self.song_library.get_ratings(list(changed_ids)))
+        return seq, ratings
@@ -0,0 +1,188 @@
+import random
+from abc import ABC, abstractmethod
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+from PyRetroPlayer.playlist.playlist import Playlist
+from PyRetroPlayer.playlist.playlist_entry import CompactId, PlaylistEntry
+
+# Scores above this count as this much, so the most likely entry is at most
+# eleven times as likely as one without a score
+MAX_SCORE = 10.0
+
+
+def build_alias_table(weights: List[float]) -> Tuple[List[float], List[int]]:
+    # Vose's alias method: column i keeps i with probability prob[i] and
+    # gives the rest to alias[i]
+    count = len(weights)
+    total = sum(weights)
+    prob = [weight * count / total for weight in weights]
+    alias = list(range(count))
+    small = [i for i, p in enumerate(prob) if p < 1.0]
+    large = [i for i, p in enumerate(prob) if p >= 1.0]
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+        alias[less] = more
+        prob[more] += prob[less] - 1.0
+        (small if prob[more] < 1.0 else large).append(more)
+    # Whatever is left is 1 up to rounding
+    for i in small + large:
+        prob[i] = 1.0
+    return prob, alias
+
+
+class Shuffle(ABC):
+    # Picks the entries of a playlist in random order, each once per round.
+    # The playlist may change between picks: added entries join the round,
+    # removed ones are left out
+    def __init__(self, playlist: Playlist, rng: Optional[random.Random] = None):
+        self.playlist = playlist
+        self.rng = rng or random.Random()
+        self.played: Set[CompactId] = set()
+
+    @abstractmethod
+    def next_entry(self) -> Optional[PlaylistEntry]:
+        # None once every entry was picked; the next call starts a new round
+        pass
+
+    def next_entries(self, count: int) -> List[PlaylistEntry]:
+        entries: List[PlaylistEntry] = []
+        while len(entries) < count:
+            entry = self.next_entry()
+            if entry is None:
+                break
+            entries.append(entry)
+        return entries
+
+    def mark_played(self, entry: PlaylistEntry) -> None:
+        # For an entry started by hand, which the round then skips
+        self.played.add(entry.entry_key)
+
+
+class LazyShuffle(Shuffle):
+    # Fisher-Yates over the rows, done one step per pick: the permutation is
+    # only stored where it differs from the identity, so nothing the size of
+    # the playlist is copied
+    def __init__(self, playlist: Playlist, rng: Optional[random.Random] = None):
+        super().__init__(playlist, rng)
+        self.size = len(playlist.entries)
+        self.drawn = 0
+        self.swaps: Dict[int, int] = {}
+
+    def draw_row(self) -> Optional[int]:
+        # Appended rows belong to the part not drawn yet, so the permutation
+        # simply grows with them
+        self.size = max(self.size, len(self.playlist.entries))
+        if self.drawn >= self.size:
+            return None
+        first = self.drawn
+        picked = self.rng.randrange(first, self.size)
+        row = self.swaps.get(picked, picked)
+        self.swaps[picked] = self.swaps.pop(first, first)
+        self.drawn += 1
+        return row
+
+    def next_entry(self) -> Optional[PlaylistEntry]:
+        while True:
+            row = self.draw_row()
+            if row is None:
+                if not self.restart():
+                    return None
+                continue
+            # Rows past the end were removed; entries moved by an edit may
+            # turn up twice, but only play once
+            entries = self.playlist.entries
+            if row < len(entries) and entries[row].entry_key not in self.played:
+                self.played.add(entries[row].entry_key)
+                return entries[row]
+
+    def restart(self) -> bool:
+        # Entries moved by an edit may have been missed; they get another
+        # pass in which everything played is skipped. Returns False when the
+        # round is over
+        entries = self.playlist.entries
+        self.played = {
+            key for key in self.played if self.playlist.row_of_key(key) is not None
+        }
+        missed = len(self.played) < len(entries)
+        if not missed:
+            self.played = set()
+        self.size = len(entries)
+        self.drawn = 0
+        self.swaps = {}
+        return missed
+
+
+class WeightedShuffle(Shuffle):
+    # Picks with an alias table over the entries weighted by a score per
+    # song, e.g. its rating or play count. Picked entries are rejected, and
+    # the table is rebuilt over the rest once they hold less than half of
+    # its weight, so a pick takes O(1) amortised
+    def __init__(
+        self,
+        playlist: Playlist,
+        scores: Mapping[str, float],
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        super().__init__(playlist, rng)
+        self.scores = scores
+        self.entries: List[PlaylistEntry] = []
+        self.weights: List[float] = []
+        self.prob: List[float] = []
+        self.alias: List[int] = []
+        self.total_weight = 0.0
+        self.played_weight = 0.0
+        # Playlist length the table was built at, a change rebuilds it
+        self.size = -1
+
+    def weight_of(self, entry: PlaylistEntry) -> float:
+        return 1.0 + min(max(self.scores.get(entry.song_id, 0.0), 0.0), MAX_SCORE)
+
+    def rebuild(self) -> None:
+        self.entries = [
+            entry
+            for entry in self.playlist.entries
+            if entry.entry_key not in self.played
+        ]
+        self.weights = [self.weight_of(entry) for entry in self.entries]
+        self.prob, self.alias = (
+            build_alias_table(self.weights) if self.entries else ([], [])
+        )
+        self.total_weight = sum(self.weights)
+        self.played_weight = 0.0
+        self.size = len(self.playlist.entries)
+
+    def next_entry(self) -> Optional[PlaylistEntry]:
+        if len(self.playlist.entries) != self.size:
+            self.rebuild()
+        while self.entries:
+            if self.played_weight * 2 > self.total_weight:
+                self.rebuild()
+                continue
+            index = self.rng.randrange(len(self.entries))
+            if self.rng.random() >= self.prob[index]:
+                index = self.alias[index]
+            entry = self.entries[index]
+            if entry.entry_key in self.played:
+                continue
+            self.played.add(entry.entry_key)
+            self.played_weight += self.weights[index]
+            # Removed by an edit that kept the length
+            if self.playlist.row_of_key(entry.entry_key) is None:
+                continue
+            return entry
+
+        self.played = set()
+        self.size = -1
+        return None
+
+    def mark_played(self, entry: PlaylistEntry) -> None:
+        super().mark_played(entry)
+        # Left out of the table from the next pick on
+        self.size = -1
+
+    def set_scores(self, scores: Mapping[str, float]) -> None:
+        # Weighs the next picks by the new scores
+        if scores is not self.scores:
+            self.scores = scores
+            self.size = -1
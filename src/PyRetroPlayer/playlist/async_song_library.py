@@ -0,0 +1,133 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from loguru import logger
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+
+from PyRetroPlayer.playlist.song import Song
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+
+class AsyncSongLibrary(QObject):
+    # Songs found in one batch and the requested ids that do not exist
+    songs_ready = Signal(list, list)
+
+    # Emitted from the reader thread: futures of the batch by requested id,
+    # songs by id, error
+    _batch_loaded = Signal(object, object, object)
+
+    def __init__(
+        self,
+        song_library: SongLibrary,
+        batch_size: int = 500,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.song_library = song_library
+        self.batch_size = batch_size
+
+        # Reads run on a single thread, so batches arrive in request order
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="SongLibraryReader"
+        )
+
+        # Requests made during the current event loop iteration
+        self._pending: Dict[str, List[Future[Optional[Song]]]] = {}
+        self._pending_details: Set[str] = set()
+        self._flush_scheduled = False
+        self._closed = False
+
+        self._batch_loaded.connect(
+            self._on_batch_loaded, Qt.ConnectionType.QueuedConnection
+        )
+
+    def get_song(
+        self, song_id: str, with_details: bool = False
+    ) -> Future[Optional[Song]]:
+        # The future is resolved on the GUI thread, so done callbacks can touch
+        # widgets
+        future: Future[Optional[Song]] = Future()
+        self._pending.setdefault(song_id, []).append(future)
+        if with_details:
+            self._pending_details.add(song_id)
+        self._schedule_flush()
+        return future
+
+    def request_song(
+        self,
+        song_id: str,
+        callback: Callable[[Song], None],
+        with_details: bool = False,
+    ) -> None:
+        def on_done(future: Future[Optional[Song]]) -> None:
+            if future.exception() is None:
+                song = future.result()
+                if song is not None:
+                    callback(song)
+
+        self.get_song(song_id, with_details).add_done_callback(on_done)
+
+    def request_songs(self, song_ids: Iterable[str]) -> None:
+        # Results are only delivered through songs_ready
+        for song_id in song_ids:
+            self._pending.setdefault(song_id, [])
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if not self._flush_scheduled and not self._closed:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        details, self._pending_details = self._pending_details, set()
+        if self._closed or not pending:
+            return
+
+        # Each batch resolves only the futures of its own requests, a later
+        # request for the same song may want its details or newer data
+        song_ids = list(pending)
+        for start in range(0, len(song_ids), self.batch_size):
+            batch = {
+                song_id: pending[song_id]
+                for song_id in song_ids[start : start + self.batch_size]
+            }
+            self.executor.submit(self._load_batch, batch, details)
+
+    def _load_batch(
+        self, futures: Dict[str, List[Future[Optional[Song]]]], details: Set[str]
+    ) -> None:
+        song_ids = list(futures)
+        try:
+            songs = {song.id: song for song in self.song_library.get_songs(song_ids)}
+            for song_id in details:
+                if song_id in songs:
+                    # Accessing custom_metadata pulls in the heavy details
+                    songs[song_id].custom_metadata
+            self._batch_loaded.emit(futures, songs, None)
+        except Exception as e:
+            logger.exception(f"Failed to load {len(song_ids)} songs: {e}")
+            self._batch_loaded.emit(futures, {}, e)
+
+    def _on_batch_loaded(
+        self,
+        futures: Dict[str, List[Future[Optional[Song]]]],
+        songs: Dict[str, Song],
+        error: Optional[Exception],
+    ) -> None:
+        song_ids = list(futures)
+        for song_id in song_ids:
+            for future in futures[song_id]:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(songs.get(song_id))
+
+        if error is None and not self._closed:
+            missing_ids = [song_id for song_id in song_ids if song_id not in songs]
+            self.songs_ready.emit(list(songs.values()), missing_ids)
+
+    def close(self) -> None:
+        self._closed = True
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -1,5 +1,6 @@
 from typing import Any, Dict, List, Optional
 
+from PySide6.QtCore import Signal
 from PySide6.QtGui import (
     QContextMenuEvent,
     Qt,
@@ -14,6 +15,8 @@ from PyRetroPlayer.playlist.column_manager import ColumnManager
 
 
 class CustomHeader(QHeaderView):
+    column_visibility_toggled = Signal(str, bool)
+
     def __init__(
         self,
         default_columns_definitions: List[Dict[str, Any]],
@@ -50,4 +53,5 @@ class CustomHeader(QHeaderView):
         menu.exec(global_pos)
 
     def on_column_visibility_toggled(self, column_id: str, visible: bool) -> None:
-        self.column_manager.set_column_visibility(column_id, visible)
+        # The view updates the column manager and its model
+        self.column_visibility_toggled.emit(column_id, visible)
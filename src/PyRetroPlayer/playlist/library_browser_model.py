@@ -0,0 +1,234 @@
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from PySide6.QtCore import (
+    QAbstractItemModel,
+    QByteArray,
+    QMimeData,
+    QModelIndex,
+    QPersistentModelIndex,
+    Qt,
+)
+
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+LIBRARY_MIME_TYPE = "application/x-pyretroplayer-library-songs"
+
+# (column, label) of the ways the browser groups the library
+BROWSE_COLUMNS: List[Tuple[str, str]] = [
+    ("artist", "Artist"),
+    ("format", "Format"),
+    ("player", "Player"),
+    ("folder", "Folder"),
+]
+
+GROUP_PAGE_SIZE = 500
+SONG_PAGE_SIZE = 200
+
+ITEM_FLAGS = (
+    Qt.ItemFlag.ItemIsEnabled
+    | Qt.ItemFlag.ItemIsSelectable
+    | Qt.ItemFlag.ItemIsDragEnabled
+)
+
+
+class LibraryGroup:
+    __slots__ = ("value", "count", "songs", "exhausted")
+
+    def __init__(self, value: Any, count: int) -> None:
+        self.value = value
+        self.count = count
+        # (rowid, song id, text) of the songs loaded so far
+        self.songs: List[Tuple[int, str, str]] = []
+        self.exhausted = False
+
+
+class LibraryBrowserModel(QAbstractItemModel):
+    # Two levels: the distinct values of a song column, and the songs with
+    # that value. Both are loaded a page at a time as the view scrolls to
+    # them, so neither the groups nor a group's songs are ever read in full.
+    # Group indexes have internal id 0, song indexes the group row + 1
+    def __init__(
+        self,
+        song_library: SongLibrary,
+        column: str = "artist",
+        parent: Optional[Any] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.song_library = song_library
+        self.column = column
+        self.groups: List[LibraryGroup] = []
+        self.groups_exhausted = False
+        # Library change the groups were read at
+        self.library_change = song_library.last_change()
+
+    def set_column(self, column: str) -> None:
+        self.column = column
+        self.reset()
+
+    def reset(self) -> None:
+        self.beginResetModel()
+        self.groups = []
+        self.groups_exhausted = False
+        self.library_change = self.song_library.last_change()
+        self.endResetModel()
+
+    def refresh(self) -> None:
+        # Start over if the library changed since the groups were read
+        if self.song_library.last_change() != self.library_change:
+            self.reset()
+
+    def index(
+        self,
+        row: int,
+        column: int,
+        parent: QModelIndex | QPersistentModelIndex = QModelIndex(),
+    ) -> QModelIndex:
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if parent.isValid():
+            return self.createIndex(row, column, parent.row() + 1)
+        return self.createIndex(row, column, 0)
+
+    def parent(self, index: QModelIndex | QPersistentModelIndex) -> QModelIndex:  # type: ignore
+        if not index.isValid() or index.internalId() == 0:
+            return QModelIndex()
+        return self.createIndex(index.internalId() - 1, 0, 0)
+
+    def group_of(self, index: QModelIndex | QPersistentModelIndex) -> LibraryGroup:
+        # The group of a group index or of a song index
+        row = index.row() if index.internalId() == 0 else index.internalId() - 1
+        return self.groups[row]
+
+    def rowCount(
+        self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()
+    ) -> int:
+        if not parent.isValid():
+            return len(self.groups)
+        if parent.internalId() == 0 and parent.column() == 0:
+            return len(self.groups[parent.row()].songs)
+        return 0
+
+    def columnCount(
+        self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()
+    ) -> int:
+        return 1
+
+    def hasChildren(
+        self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()
+    ) -> bool:
+        # Groups show as expandable before their songs are loaded
+        return not parent.isValid() or parent.internalId() == 0
+
+    def canFetchMore(self, parent: QModelIndex | QPersistentModelIndex) -> bool:
+        if not parent.isValid():
+            return not self.groups_exhausted
+        if parent.internalId() == 0:
+            return not self.groups[parent.row()].exhausted
+        return False
+
+    def fetchMore(self, parent: QModelIndex | QPersistentModelIndex) -> None:
+        if not parent.isValid():
+            self.fetch_groups()
+        elif parent.internalId() == 0:
+            self.fetch_songs(parent)
+
+    def fetch_groups(self) -> None:
+        after = self.groups[-1].value if self.groups else None
+        rows = self.song_library.group_counts(self.column, after, GROUP_PAGE_SIZE)
+        if len(rows) < GROUP_PAGE_SIZE:
+            self.groups_exhausted = True
+        if not rows:
+            return
+        first = len(self.groups)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.groups.extend(LibraryGroup(value, count) for value, count in rows)
+        self.endInsertRows()
+
+    def fetch_songs(self, parent: QModelIndex | QPersistentModelIndex) -> None:
+        group = self.groups[parent.row()]
+        after_rowid = group.songs[-1][0] if group.songs else 0
+        rows = self.song_library.group_song_rows(
+            self.column, group.value, after_rowid, SONG_PAGE_SIZE
+        )
+        if len(rows) < SONG_PAGE_SIZE:
+            group.exhausted = True
+        if not rows:
+            return
+        first = len(group.songs)
+        self.beginInsertRows(parent, first, first + len(rows) - 1)
+        group.songs.extend(
+            (
+                row["rowid"],
+                row["id"],
+                row["title"] or (row["file_path"] or "").split("/")[-1],
+            )
+            for row in rows
+        )
+        self.endInsertRows()
+
+    def data(
+        self,
+        index: QModelIndex | QPersistentModelIndex,
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        group = self.group_of(index)
+        if index.internalId() == 0:
+            value = group.value if group.value not in (None, "") else "Unknown"
+            return f"{value} ({group.count})"
+        return group.songs[index.row()][2]
+
+    def flags(self, index: QModelIndex | QPersistentModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return ITEM_FLAGS
+
+    # Dragging into playlists
+
+    def supportedDragActions(self) -> Qt.DropAction:
+        return Qt.DropAction.CopyAction
+
+    def mimeTypes(self) -> List[str]:
+        return [LIBRARY_MIME_TYPE]
+
+    def mime_payload(self, indexes: Sequence[QModelIndex]) -> str:
+        # Whole groups go by their value and are resolved on drop, songs of
+        # a dragged group are not listed again
+        group_rows = sorted(
+            set(index.row() for index in indexes if index.internalId() == 0)
+        )
+        song_ids = [
+            self.group_of(index).songs[index.row()][1]
+            for index in sorted(
+                (index for index in indexes if index.internalId() != 0),
+                key=lambda index: (index.internalId(), index.row()),
+            )
+            if index.internalId() - 1 not in group_rows
+        ]
+        return json.dumps(
+            {
+                "column": self.column,
+                "groups": [self.groups[row].value for row in group_rows],
+                "songs": list(dict.fromkeys(song_ids)),
+            }
+        )
+
+    def mimeData(self, indexes: Sequence[QModelIndex]) -> QMimeData:
+        mime_data = QMimeData()
+        mime_data.setData(
+            LIBRARY_MIME_TYPE, QByteArray(self.mime_payload(indexes).encode())
+        )
+        return mime_data
+
+    def song_ids_of(self, payload: str) -> List[str]:
+        # Ids only, a dragged group is read in keyset pages
+        data = json.loads(payload)
+        song_ids: List[str] = []
+        for value in data.get("groups", []):
+            song_ids.extend(
+                self.song_library.find_song_ids([(data["column"], "=", value)])
+            )
+        song_ids.extend(data.get("songs", []))
+        return song_ids
@@ -0,0 +1,76 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# (song_id, file_name) pairs of a single directory
+DirectoryFiles = List[Tuple[str, str]]
+
+
+def group_by_directory(songs: Iterable[Tuple[str, str]]) -> Dict[str, DirectoryFiles]:
+    directories: Dict[str, DirectoryFiles] = {}
+    for song_id, file_path in songs:
+        directory, file_name = os.path.split(file_path)
+        directories.setdefault(directory, []).append((song_id, file_name))
+    return directories
+
+
+def _list_directory(directory: str) -> Optional[Set[str]]:
+    # One directory listing replaces a stat per file, which matters most on
+    # network mounts; None means the listing failed for another reason than
+    # the directory being gone
+    try:
+        with os.scandir(directory or ".") as it:
+            names: Set[str] = set()
+            for entry in it:
+                # Broken symlinks are listed but count as missing, just like
+                # os.path.exists would report them
+                if entry.is_symlink() and not os.path.exists(entry.path):
+                    continue
+                names.add(entry.name)
+            return names
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+    except OSError:
+        return None
+
+
+def find_missing_in_directory(directory: str, files: DirectoryFiles) -> List[str]:
+    names = _list_directory(directory)
+    if names is None:
+        return [
+            song_id
+            for song_id, file_name in files
+            if not os.path.exists(os.path.join(directory, file_name))
+        ]
+    return [song_id for song_id, file_name in files if file_name not in names]
+
+
+def find_missing_songs(
+    songs: Iterable[Tuple[str, str]],
+    max_workers: int = 8,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> List[str]:
+    directories = group_by_directory(songs)
+    total = sum(len(files) for files in directories.values())
+    checked = 0
+    missing: List[str] = []
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            executor.submit(find_missing_in_directory, directory, files): len(files)
+            for directory, files in directories.items()
+        }
+        for future in as_completed(futures):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            missing.extend(future.result())
+            checked += futures[future]
+            if progress:
+                progress(checked, total)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return missing
@@ -1,10 +1,26 @@
 import json
 import uuid
-from typing import Any, Callable, Dict, List, Optional
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 from loguru import logger
 
-from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry
+from PyRetroPlayer.playlist.playlist_entry import (
+    CompactId,
+    PlaylistEntry,
+    compact_id,
+)
+from PyRetroPlayer.playlist.playlist_positions import (
+    POSITION_STEP,
+    fresh_positions,
+    is_strictly_increasing,
+    positions_between,
+    reassign_positions,
+)
+from PyRetroPlayer.playlist.playlist_stats import PlaylistStats
+from PyRetroPlayer.playlist.smart_playlist import SmartQuery
+from PyRetroPlayer.playlist.song import Song
+from PyRetroPlayer.playlist.song_entry_index import SongEntryIndex
 from PyRetroPlayer.playlist.song_library import SongLibrary
 
 
@@ -19,42 +35,180 @@ class Playlist:
         self.name = name
         self.entries = entries or []
         self.song_added: Optional[Callable[[PlaylistEntry], None]] = None
+        # Receives all entries appended in one batch; song_added is only
+        # called per entry when this is not set
+        self.songs_added: Optional[Callable[[List[PlaylistEntry]], None]] = None
         self.song_removed: Optional[Callable[[PlaylistEntry], None]] = None
+        # Receives the former rows of all entries removed in one batch;
+        # song_removed is only called per entry when this is not set
+        self.songs_removed: Optional[Callable[[List[int]], None]] = None
         self.song_playing: Optional[Callable[[Optional[PlaylistEntry]], None]] = None
         self.current_song_index: int = -1
+        # Set for smart playlists, whose entries follow a library query
+        self.query: Optional[SmartQuery] = None
+
+        # Persistence hooks: entries whose row was added or moved, and entries
+        # that are gone. What they return is ignored
+        self.entries_changed: Optional[Callable[[List[PlaylistEntry]], object]] = None
+        self.entries_deleted: Optional[Callable[[List[PlaylistEntry]], object]] = None
+        # Shared index of the entries of all managed playlists
+        self.song_index: Optional[SongEntryIndex] = None
+
+        # Row of each entry by entry key. Rows below the watermark are known to
+        # be right; a change at some row only lowers the watermark, and rows
+        # above it are indexed again on the next lookup that needs them
+        self._entry_rows: Dict[CompactId, int] = {}
+        self._indexed_rows = 0
+
+        # Entries loaded from JSON carry no positions yet
+        if not is_strictly_increasing([entry.position for entry in self.entries]):
+            for entry, position in zip(
+                self.entries, fresh_positions(len(self.entries))
+            ):
+                entry.position = position
+
+        # Counted right away, everything else is looked up on the first update
+        # unless totals stored with the playlist are loaded
+        self.stats = PlaylistStats()
+        self.stats.entry_count = len(self.entries)
+        self.stats.stale = bool(self.entries)
+
+    def _invalidate_rows(self, row: int) -> None:
+        self._indexed_rows = min(self._indexed_rows, row)
+
+    def _index_rows(self) -> None:
+        entries = self.entries
+        entry_rows = self._entry_rows
+        for row in range(self._indexed_rows, len(entries)):
+            entry_rows[entries[row].entry_key] = row
+        self._indexed_rows = len(entries)
+
+    def row_of(self, entry: PlaylistEntry) -> Optional[int]:
+        return self.row_of_key(entry.entry_key)
+
+    def row_of_key(self, entry_key: CompactId) -> Optional[int]:
+        row = self._entry_rows.get(entry_key)
+        if row is not None and row < self._indexed_rows:
+            return row
+        self._index_rows()
+        return self._entry_rows.get(entry_key)
+
+    def _append_entry(self, entry: PlaylistEntry) -> None:
+        self.entries.append(entry)
+        if self._indexed_rows == len(self.entries) - 1:
+            self._entry_rows[entry.entry_key] = self._indexed_rows
+            self._indexed_rows += 1
+
+    def _forget_entries(self, entries: List[PlaylistEntry], first_row: int) -> None:
+        for entry in entries:
+            self._entry_rows.pop(entry.entry_key, None)
+        self._invalidate_rows(first_row)
+
+    def _next_position(self) -> float:
+        return self.entries[-1].position + POSITION_STEP if self.entries else 1.0
+
+    def _notify_changed(self, entries: List[PlaylistEntry]) -> None:
+        if entries and self.entries_changed:
+            self.entries_changed(entries)
+
+    def _notify_deleted(self, entries: List[PlaylistEntry]) -> None:
+        if entries and self.entries_deleted:
+            self.entries_deleted(entries)
 
     def add_song(self, song_id: str) -> PlaylistEntry:
         entry = PlaylistEntry(song_id)
-        self.entries.append(entry)
-        if self.song_added:
-            self.song_added(entry)
+        self.add_entries([entry])
         return entry
 
+    def add_songs(self, song_ids: Iterable[str]) -> List[PlaylistEntry]:
+        entries = [PlaylistEntry(song_id) for song_id in song_ids]
+        self.add_entries(entries)
+        return entries
+
     def add_entry(self, entry: PlaylistEntry) -> None:
-        self.entries.append(entry)
-        if self.song_added:
-            self.song_added(entry)
+        self.add_entries([entry])
+
+    def add_entries(self, entries: List[PlaylistEntry]) -> None:
+        if not entries:
+            return
+        position = self._next_position()
+        for entry in entries:
+            entry.position = position
+            position += POSITION_STEP
+            self._append_entry(entry)
+
+        self._notify_changed(entries)
+        self.stats.entries_added(entries)
+        if self.song_index is not None:
+            self.song_index.add(self.id, entries)
+        if self.songs_added:
+            self.songs_added(entries)
+        elif self.song_added:
+            for entry in entries:
+                self.song_added(entry)
+
+    def entries_of_songs(self, song_ids: Iterable[str]) -> List[PlaylistEntry]:
+        # Found through the shared index when the playlist is managed, without
+        # looking at the other entries
+        song_keys = set(map(compact_id, song_ids))
+        if self.song_index is not None:
+            return self.song_index.entries_by_playlist(song_keys).get(self.id, [])
+        return [entry for entry in self.entries if entry.song_key in song_keys]
 
     def remove_song(self, song_id: str) -> None:
-        removed_entry = None
-        new_entries: List[PlaylistEntry] = []
-        for entry in self.entries:
-            if entry.song_id == song_id and removed_entry is None:
-                removed_entry = entry
-                continue
-            new_entries.append(entry)
-        self.entries = new_entries
-        if removed_entry and self.song_removed:
-            self.song_removed(removed_entry)
+        # The first entry of the song
+        rows = [self.row_of(entry) for entry in self.entries_of_songs([song_id])]
+        found = [row for row in rows if row is not None]
+        if found:
+            self.remove_rows([min(found)])
+
+    def remove_songs(self, song_ids: Iterable[str]) -> List[PlaylistEntry]:
+        return self.remove_entries(self.entries_of_songs(song_ids))
+
+    def remove_entries(self, entries: Iterable[PlaylistEntry]) -> List[PlaylistEntry]:
+        rows = [self.row_of(entry) for entry in entries]
+        return self.remove_rows(row for row in rows if row is not None)
+
+    def remove_rows(self, rows: Iterable[int]) -> List[PlaylistEntry]:
+        removed_rows = sorted(set(row for row in rows if 0 <= row < len(self.entries)))
+        if not removed_rows:
+            return []
+
+        removed_entries = [self.entries[row] for row in removed_rows]
+        removed = set(removed_rows)
+        if len(removed_rows) == 1:
+            del self.entries[removed_rows[0]]
+        else:
+            self.entries = [
+                entry for row, entry in enumerate(self.entries) if row not in removed
+            ]
+        self._forget_entries(removed_entries, removed_rows[0])
+
+        if self.current_song_index in removed:
+            self.current_song_index = -1
+        elif self.current_song_index >= 0:
+            self.current_song_index -= bisect_left(
+                removed_rows, self.current_song_index
+            )
+
+        self._notify_deleted(removed_entries)
+        self.stats.entries_removed(removed_entries)
+        if self.song_index is not None:
+            self.song_index.remove(self.id, removed_entries)
+        if self.songs_removed:
+            self.songs_removed(removed_rows)
+        elif self.song_removed:
+            for entry in removed_entries:
+                self.song_removed(entry)
+        return removed_entries
 
     def set_currently_playing_entry(self, entry: Optional[PlaylistEntry]) -> None:
         if entry is None:
             self.current_song_index = -1
         else:
-            for idx, e in enumerate(self.entries):
-                if e.entry_id == entry.entry_id:
-                    self.current_song_index = idx
-                    break
+            row = self.row_of(entry)
+            if row is not None:
+                self.current_song_index = row
         if self.song_playing:
             self.song_playing(entry)
 
@@ -67,31 +221,40 @@ class Playlist:
     def get_entries(self) -> List[PlaylistEntry]:
         return self.entries
 
-    def get_songs_metadata(self, song_library: SongLibrary) -> List[PlaylistEntry]:
-        songs: List[PlaylistEntry] = []
-        to_remove: List[str] = []
-        for entry in self.entries:
-            song = song_library.get_song_by_id(entry.song_id)
-            if song is not None:
-                logger.info(f"Found song: {entry.song_id}")
-                songs.append(entry)
-            else:
-                logger.warning(
-                    f"Song not found: {entry.song_id}, removing from playlist"
-                )
-                to_remove.append(entry.song_id)
-        for song_id in to_remove:
-            self.remove_song(song_id)
+    def resolve_songs(
+        self, song_library: SongLibrary, batch_size: int = 500
+    ) -> Dict[str, Song]:
+        # Looks up every distinct song once, in chunks, and drops the entries
+        # whose song is gone in a single pass
+        song_ids = list(dict.fromkeys(entry.song_id for entry in self.entries))
+        songs = {song.id: song for song in song_library.get_songs(song_ids, batch_size)}
+        missing_ids = [song_id for song_id in song_ids if song_id not in songs]
+        if missing_ids:
+            logger.warning(
+                f"{len(missing_ids)} songs not found in library, removing from playlist"
+            )
+            self.remove_songs(missing_ids)
         return songs
 
+    def get_songs_metadata(self, song_library: SongLibrary) -> List[PlaylistEntry]:
+        self.resolve_songs(song_library)
+        return list(self.entries)
+
     @staticmethod
-    def load_playlist(file_path: str) -> Optional["Playlist"]:
+    def load_playlist(file_path: str, new_ids: bool = False) -> Optional["Playlist"]:
+        # new_ids gives the playlist and its entries fresh ids, for importing
+        # a copy of a playlist that may still be open
         try:
             with open(file_path, "r") as f:
                 playlist_data: Dict[str, Any] = json.load(f)
                 logger.info(f"Loaded playlist: {playlist_data.get('name')}")
                 entries = [
-                    PlaylistEntry.from_dict(e) for e in playlist_data.get("entries", [])
+                    (
+                        PlaylistEntry(e.get("song_id", ""))
+                        if new_ids
+                        else PlaylistEntry.from_dict(e)
+                    )
+                    for e in playlist_data.get("entries", [])
                 ]
                 # fallback for old format
                 if not entries and "song_ids" in playlist_data:
@@ -100,7 +263,7 @@ class Playlist:
                         for song_id in playlist_data.get("song_ids", [])
                     ]
                 playlist = Playlist(
-                    id=playlist_data.get("id"),
+                    id=None if new_ids else playlist_data.get("id"),
                     name=playlist_data.get("name"),
                     entries=entries,
                 )
@@ -136,11 +299,105 @@ class Playlist:
             return
         try:
             self.entries = [self.entries[i] for i in order]
-            logger.info(
-                f"Playlist order updated: {[entry.song_id for entry in self.entries]}"
-            )
+            logger.info(f"Playlist order updated for {len(self.entries)} entries")
         except IndexError as e:
             logger.error(f"Invalid index in order list: {e}")
+            return
+        first_moved = next(
+            (row for row, old_row in enumerate(order) if row != old_row), len(order)
+        )
+        self._invalidate_rows(first_moved)
+        if first_moved <= self.current_song_index < len(order):
+            self.current_song_index = order.index(self.current_song_index)
+        self._update_positions()
+
+    def sort_entries(self, keys: List[Any], reverse: bool = False) -> None:
+        # keys holds one precomputed sort key per row; the sort is stable
+        if len(keys) != len(self.entries):
+            logger.error("Sort keys do not match number of songs in playlist.")
+            return
+        order = sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
+        if all(row == old_row for row, old_row in enumerate(order)):
+            return
+
+        self.entries = [self.entries[i] for i in order]
+        self._invalidate_rows(0)
+        if 0 <= self.current_song_index < len(order):
+            self.current_song_index = order.index(self.current_song_index)
+        # A sort moves most rows, renumbering is cheaper than finding the few
+        # that could keep their position
+        self.rebalance_positions()
+        logger.info(f"Playlist sorted, {len(self.entries)} entries")
+
+    def move_entries(self, rows: Iterable[int], dest: int) -> Optional[int]:
+        # Moves the entries at rows, in their order, in front of row dest
+        # (counted before the move). Returns the new row of the first moved
+        # entry, or None if nothing moved
+        moved_rows = sorted(set(row for row in rows if 0 <= row < len(self.entries)))
+        if not moved_rows:
+            return None
+        dest = max(0, min(dest, len(self.entries)))
+        first, last = moved_rows[0], moved_rows[-1]
+        contiguous = last - first + 1 == len(moved_rows)
+        if contiguous and first <= dest <= last + 1:
+            return None
+
+        current_entry = (
+            self.entries[self.current_song_index]
+            if 0 <= self.current_song_index < len(self.entries)
+            else None
+        )
+        moved_entries = [self.entries[row] for row in moved_rows]
+        if contiguous:
+            remaining = self.entries[:first] + self.entries[last + 1 :]
+        else:
+            moved = set(moved_rows)
+            remaining = [
+                entry for row, entry in enumerate(self.entries) if row not in moved
+            ]
+        new_row = dest - bisect_left(moved_rows, dest)
+        remaining[new_row:new_row] = moved_entries
+        self.entries = remaining
+        self._invalidate_rows(min(first, new_row))
+
+        if current_entry is not None:
+            self.current_song_index = self.row_of(current_entry)  # type: ignore
+
+        # Only the moved entries need positions, between their new neighbours
+        end = new_row + len(moved_entries)
+        positions = positions_between(
+            self.entries[new_row - 1].position if new_row > 0 else None,
+            self.entries[end].position if end < len(self.entries) else None,
+            len(moved_entries),
+        )
+        if positions is None:
+            self.rebalance_positions()
+        else:
+            for entry, position in zip(moved_entries, positions):
+                entry.position = position
+            self._notify_changed(moved_entries)
+        logger.info(f"Moved {len(moved_entries)} entries to row {new_row}")
+        return new_row
+
+    def _update_positions(self) -> None:
+        # Only entries that left the longest still ordered run get new
+        # positions, so a move persists a handful of rows
+        changes = reassign_positions([entry.position for entry in self.entries])
+        if changes is None:
+            self.rebalance_positions()
+            return
+
+        changed: List[PlaylistEntry] = []
+        for index, position in changes.items():
+            entry = self.entries[index]
+            entry.position = position
+            changed.append(entry)
+        self._notify_changed(changed)
+
+    def rebalance_positions(self) -> None:
+        for entry, position in zip(self.entries, fresh_positions(len(self.entries))):
+            entry.position = position
+        self._notify_changed(list(self.entries))
 
     def get_song_id_by_index(self, index: int) -> Optional[str]:
         if 0 <= index < len(self.entries):
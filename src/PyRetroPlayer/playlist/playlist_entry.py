@@ -1,11 +1,63 @@
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
 from uuid import uuid4
 
+# Canonical uuid strings are kept as their 128 bit integer, anything else
+# (empty or hand-written ids) as the original string
+CompactId = Union[int, str]
+
+
+def compact_id(value: str) -> CompactId:
+    if len(value) == 36 and value[8] == value[13] == value[18] == value[23] == "-":
+        try:
+            int_value = int(value.replace("-", ""), 16)
+        except ValueError:
+            return value
+        # Only canonical spellings, so the string round-trips unchanged
+        if expand_id(int_value) == value:
+            return int_value
+    return value
+
+
+def expand_id(value: CompactId) -> str:
+    if isinstance(value, int):
+        # Same as str(UUID(int=value)), without building the UUID
+        h = f"{value:032x}"
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+    return value
+
 
 class PlaylistEntry:
-    def __init__(self, song_id: str, entry_id: Optional[str] = None):
-        self.song_id = song_id
-        self.entry_id = entry_id or str(uuid4())  # unique per row
+    __slots__ = ("_song_id", "_entry_id", "position")
+
+    def __init__(
+        self, song_id: str, entry_id: Optional[str] = None, position: float = 0.0
+    ):
+        self._song_id = compact_id(song_id)
+        # unique per row
+        self._entry_id: CompactId = compact_id(entry_id) if entry_id else uuid4().int
+        # Sort key within the playlist, see playlist_positions
+        self.position = position
+
+    @property
+    def song_id(self) -> str:
+        return expand_id(self._song_id)
+
+    @song_id.setter
+    def song_id(self, song_id: str) -> None:
+        self._song_id = compact_id(song_id)
+
+    @property
+    def song_key(self) -> CompactId:
+        return self._song_id
+
+    @property
+    def entry_id(self) -> str:
+        return expand_id(self._entry_id)
+
+    @property
+    def entry_key(self) -> CompactId:
+        # Cheap to hash and compare, unlike entry_id which is built on access
+        return self._entry_id
 
     def to_dict(self):
         return {"song_id": self.song_id, "entry_id": self.entry_id}
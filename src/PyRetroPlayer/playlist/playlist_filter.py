@@ -0,0 +1,108 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import DefaultDict, Dict, Iterable, List, Optional, Set, Tuple
+
+from PyRetroPlayer.playlist.playlist_entry import CompactId
+from PyRetroPlayer.playlist.song import Song
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def split_terms(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+def song_tokens(song: Song) -> Tuple[str, ...]:
+    file_name = song.file_path.split("/")[-1] if song.file_path else ""
+    song_format = song.get_metadata("type") or song.get_metadata("formatname") or ""
+    return tuple(
+        split_terms(f"{song.title or ''} {song.artist or ''} {file_name} {song_format}")
+    )
+
+
+def matches_terms(tokens: Tuple[str, ...], terms: Iterable[str]) -> bool:
+    return all(any(token.startswith(term) for token in tokens) for term in terms)
+
+
+class PlaylistFilter:
+    # Token index over the songs of one playlist view. A song matches when
+    # every term of the query starts a word of its title, artist, file name
+    # or format
+    def __init__(self) -> None:
+        self.tokens: Dict[CompactId, Tuple[str, ...]] = {}
+        self.postings: DefaultDict[str, Set[CompactId]] = defaultdict(set)
+        self._sorted_tokens: Optional[List[str]] = None
+
+        # Last query and its matches; typing on only narrows them down
+        self.query = ""
+        self.matches: Optional[Set[CompactId]] = None
+
+    def add_songs(self, songs: Iterable[Tuple[CompactId, Song]]) -> bool:
+        # Takes (song key, song) pairs, returns whether the current matches
+        # changed
+        changed = False
+        terms = split_terms(self.query)
+        postings = self.postings
+        token_count = len(postings)
+        for song_key, song in songs:
+            tokens = song_tokens(song)
+            previous = self.tokens.get(song_key)
+            if previous == tokens:
+                continue
+            if previous is not None:
+                for token in previous:
+                    postings[token].discard(song_key)
+            self.tokens[song_key] = tokens
+            for token in tokens:
+                postings[token].add(song_key)
+
+            if self.matches is not None:
+                if matches_terms(tokens, terms):
+                    if song_key not in self.matches:
+                        self.matches.add(song_key)
+                        changed = True
+                elif song_key in self.matches:
+                    self.matches.discard(song_key)
+                    changed = True
+
+        if len(postings) != token_count:
+            self._sorted_tokens = None
+        return changed
+
+    def prefix_matches(self, term: str) -> Set[CompactId]:
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self.postings)
+        sorted_tokens = self._sorted_tokens
+        song_keys: Set[CompactId] = set()
+        i = bisect_left(sorted_tokens, term)
+        while i < len(sorted_tokens) and sorted_tokens[i].startswith(term):
+            song_keys |= self.postings[sorted_tokens[i]]
+            i += 1
+        return song_keys
+
+    def search(self, query: str) -> Optional[Set[CompactId]]:
+        # None when the query has no terms, i.e. nothing is filtered
+        terms = split_terms(query)
+        if not terms:
+            self.query = ""
+            self.matches = None
+            return None
+
+        if self.matches is not None and query.startswith(self.query):
+            # Appending to the query can only drop matches
+            candidates: Iterable[CompactId] = self.matches
+        else:
+            # Start from the longest term, usually the rarest one
+            longest = max(terms, key=len)
+            candidates = self.prefix_matches(longest)
+            terms = [term for term in terms if term != longest]
+
+        tokens = self.tokens
+        self.matches = {
+            song_key
+            for song_key in candidates
+            if matches_terms(tokens[song_key], terms)
+        }
+        self.query = query
+        return self.matches
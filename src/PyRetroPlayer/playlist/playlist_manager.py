@@ -1,51 +1,189 @@
 import os
-from typing import List
+import re
+import time
+from typing import Dict, Iterable, List, Optional
 
 from appdirs import user_data_dir
 from loguru import logger
 
 from PyRetroPlayer.playlist.playlist import Playlist
+from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry, compact_id
+from PyRetroPlayer.playlist.playlist_store import PlaylistStore
+from PyRetroPlayer.playlist.song_entry_index import SongEntryIndex
+from PyRetroPlayer.playlist.song_library import SongLibrary
 
 
 class PlaylistManager:
-    def __init__(self, app_name: str) -> None:
+    def __init__(
+        self,
+        app_name: str,
+        song_library: SongLibrary,
+        playlists_path: Optional[str] = None,
+    ) -> None:
         self.app_name = app_name
-        self.playlists_path = os.path.join(user_data_dir(self.app_name), "playlist")
+        self.playlists_path = playlists_path or os.path.join(
+            user_data_dir(self.app_name), "playlist"
+        )
         os.makedirs(self.playlists_path, exist_ok=True)
+        self.store = PlaylistStore(song_library)
         self.playlists: List[Playlist] = []
+        self.song_index = SongEntryIndex()
+
+    def attach(self, playlist: Playlist) -> None:
+        self.store.attach(playlist)
+        playlist.song_index = self.song_index
+        self.song_index.add(playlist.id, playlist.entries)
+
+    def detach(self, playlist: Playlist) -> None:
+        self.store.detach(playlist)
+        playlist.song_index = None
+        self.song_index.remove(playlist.id, playlist.entries)
 
     def add_playlist(self, playlist: Playlist) -> None:
         self.playlists.append(playlist)
+        self.store.add_playlist(playlist, len(self.playlists) - 1)
+        self.attach(playlist)
         logger.info(f"Added playlist: {playlist.name}")
 
     def delete_playlist(self, index: int) -> None:
         if 0 <= index < len(self.playlists):
-            playlist_name = self.playlists[index].name
-            del self.playlists[index]
-            logger.info(f"Deleted playlist: {playlist_name}")
+            playlist = self.playlists.pop(index)
+            self.detach(playlist)
+            self.store.delete_playlist(playlist.id)
+            self.store.update_playlists(self.playlists)
+            logger.info(f"Deleted playlist: {playlist.name}")
         else:
             logger.warning("Invalid playlist index to delete.")
 
     def load_playlists(self) -> None:
-        self.playlists.clear()
-        for filename in sorted(os.listdir(self.playlists_path)):
-            if filename.endswith(".json"):
-                playlist_file_path = os.path.join(self.playlists_path, filename)
-                playlist = Playlist.load_playlist(playlist_file_path)
-                if playlist:
-                    self.playlists.append(playlist)
+        self.import_json_playlists()
+
+        for playlist in self.playlists:
+            self.detach(playlist)
+        self.playlists = self.store.load_playlists()
+        for playlist in self.playlists:
+            self.attach(playlist)
+
+    def import_json_playlists(self) -> None:
+        # One-time migration of the playlist files written by earlier versions;
+        # imported files are kept as .bak, files that fail to load as .failed
+        def file_order(filename: str) -> List[object]:
+            return [
+                int(part) if part.isdigit() else part
+                for part in re.split(r"(\d+)", filename)
+            ]
+
+        filenames = sorted(
+            (f for f in os.listdir(self.playlists_path) if f.endswith(".json")),
+            key=file_order,
+        )
+        if not filenames:
+            return
+
+        position = self.store.count_playlists()
+        imported = 0
+        for filename in filenames:
+            playlist_file_path = os.path.join(self.playlists_path, filename)
+            playlist = Playlist.load_playlist(playlist_file_path)
+            if playlist:
+                self.store.add_playlist(playlist, position).result()
+                position += 1
+                imported += 1
+                os.replace(playlist_file_path, playlist_file_path + ".bak")
+            else:
+                logger.error(
+                    f"Could not import playlist file {filename}, keeping it as {filename}.failed"
+                )
+                os.replace(playlist_file_path, playlist_file_path + ".failed")
+        logger.info(f"Imported {imported} playlist files into the library")
 
     def save_playlists(self) -> None:
-        # Remove existing files in the playlists directory
-        for filename in os.listdir(self.playlists_path):
-            file_path = os.path.join(self.playlists_path, filename)
-            if os.path.isfile(file_path) and filename.endswith(".json"):
-                os.remove(file_path)
+        # Entries are persisted as they change; only names, order, the current
+        # song and the statistics are left to store. Pending changes to the
+        # statistics are applied first, stale ones are not stored at all
+        for playlist in self.playlists:
+            if not playlist.stats.stale:
+                self.update_stats(playlist)
+        self.store.update_playlists(self.playlists).result()
+
+    def update_stats(self, playlist: Playlist) -> None:
+        if playlist.stats.needs_update():
+            playlist.stats.update(playlist.entries, self.store.song_summaries)
+            self.store.save_stats(playlist)
+
+    def songs_changed(self, song_ids: Iterable[str]) -> Dict[str, List[PlaylistEntry]]:
+        # Songs updated in the library; returns their entries by playlist id
+        affected = self.song_index.entries_by_playlist(map(compact_id, song_ids))
+        for playlist in self.playlists:
+            entries = affected.get(playlist.id)
+            if entries:
+                for song_key in {entry.song_key for entry in entries}:
+                    playlist.stats.song_changed(song_key)
+        return affected
+
+    def remove_songs(self, song_ids: Iterable[str]) -> int:
+        # Songs deleted from the library leave every playlist that holds them
+        affected = self.song_index.entries_by_playlist(map(compact_id, song_ids))
+        removed = 0
+        for playlist in self.playlists:
+            entries = affected.get(playlist.id)
+            if entries:
+                removed += len(playlist.remove_entries(entries))
+        if removed:
+            logger.info(f"Removed {removed} entries of deleted songs from playlists")
+        return removed
+
+    def clear_songs(self) -> None:
+        # The library was cleared, no entry has its song anymore
+        for playlist in self.playlists:
+            playlist.remove_rows(range(len(playlist.entries)))
+
+    def refresh_smart_playlist(self, playlist: Playlist) -> None:
+        # The first refresh runs the query over the whole library. Later ones
+        # only look at the songs changed since, and for queries on the time
+        # added at the songs that have become too old
+        query = playlist.query
+        if query is None:
+            return
+        library = self.store.song_library
+        now = time.time()
+        where = query.where(now)
+        cutoff = now - query.added_within if query.added_within is not None else None
+
+        if query.seq is None:
+            # Read first, changes made while the query runs are looked at again
+            seq = library.last_change()
+            song_ids = library.find_song_ids(where)
+            entries = playlist.entries
+        else:
+            seq, changed_ids = library.changes_since(query.seq)
+            if cutoff is not None and query.cutoff is not None:
+                changed_ids += library.find_song_ids(
+                    [("added_at", ">=", query.cutoff), ("added_at", "<", cutoff)]
+                )
+            if not changed_ids:
+                query.seq, query.cutoff = seq, cutoff
+                return
+            changed_ids = list(dict.fromkeys(changed_ids))
+            song_ids = library.find_song_ids(where, changed_ids)
+            entries = self.song_index.entries_by_playlist(
+                map(compact_id, changed_ids)
+            ).get(playlist.id, [])
 
-        # Save current playlists
-        for i, playlist in enumerate(self.playlists):
-            playlist_file_path = os.path.join(self.playlists_path, f"{i}.json")
-            Playlist.save_playlist(playlist, playlist_file_path)
+        matching = set(map(compact_id, song_ids))
+        present = {entry.song_key for entry in entries}
+        removed = playlist.remove_entries(
+            [entry for entry in entries if entry.song_key not in matching]
+        )
+        added = playlist.add_songs(
+            song_id for song_id in song_ids if compact_id(song_id) not in present
+        )
+        query.seq, query.cutoff = seq, cutoff
+        self.store.save_query(playlist)
+        if added or removed:
+            logger.info(
+                f"Refreshed smart playlist {playlist.name}: {len(added)} added, {len(removed)} removed"
+            )
 
     def reorder_playlists(self, from_index: int, to_index: int) -> None:
         if 0 <= from_index < len(self.playlists) and 0 <= to_index < len(
@@ -53,6 +191,7 @@ class PlaylistManager:
         ):
             playlist = self.playlists.pop(from_index)
             self.playlists.insert(to_index, playlist)
+            self.store.update_playlists(self.playlists)
             logger.info(f"Reordered playlists: {from_index} -> {to_index}")
         else:
             logger.warning("Invalid indices for playlist reordering.")
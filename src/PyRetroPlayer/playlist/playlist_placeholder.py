@@ -0,0 +1,29 @@
+from typing import Optional
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QLabel, QVBoxLayout, QWidget
+
+from PyRetroPlayer.playlist.column_manager import ColumnManager
+from PyRetroPlayer.playlist.playlist import Playlist
+
+
+class PlaylistPlaceholder(QWidget):
+    # Stands in for a PlaylistTreeView until its tab is first shown, or after
+    # the view has been unloaded
+    def __init__(
+        self,
+        playlist: Playlist,
+        column_manager: ColumnManager,
+        parent: Optional[QWidget] = None,
+    ) -> None:
+        super().__init__(parent)
+
+        self.playlist = playlist
+        self.column_manager = column_manager
+
+        label = QLabel(f"{len(playlist.entries)} entries", self)
+        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        label.setEnabled(False)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(label)
@@ -0,0 +1,82 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+# Distance between neighbouring entries when positions are handed out fresh
+POSITION_STEP = 1.0
+
+# Below this gap a midpoint can no longer be told apart from its neighbours
+MIN_POSITION_GAP = 1e-9
+
+
+def is_strictly_increasing(positions: List[float]) -> bool:
+    return all(a < b for a, b in zip(positions, positions[1:]))
+
+
+def fresh_positions(count: int) -> List[float]:
+    return [(i + 1) * POSITION_STEP for i in range(count)]
+
+
+def longest_increasing_subsequence(values: List[float]) -> List[int]:
+    # Patience sorting, O(n log n); returns indices of one longest strictly
+    # increasing run
+    tails: List[float] = []
+    tail_indices: List[int] = []
+    previous: List[int] = [-1] * len(values)
+    for i, value in enumerate(values):
+        j = bisect_left(tails, value)
+        if j == len(tails):
+            tails.append(value)
+            tail_indices.append(i)
+        else:
+            tails[j] = value
+            tail_indices[j] = i
+        previous[i] = tail_indices[j - 1] if j > 0 else -1
+
+    result: List[int] = []
+    i = tail_indices[-1] if tail_indices else -1
+    while i != -1:
+        result.append(i)
+        i = previous[i]
+    result.reverse()
+    return result
+
+
+def positions_between(
+    low: Optional[float], high: Optional[float], count: int
+) -> Optional[List[float]]:
+    if low is None and high is None:
+        return fresh_positions(count)
+    if low is None:
+        return [high - (count - i) * POSITION_STEP for i in range(count)]  # type: ignore
+    if high is None:
+        return [low + (i + 1) * POSITION_STEP for i in range(count)]
+
+    gap = (high - low) / (count + 1)
+    if gap < MIN_POSITION_GAP:
+        return None
+    return [low + (i + 1) * gap for i in range(count)]
+
+
+def reassign_positions(positions: List[float]) -> Optional[Dict[int, float]]:
+    # Given the current positions of a reordered list, keep the longest
+    # already increasing subsequence in place and pick new positions for the
+    # rest only. Returns the changed positions by index, or None when the
+    # gaps are exhausted and the list has to be renumbered.
+    keep = longest_increasing_subsequence(positions)
+    changes: Dict[int, float] = {}
+
+    low: Optional[float] = None
+    start = 0
+    for kept in keep + [len(positions)]:
+        high = positions[kept] if kept < len(positions) else None
+        count = kept - start
+        if count:
+            new_positions = positions_between(low, high, count)
+            if new_positions is None:
+                return None
+            for offset, position in enumerate(new_positions):
+                changes[start + offset] = position
+        if high is not None:
+            low = high
+        start = kept + 1
+    return changes
@@ -0,0 +1,66 @@
+import re
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry
+from PyRetroPlayer.playlist.song import Song
+
+SortKey = Any
+
+_DIGITS = re.compile(r"(\d+)")
+
+# Columns without a meaningful order
+UNSORTABLE_COLUMNS = {"playing"}
+
+
+def _number_key(match: "re.Match[str]") -> str:
+    digits = match.group().lstrip("0") or "0"
+    # The length goes first so 2 sorts before 10; as a control character it
+    # also sorts before any text
+    return chr(min(len(digits), 31)) + digits
+
+
+def natural_key(text: str) -> str:
+    # "song2" sorts before "song10". A plain string, which compares much
+    # faster than a tuple of text and number parts
+    return _DIGITS.sub(_number_key, text.casefold())
+
+
+def text_key(text: Optional[str]) -> str:
+    return (text or "").casefold()
+
+
+def value_key(value: Any) -> Tuple[int, Any]:
+    # Metadata may hold numbers or text, numbers go first
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value)
+    return (1, natural_key("" if value is None else str(value)))
+
+
+SONG_SORT_KEYS: Dict[str, Callable[[Song], SortKey]] = {
+    "title": lambda song: text_key(song.title),
+    "artist": lambda song: text_key(song.artist),
+    "duration": lambda song: song.duration or 0,
+    "file_name": lambda song: natural_key(
+        song.file_path.split("/")[-1] if song.file_path else ""
+    ),
+    "file_path": lambda song: natural_key(song.file_path or ""),
+    "available_backends": lambda song: text_key(", ".join(song.available_backends)),
+}
+
+ENTRY_SORT_KEYS: Dict[str, Callable[[PlaylistEntry], SortKey]] = {
+    "entry_id": lambda entry: entry.entry_id,
+    "song_id": lambda entry: entry.song_id,
+}
+
+# Stands in for songs that are not loaded, so every key of a column has the
+# same type
+_EMPTY_SONG = Song(id="")
+
+
+def song_sort_key(col_id: str, song: Optional[Song]) -> SortKey:
+    if song is None:
+        song = _EMPTY_SONG
+    key_function = SONG_SORT_KEYS.get(col_id)
+    if key_function is not None:
+        return key_function(song)
+    return value_key(song.get_metadata(col_id))
@@ -0,0 +1,196 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from PyRetroPlayer.playlist.playlist_entry import CompactId, PlaylistEntry
+
+
+class SongSummary(NamedTuple):
+    # What one entry of a song adds to the statistics of its playlist
+    duration: int
+    song_format: str
+    backends: Tuple[str, ...]
+    scanned: bool
+
+
+# Songs that are not in the library
+MISSING_SONG = SongSummary(0, "", (), True)
+
+# Looks up the summaries of songs, songs not found are left out
+SummaryLookup = Callable[[List[CompactId]], Dict[CompactId, SongSummary]]
+
+
+def _add_count(counts: Dict[str, int], key: str, count: int) -> None:
+    value = counts.get(key, 0) + count
+    if value:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+class PlaylistStats:
+    # Totals over the entries of a playlist. Entries added and removed change
+    # them by deltas; the songs of added entries are looked up in batches by
+    # update(), so a change costs as much as the entries it touches.
+    def __init__(self) -> None:
+        self.entry_count = 0
+        self.total_duration = 0
+        self.format_counts: Dict[str, int] = {}
+        self.backend_counts: Dict[str, int] = {}
+        self.unscanned_count = 0
+        self.unplayable_count = 0
+
+        # Summary and number of entries of every song that has been looked
+        # up. Totals loaded from the library come without them: entries added
+        # since are still counted by deltas, but the first removal or song
+        # change makes them stale, and the one rebuild that follows looks up
+        # every song so later changes are incremental again
+        self.songs: Optional[Dict[CompactId, Tuple[SongSummary, int]]] = {}
+        # Entries per song added but not looked up yet
+        self.pending: Dict[CompactId, int] = {}
+        # Songs changed in the library, looked up again
+        self.dirty: Set[CompactId] = set()
+        # The totals can't be fixed by deltas, all songs are looked up again
+        self.stale = False
+
+        # Called after entries were added or removed or a song changed
+        self.changed: Optional[Callable[[], None]] = None
+
+    def _apply(self, summary: SongSummary, count: int) -> None:
+        self.total_duration += summary.duration * count
+        if summary.song_format:
+            _add_count(self.format_counts, summary.song_format, count)
+        for backend in summary.backends:
+            _add_count(self.backend_counts, backend, count)
+        if not summary.scanned:
+            self.unscanned_count += count
+        if not summary.backends:
+            self.unplayable_count += count
+
+    def _notify(self) -> None:
+        if self.changed:
+            self.changed()
+
+    def entries_added(self, entries: Iterable[PlaylistEntry]) -> None:
+        pending = self.pending
+        for entry in entries:
+            self.entry_count += 1
+            song_key = entry.song_key
+            pending[song_key] = pending.get(song_key, 0) + 1
+        self._notify()
+
+    def entries_removed(self, entries: Iterable[PlaylistEntry]) -> None:
+        pending = self.pending
+        for entry in entries:
+            self.entry_count -= 1
+            song_key = entry.song_key
+            count = pending.get(song_key)
+            if count:
+                if count == 1:
+                    del pending[song_key]
+                else:
+                    pending[song_key] = count - 1
+            elif self.songs is not None and song_key in self.songs:
+                summary, count = self.songs[song_key]
+                self._apply(summary, -1)
+                if count == 1:
+                    del self.songs[song_key]
+                else:
+                    self.songs[song_key] = (summary, count - 1)
+            else:
+                # Not known what the entry added to the loaded totals
+                self.stale = True
+        self._notify()
+
+    def song_changed(self, song_key: CompactId) -> None:
+        if self.songs is None:
+            self.stale = True
+        elif song_key in self.songs:
+            self.dirty.add(song_key)
+        else:
+            return
+        self._notify()
+
+    def needs_update(self) -> bool:
+        return self.stale or bool(self.pending) or bool(self.dirty)
+
+    def update(self, entries: List[PlaylistEntry], lookup: SummaryLookup) -> None:
+        # entries are only read when the totals have to be rebuilt
+        if self.stale:
+            self.rebuild(entries, lookup)
+            return
+
+        if self.dirty and self.songs is not None:
+            song_keys, self.dirty = list(self.dirty), set()
+            summaries = lookup(song_keys)
+            for song_key in song_keys:
+                song = self.songs.get(song_key)
+                if song is None:
+                    continue
+                summary, count = song
+                self._apply(summary, -count)
+                summary = summaries.get(song_key, MISSING_SONG)
+                self._apply(summary, count)
+                self.songs[song_key] = (summary, count)
+
+        if self.pending:
+            pending, self.pending = self.pending, {}
+            summaries = lookup(list(pending))
+            for song_key, count in pending.items():
+                summary = summaries.get(song_key, MISSING_SONG)
+                self._apply(summary, count)
+                if self.songs is not None:
+                    song = self.songs.get(song_key)
+                    self.songs[song_key] = (summary, count + (song[1] if song else 0))
+
+    def rebuild(self, entries: List[PlaylistEntry], lookup: SummaryLookup) -> None:
+        counts: Dict[CompactId, int] = {}
+        for entry in entries:
+            song_key = entry.song_key
+            counts[song_key] = counts.get(song_key, 0) + 1
+        summaries = lookup(list(counts))
+
+        self.entry_count = len(entries)
+        self.total_duration = 0
+        self.format_counts = {}
+        self.backend_counts = {}
+        self.unscanned_count = 0
+        self.unplayable_count = 0
+        self.songs = {}
+        for song_key, count in counts.items():
+            summary = summaries.get(song_key, MISSING_SONG)
+            self.songs[song_key] = (summary, count)
+            self._apply(summary, count)
+        self.pending = {}
+        self.dirty = set()
+        self.stale = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "entry_count": self.entry_count,
+            "total_duration": self.total_duration,
+            "formats": self.format_counts,
+            "backends": self.backend_counts,
+            "unscanned": self.unscanned_count,
+            "unplayable": self.unplayable_count,
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "PlaylistStats":
+        stats = PlaylistStats()
+        stats.songs = None
+        stats.entry_count = data.get("entry_count", 0)
+        stats.total_duration = data.get("total_duration", 0)
+        stats.format_counts = dict(data.get("formats", {}))
+        stats.backend_counts = dict(data.get("backends", {}))
+        stats.unscanned_count = data.get("unscanned", 0)
+        stats.unplayable_count = data.get("unplayable", 0)
+        return stats
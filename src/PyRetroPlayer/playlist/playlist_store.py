@@ -0,0 +1,252 @@
+import json
+import sqlite3
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from PyRetroPlayer.playlist.playlist import Playlist
+from PyRetroPlayer.playlist.playlist_entry import (
+    CompactId,
+    PlaylistEntry,
+    compact_id,
+    expand_id,
+)
+from PyRetroPlayer.playlist.playlist_stats import PlaylistStats, SongSummary
+from PyRetroPlayer.playlist.smart_playlist import SmartQuery
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+# (playlist_id, entry_id, song_id, position)
+EntryRow = Tuple[str, str, str, float]
+
+
+class PlaylistStore:
+    # Playlists live in the song library database; writes go through the
+    # library's writer thread and only touch the rows that changed
+    def __init__(self, song_library: SongLibrary) -> None:
+        self.song_library = song_library
+
+    def attach(self, playlist: Playlist) -> None:
+        playlist.entries_changed = lambda entries: self.save_entries(
+            playlist.id, entries
+        )
+        playlist.entries_deleted = lambda entries: self.delete_entries(
+            playlist.id, entries
+        )
+
+    def detach(self, playlist: Playlist) -> None:
+        playlist.entries_changed = None
+        playlist.entries_deleted = None
+
+    def count_playlists(self) -> int:
+        with self.song_library.get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM playlists").fetchone()[0]
+
+    def load_playlists(self) -> List[Playlist]:
+        with self.song_library.get_connection() as conn:
+            playlist_rows = conn.execute(
+                "SELECT id, name, current_song_index, stats, query FROM playlists ORDER BY position"
+            ).fetchall()
+
+            entries: Dict[str, List[PlaylistEntry]] = {
+                row["id"]: [] for row in playlist_rows
+            }
+            cur = conn.execute(
+                """
+                SELECT playlist_id, entry_id, song_id, position FROM playlist_entries
+                ORDER BY playlist_id, position
+                """
+            )
+            while rows := cur.fetchmany(5000):
+                for row in rows:
+                    playlist_entries = entries.get(row["playlist_id"])
+                    if playlist_entries is not None:
+                        playlist_entries.append(
+                            PlaylistEntry(
+                                row["song_id"], row["entry_id"], row["position"]
+                            )
+                        )
+
+        playlists: List[Playlist] = []
+        for row in playlist_rows:
+            playlist = Playlist(
+                id=row["id"], name=row["name"], entries=entries[row["id"]]
+            )
+            playlist.current_song_index = row["current_song_index"]
+            stats = self._load_stats(row["stats"])
+            # Totals written before a crash may be behind the entries
+            if stats is not None and stats.entry_count == len(playlist.entries):
+                playlist.stats = stats
+            playlist.query = self._load_query(row["query"])
+            playlists.append(playlist)
+        logger.info(f"Loaded {len(playlists)} playlists from library")
+        return playlists
+
+    def _load_stats(self, data: Optional[str]) -> Optional[PlaylistStats]:
+        if not data:
+            return None
+        try:
+            return PlaylistStats.from_dict(json.loads(data))
+        except (json.JSONDecodeError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid playlist statistics: {e}")
+            return None
+
+    def _load_query(self, data: Optional[str]) -> Optional[SmartQuery]:
+        if not data:
+            return None
+        try:
+            return SmartQuery.from_dict(json.loads(data))
+        except (json.JSONDecodeError, TypeError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring invalid smart playlist query: {e}")
+            return None
+
+    def _dump_query(self, playlist: Playlist) -> Optional[str]:
+        return json.dumps(playlist.query.to_dict()) if playlist.query else None
+
+    def _entry_rows(
+        self, playlist_id: str, entries: List[PlaylistEntry]
+    ) -> List[EntryRow]:
+        # Captured when the change is queued, later changes queue their own
+        return [
+            (playlist_id, entry.entry_id, entry.song_id, entry.position)
+            for entry in entries
+        ]
+
+    def _upsert_entries(self, conn: sqlite3.Connection, rows: List[EntryRow]) -> None:
+        conn.executemany(
+            """
+            INSERT INTO playlist_entries (playlist_id, entry_id, song_id, position)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(playlist_id, entry_id) DO UPDATE SET
+                song_id = excluded.song_id, position = excluded.position
+            """,
+            rows,
+        )
+
+    def add_playlist(self, playlist: Playlist, position: int) -> Future[None]:
+        rows = self._entry_rows(playlist.id, playlist.entries)
+        values = (
+            playlist.id,
+            playlist.name,
+            position,
+            playlist.current_song_index,
+            self._dump_query(playlist),
+        )
+
+        def add(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                """
+                INSERT INTO playlists (id, name, position, current_song_index, query)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    name = excluded.name,
+                    position = excluded.position,
+                    current_song_index = excluded.current_song_index,
+                    query = excluded.query
+                """,
+                values,
+            )
+            self._upsert_entries(conn, rows)
+
+        return self.song_library.submit_write(add)
+
+    def update_playlists(self, playlists: List[Playlist]) -> Future[None]:
+        # Names, order and current song; the entries are already stored.
+        # Statistics behind the entries are cleared and rebuilt after loading
+        values = [
+            (
+                playlist.name,
+                position,
+                playlist.current_song_index,
+                (
+                    None
+                    if playlist.stats.needs_update()
+                    else json.dumps(playlist.stats.to_dict())
+                ),
+                self._dump_query(playlist),
+                playlist.id,
+            )
+            for position, playlist in enumerate(playlists)
+        ]
+
+        def update(conn: sqlite3.Connection) -> None:
+            conn.executemany(
+                "UPDATE playlists SET name = ?, position = ?, current_song_index = ?, stats = ?, query = ? WHERE id = ?",
+                values,
+            )
+
+        return self.song_library.submit_write(update)
+
+    def save_stats(self, playlist: Playlist) -> Future[None]:
+        values = (json.dumps(playlist.stats.to_dict()), playlist.id)
+        return self.song_library.submit_write(
+            lambda conn: conn.execute(
+                "UPDATE playlists SET stats = ? WHERE id = ?", values
+            )
+        )
+
+    def save_query(self, playlist: Playlist) -> Future[None]:
+        values = (self._dump_query(playlist), playlist.id)
+        return self.song_library.submit_write(
+            lambda conn: conn.execute(
+                "UPDATE playlists SET query = ? WHERE id = ?", values
+            )
+        )
+
+    def song_summaries(
+        self, song_keys: List[CompactId], batch_size: int = 500
+    ) -> Dict[CompactId, SongSummary]:
+        # Only the columns the statistics need, no song objects are built
+        summaries: Dict[CompactId, SongSummary] = {}
+        song_ids = [expand_id(song_key) for song_key in song_keys]
+        with self.song_library.get_connection() as conn:
+            for start in range(0, len(song_ids), batch_size):
+                batch = song_ids[start : start + batch_size]
+                placeholders = ",".join("?" for _ in batch)
+                rows = conn.execute(
+                    f"SELECT id, duration, available_backends, format FROM songs WHERE id IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for row in rows:
+                    backends = (
+                        json.loads(row["available_backends"])
+                        if row["available_backends"]
+                        else []
+                    )
+                    summaries[compact_id(row["id"])] = SongSummary(
+                        row["duration"] or 0,
+                        row["format"] or "",
+                        tuple(backends),
+                        bool(row["duration"]),
+                    )
+        return summaries
+
+    def delete_playlist(self, playlist_id: str) -> Future[None]:
+        def delete(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "DELETE FROM playlist_entries WHERE playlist_id = ?", (playlist_id,)
+            )
+            conn.execute("DELETE FROM playlists WHERE id = ?", (playlist_id,))
+
+        return self.song_library.submit_write(delete)
+
+    def save_entries(
+        self, playlist_id: str, entries: List[PlaylistEntry]
+    ) -> Future[None]:
+        rows = self._entry_rows(playlist_id, entries)
+        return self.song_library.submit_write(
+            lambda conn: self._upsert_entries(conn, rows)
+        )
+
+    def delete_entries(
+        self, playlist_id: str, entries: List[PlaylistEntry]
+    ) -> Future[None]:
+        rows = [(playlist_id, entry.entry_id) for entry in entries]
+
+        def delete(conn: sqlite3.Connection) -> None:
+            conn.executemany(
+                "DELETE FROM playlist_entries WHERE playlist_id = ? AND entry_id = ?",
+                rows,
+            )
+
+        return self.song_library.submit_write(delete)
@@ -1,10 +1,17 @@
 # from player_backends.Song import Song
 from PySide6.QtCore import QPoint, Qt, Signal, Slot
 from PySide6.QtGui import QAction
-from PySide6.QtWidgets import QMainWindow, QMenu, QTabWidget, QToolButton
+from PySide6.QtWidgets import (
+    QMainWindow,
+    QMenu,
+    QTabWidget,
+    QToolButton,
+    QWidget,
+)
 
 from PyRetroPlayer.playlist.playlist import Playlist
 from PyRetroPlayer.playlist.playlist_manager import PlaylistManager
+from PyRetroPlayer.playlist.playlist_placeholder import PlaylistPlaceholder
 from PyRetroPlayer.playlist.playlist_tab_bar import PlaylistTabBar
 
 from PyRetroPlayer.playlist.playlist_tree_view import PlaylistTreeView
@@ -104,8 +111,24 @@ class PlaylistTabWidget(QTabWidget):
     def on_tab_renamed(self, new_name: str) -> None:
         index = self.tabBar().currentIndex()
         playlist_view = self.widget(index)
-        if isinstance(playlist_view, PlaylistTreeView):
+        if isinstance(playlist_view, (PlaylistTreeView, PlaylistPlaceholder)):
             playlist_view.playlist.name = new_name
+            self.playlist_manager.save_playlists()
+
+    def replace_tab(self, index: int, widget: QWidget) -> None:
+        # Swap the widget of a tab in place without reporting a tab change;
+        # the old widget is left to the caller
+        is_current = index == self.currentIndex()
+        text = self.tabText(index)
+
+        self.blockSignals(True)
+        try:
+            self.removeTab(index)
+            self.insertTab(index, widget, text)
+            if is_current:
+                self.setCurrentIndex(index)
+        finally:
+            self.blockSignals(False)
 
     def update_tab_column_widths(self) -> None:
         for i in range(self.count()):
@@ -0,0 +1,537 @@
+from bisect import bisect_left
+from enum import Enum, auto
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from PySide6.QtCore import (
+    QAbstractTableModel,
+    QByteArray,
+    QMimeData,
+    QModelIndex,
+    QPersistentModelIndex,
+    Qt,
+    Signal,
+)
+from PySide6.QtGui import QIcon
+
+from PyRetroPlayer.playlist.column_manager import ColumnManager
+from PyRetroPlayer.playlist.playlist import Playlist
+from PyRetroPlayer.playlist.playlist_entry import (
+    CompactId,
+    PlaylistEntry,
+    compact_id,
+)
+from PyRetroPlayer.playlist.playlist_sort import (
+    ENTRY_SORT_KEYS,
+    UNSORTABLE_COLUMNS,
+    SortKey,
+    song_sort_key,
+)
+from PyRetroPlayer.playlist.song import Song
+
+ROWS_MIME_TYPE = "application/x-pyretroplayer-playlist-rows"
+
+
+class PlayerState(Enum):
+    STOPPED = auto()
+    PLAYING = auto()
+    PAUSED = auto()
+
+
+PLAYER_STATE_ICONS = {
+    PlayerState.PLAYING: "media-playback-start",
+    PlayerState.PAUSED: "media-playback-pause",
+}
+
+
+# Built once, flags() is called for every row whenever the view lays out
+ROW_FLAGS = (
+    Qt.ItemFlag.ItemIsSelectable
+    | Qt.ItemFlag.ItemIsEnabled
+    | Qt.ItemFlag.ItemIsDragEnabled
+    | Qt.ItemFlag.ItemNeverHasChildren
+)
+ROOT_FLAGS = Qt.ItemFlag.ItemIsDropEnabled
+# A filtered view shows a subset of the rows, which can't be reordered
+FILTERED_ROW_FLAGS = ROW_FLAGS & ~Qt.ItemFlag.ItemIsDragEnabled
+
+
+def format_duration(duration: Optional[int]) -> str:
+    if not duration:
+        return "0:00"
+    seconds = int(duration // 1000)
+    minutes = seconds // 60
+    hours = minutes // 60
+    seconds = seconds % 60
+    minutes = minutes % 60
+    if hours > 0:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes}:{seconds:02}"
+
+
+class PlaylistTableModel(QAbstractTableModel):
+    # Emitted after rows have been moved by drag and drop
+    rows_reordered = Signal()
+
+    def __init__(
+        self,
+        playlist: Playlist,
+        column_manager: ColumnManager,
+        column_definitions: List[Dict[str, Any]],
+        parent: Optional[Any] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.playlist = playlist
+        self.column_manager = column_manager
+        self.column_names = {
+            col_def.get("id", ""): col_def.get("name", "")
+            for col_def in column_definitions
+        }
+        self.columns = self.visible_columns()
+
+        # Rows are read from the playlist entries, cells are formatted from
+        # these songs when they are painted
+        self.songs: Dict[CompactId, Song] = {}
+        # Called when a row is painted before its song is known
+        self.song_missing: Optional[Callable[[PlaylistEntry], None]] = None
+
+        # Kept separately so the row count only changes inside the begin/end
+        # notifications, the playlist is already updated when we hear of it
+        self._row_count = len(playlist.entries)
+
+        # While a filter is set only the rows whose song is in filter_keys are
+        # shown: filter_rows holds their playlist rows in playlist order, and
+        # _filter_positions the view row of each
+        self.filter_keys: Optional[Set[CompactId]] = None
+        self.filter_rows: List[int] = []
+        self._filter_positions: Dict[int, int] = {}
+
+        # Sort keys by column and song, computed on the first sort by a column
+        # and dropped for a song when it is loaded again
+        self.sort_keys: Dict[str, Dict[CompactId, SortKey]] = {}
+
+        self.playing_key: Optional[CompactId] = None
+        self.playing_state = PlayerState.STOPPED
+        self._icons: Dict[PlayerState, QIcon] = {}
+
+    def visible_columns(self) -> List[str]:
+        return [
+            col_id
+            for col_id in self.column_manager.get_column_ids()
+            if self.column_manager.is_column_visible(col_id)
+        ]
+
+    def update_columns(self) -> None:
+        columns = self.visible_columns()
+        added = [col_id for col_id in columns if col_id not in self.columns]
+        removed = [col_id for col_id in self.columns if col_id not in columns]
+
+        # A single toggled column is inserted or removed on its own, anything
+        # else resets the model
+        if len(added) + len(removed) != 1 or [
+            col_id for col_id in columns if col_id not in added
+        ] != [col_id for col_id in self.columns if col_id not in removed]:
+            self.beginResetModel()
+            self.columns = columns
+            self.endResetModel()
+        elif added:
+            column = columns.index(added[0])
+            self.beginInsertColumns(QModelIndex(), column, column)
+            self.columns = columns
+            self.endInsertColumns()
+        else:
+            column = self.columns.index(removed[0])
+            self.beginRemoveColumns(QModelIndex(), column, column)
+            self.columns = columns
+            self.endRemoveColumns()
+
+    def column_of(self, column_id: str) -> int:
+        try:
+            return self.columns.index(column_id)
+        except ValueError:
+            return -1
+
+    def rowCount(
+        self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()
+    ) -> int:
+        if parent.isValid():
+            return 0
+        return self._row_count if self.filter_keys is None else len(self.filter_rows)
+
+    def columnCount(
+        self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()
+    ) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def entry_at(self, row: int) -> Optional[PlaylistEntry]:
+        if self.filter_keys is not None:
+            if not 0 <= row < len(self.filter_rows):
+                return None
+            row = self.filter_rows[row]
+        if 0 <= row < len(self.playlist.entries):
+            return self.playlist.entries[row]
+        return None
+
+    def data(
+        self,
+        index: QModelIndex | QPersistentModelIndex,
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if not index.isValid():
+            return None
+        entry = self.entry_at(index.row())
+        if entry is None:
+            return None
+        col_id = self.columns[index.column()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            song = self.songs.get(entry.song_key)
+            if song is None and self.song_missing:
+                self.song_missing(entry)
+            return self.format_cell(col_id, entry, song)
+        if (
+            role == Qt.ItemDataRole.DecorationRole
+            and col_id == "playing"
+            and entry.entry_key == self.playing_key
+        ):
+            return self.state_icon(self.playing_state)
+        return None
+
+    def format_cell(
+        self, col_id: str, entry: PlaylistEntry, song: Optional[Song]
+    ) -> str:
+        match col_id:
+            case "entry_id":
+                return entry.entry_id
+            case "song_id":
+                return entry.song_id
+        if song is None:
+            # Not loaded yet
+            return ""
+
+        match col_id:
+            case "playing":
+                return ""
+            case "title":
+                return song.title or ""
+            case "artist":
+                return song.artist or ""
+            case "file_name":
+                return song.file_path.split("/")[-1] if song.file_path else ""
+            case "file_path":
+                return song.file_path or ""
+            case "duration":
+                return format_duration(song.duration)
+            case "available_backends":
+                return (
+                    ", ".join(song.available_backends)
+                    if song.available_backends
+                    else ""
+                )
+            case _:
+                return str(song.get_metadata(col_id, ""))
+
+    def state_icon(self, state: PlayerState) -> QIcon:
+        icon = self._icons.get(state)
+        if icon is None:
+            icon_name = PLAYER_STATE_ICONS.get(state)
+            icon = QIcon.fromTheme(icon_name) if icon_name else QIcon()
+            self._icons[state] = icon
+        return icon
+
+    def headerData(
+        self,
+        section: int,
+        orientation: Qt.Orientation,
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+            and 0 <= section < len(self.columns)
+        ):
+            return self.column_names.get(self.columns[section], "")
+        return None
+
+    # Songs
+
+    def set_songs(self, songs: Iterable[Song], rows: Iterable[int]) -> None:
+        for song in songs:
+            song_key = compact_id(song.id)
+            previous = self.songs.get(song_key)
+            self.songs[song_key] = song
+            if previous is not None and previous is not song:
+                self.forget_sort_keys(song_key)
+        self.refresh_rows(rows)
+
+    def refresh_rows(self, rows: Iterable[int]) -> None:
+        # Playlist rows
+        if self.filter_keys is None:
+            rows = list(rows)
+        else:
+            positions = self._filter_positions
+            rows = [positions[row] for row in rows if row in positions]
+        if rows and self.columns:
+            self.dataChanged.emit(
+                self.index(min(rows), 0),
+                self.index(max(rows), len(self.columns) - 1),
+            )
+
+    # Row notifications, sent after the playlist has changed
+
+    def reset(self) -> None:
+        self.beginResetModel()
+        self._row_count = len(self.playlist.entries)
+        self._update_filter_rows()
+        self.endResetModel()
+
+    def rows_appended(self, count: int) -> None:
+        if count <= 0:
+            return
+        first = self._row_count
+        if self.filter_keys is None:
+            self.beginInsertRows(QModelIndex(), first, first + count - 1)
+            self._row_count += count
+            self.endInsertRows()
+            return
+
+        self._row_count += count
+        entries = self.playlist.entries
+        added = [
+            row
+            for row in range(first, self._row_count)
+            if entries[row].song_key in self.filter_keys
+        ]
+        if added:
+            view_row = len(self.filter_rows)
+            self.beginInsertRows(QModelIndex(), view_row, view_row + len(added) - 1)
+            for row in added:
+                self._filter_positions[row] = len(self.filter_rows)
+                self.filter_rows.append(row)
+            self.endInsertRows()
+
+    def rows_removed(self, rows: List[int]) -> None:
+        # Sorted playlist rows, removed in contiguous runs bottom-up with one
+        # notification each
+        removed_rows = rows
+        if self.filter_keys is not None:
+            positions = self._filter_positions
+            rows = [positions[row] for row in rows if row in positions]
+        end = len(rows)
+        while end > 0:
+            start = end - 1
+            while start > 0 and rows[start - 1] == rows[start] - 1:
+                start -= 1
+            self.beginRemoveRows(QModelIndex(), rows[start], rows[end - 1])
+            if self.filter_keys is None:
+                self._row_count -= end - start
+            else:
+                del self.filter_rows[rows[start] : rows[end - 1] + 1]
+            self.endRemoveRows()
+            end = start
+
+        if self.filter_keys is not None:
+            self._row_count = len(self.playlist.entries)
+            # The remaining rows moved up past the removed ones
+            self.filter_rows = [
+                row - bisect_left(removed_rows, row) for row in self.filter_rows
+            ]
+            self._filter_positions = {
+                row: view_row for view_row, row in enumerate(self.filter_rows)
+            }
+
+    # Filtering
+
+    def set_filter(
+        self, song_keys: Optional[Set[CompactId]], refine: bool = False
+    ) -> None:
+        # refine: the keys are a subset of the current ones, so only the rows
+        # shown now need to be checked
+        self.beginResetModel()
+        self._row_count = len(self.playlist.entries)
+        refine = refine and self.filter_keys is not None
+        self.filter_keys = song_keys
+        self._update_filter_rows(refine)
+        self.endResetModel()
+
+    def _update_filter_rows(self, refine: bool = False) -> None:
+        keys = self.filter_keys
+        if keys is None:
+            self.filter_rows = []
+            self._filter_positions = {}
+            return
+        entries = self.playlist.entries
+        candidates = self.filter_rows if refine else range(len(entries))
+        self.filter_rows = [row for row in candidates if entries[row].song_key in keys]
+        self._filter_positions = {
+            row: view_row for view_row, row in enumerate(self.filter_rows)
+        }
+
+    def playlist_row(self, row: int) -> int:
+        if self.filter_keys is None:
+            return row
+        return self.filter_rows[row] if 0 <= row < len(self.filter_rows) else -1
+
+    def view_row(self, playlist_row: int) -> Optional[int]:
+        # None if the row is filtered out
+        if self.filter_keys is None:
+            return playlist_row
+        return self._filter_positions.get(playlist_row)
+
+    # Playing marker
+
+    def set_playing(self, entry_key: Optional[CompactId], state: PlayerState) -> None:
+        previous_key = self.playing_key
+        self.playing_key = entry_key
+        self.playing_state = state
+        for key in {previous_key, entry_key}:
+            if key is not None:
+                self.refresh_entry(key)
+
+    def refresh_entry(self, entry_key: CompactId) -> None:
+        column = self.column_of("playing")
+        row = self.playlist.row_of_key(entry_key)
+        if row is not None:
+            row = self.view_row(row)
+        if column != -1 and row is not None:
+            index = self.index(row, column)
+            self.dataChanged.emit(index, index)
+
+    def playing_row(self) -> int:
+        # View row of the playing entry
+        if self.playing_key is not None:
+            row = self.playlist.row_of_key(self.playing_key)
+            if row is not None:
+                row = self.view_row(row)
+            if row is not None:
+                return row
+        return -1
+
+    # Sorting
+
+    def forget_sort_keys(self, song_key: CompactId) -> None:
+        for keys in self.sort_keys.values():
+            keys.pop(song_key, None)
+
+    def row_sort_keys(self, col_id: str) -> List[SortKey]:
+        entries = self.playlist.entries
+        entry_key_function = ENTRY_SORT_KEYS.get(col_id)
+        if entry_key_function is not None:
+            return [entry_key_function(entry) for entry in entries]
+
+        keys = self.sort_keys.setdefault(col_id, {})
+        if len(keys) < len(self.songs):
+            for song_key, song in self.songs.items():
+                if song_key not in keys:
+                    keys[song_key] = song_sort_key(col_id, song)
+        # Songs that are not loaded get the key of an empty song
+        missing_key = song_sort_key(col_id, None)
+        get = keys.get
+        return [get(entry.song_key, missing_key) for entry in entries]
+
+    def is_sortable(self, column: int) -> bool:
+        return (
+            0 <= column < len(self.columns)
+            and self.columns[column] not in UNSORTABLE_COLUMNS
+        )
+
+    def sort(
+        self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder
+    ) -> None:
+        if not self.is_sortable(column):
+            return
+        keys = self.row_sort_keys(self.columns[column])
+
+        self.layoutAboutToBeChanged.emit()
+        # Selection and current index follow their entries
+        persistent = self.persistentIndexList()
+        persistent_entries = [self.entry_at(index.row()) for index in persistent]
+        self.playlist.sort_entries(keys, reverse=order == Qt.SortOrder.DescendingOrder)
+        self._update_filter_rows()
+        moved: List[QModelIndex] = []
+        for index, entry in zip(persistent, persistent_entries):
+            row = self.playlist.row_of(entry) if entry is not None else None
+            if row is not None:
+                row = self.view_row(row)
+            moved.append(
+                self.index(row, index.column()) if row is not None else QModelIndex()
+            )
+        self.changePersistentIndexList(persistent, moved)
+        self.layoutChanged.emit()
+
+    # Drag and drop reordering
+
+    def flags(self, index: QModelIndex | QPersistentModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return ROOT_FLAGS
+        return ROW_FLAGS if self.filter_keys is None else FILTERED_ROW_FLAGS
+
+    def supportedDropActions(self) -> Qt.DropAction:
+        return Qt.DropAction.MoveAction
+
+    def mimeTypes(self) -> List[str]:
+        return [ROWS_MIME_TYPE]
+
+    def mimeData(self, indexes: Sequence[QModelIndex]) -> QMimeData:
+        rows = sorted(set(index.row() for index in indexes))
+        mime_data = QMimeData()
+        mime_data.setData(ROWS_MIME_TYPE, QByteArray(",".join(map(str, rows)).encode()))
+        return mime_data
+
+    def dropMimeData(
+        self,
+        data: QMimeData,
+        action: Qt.DropAction,
+        row: int,
+        column: int,
+        parent: QModelIndex | QPersistentModelIndex,
+    ) -> bool:
+        if (
+            action != Qt.DropAction.MoveAction
+            or not data.hasFormat(ROWS_MIME_TYPE)
+            or self.filter_keys is not None
+        ):
+            return False
+        payload = bytes(data.data(ROWS_MIME_TYPE).data()).decode()
+        if not payload:
+            return False
+        drag_rows = sorted(set(int(r) for r in payload.split(",")))
+
+        if row == -1:
+            row = parent.row() if parent.isValid() else self._row_count
+        row = max(0, min(row, self._row_count))
+
+        # Each contiguous run of dragged rows is moved on its own, so the view
+        # keeps its selection, scroll position and persistent indexes
+        moved = False
+        shift = 0
+        for first, last in self.row_runs(drag_rows):
+            count = last - first + 1
+            if first < row:
+                # Runs above the drop row were pulled down by the earlier ones
+                moved = self.move_rows(first - shift, last - shift, row) or moved
+                shift += count
+            else:
+                moved = self.move_rows(first, last, row) or moved
+                row += count
+
+        if moved:
+            self.rows_reordered.emit()
+        # removeRows is not implemented, so the view leaves the moved rows be
+        return True
+
+    @staticmethod
+    def row_runs(rows: List[int]) -> List[Tuple[int, int]]:
+        runs: List[Tuple[int, int]] = []
+        for row in rows:
+            if runs and runs[-1][1] == row - 1:
+                runs[-1] = (runs[-1][0], row)
+            else:
+                runs.append((row, row))
+        return runs
+
+    def move_rows(self, first: int, last: int, dest: int) -> bool:
+        if not self.beginMoveRows(QModelIndex(), first, last, QModelIndex(), dest):
+            return False
+        self.playlist.move_entries(range(first, last + 1), dest)
+        self.endMoveRows()
+        return True
@@ -1,50 +1,63 @@
-from enum import Enum, auto
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from loguru import logger
 from PySide6.QtCore import (
     QItemSelectionModel,
     QModelIndex,
     Qt,
+    QTimer,
     Signal,
 )
 from PySide6.QtGui import (
     QDragEnterEvent,
+    QDragMoveEvent,
     QDropEvent,
-    QIcon,
     QKeyEvent,
-    QStandardItem,
 )
 from PySide6.QtWidgets import (
     QAbstractItemView,
-    QTreeView,
+    QHeaderView,
+    QTableView,
     QWidget,
 )
 from SettingsManager import SettingsManager
 
-from PyRetroPlayer.playlist.column_filter_proxy import ColumnFilterProxy
+from PyRetroPlayer.playlist.async_song_library import AsyncSongLibrary
 from PyRetroPlayer.playlist.column_manager import ColumnManager
 from PyRetroPlayer.playlist.custom_header import CustomHeader
 from PyRetroPlayer.playlist.custom_item_view_style import CustomItemViewStyle
-from PyRetroPlayer.playlist.drag_drop_reorder_proxy import (
-    DragDropReorderProxy,
-)
+from PyRetroPlayer.playlist.library_browser_model import LIBRARY_MIME_TYPE
 from PyRetroPlayer.playlist.playlist import Playlist
-from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry
-from PyRetroPlayer.playlist.playlist_item_model import PlaylistItemModel
+from PyRetroPlayer.playlist.playlist_entry import (
+    CompactId,
+    PlaylistEntry,
+    compact_id,
+    expand_id,
+)
+from PyRetroPlayer.playlist.playlist_filter import PlaylistFilter, split_terms
+from PyRetroPlayer.playlist.playlist_table_model import (
+    PlayerState,
+    PlaylistTableModel,
+)
 from PyRetroPlayer.playlist.song import Song
-from PyRetroPlayer.playlist.song_library import SongLibrary
 
 
-class PlaylistTreeView(QTreeView):
+# Entries whose songs are requested per event loop iteration while a view
+# fills in the background
+PREFETCH_CHUNK_SIZE = 5000
+
+# Songs added to the filter index per event loop iteration
+INDEX_CHUNK_SIZE = 5000
+
+
+class PlaylistTreeView(QTableView):
     item_double_clicked = Signal(int)
     files_dropped = Signal(list)
+    # Payload of songs and groups dragged from the library browser
+    library_dropped = Signal(str)
     rows_moved = Signal(list)
 
-    class PlayerState(Enum):
-        STOPPED = auto()
-        PLAYING = auto()
-        PAUSED = auto()
+    PlayerState = PlayerState
 
     def __init__(
         self,
@@ -52,7 +65,7 @@ class PlaylistTreeView(QTreeView):
         playlist: Playlist,
         column_manager: ColumnManager,
         default_columns_definitions: List[Dict[str, Any]],
-        song_library: SongLibrary,
+        async_song_library: AsyncSongLibrary,
         parent: Optional[QWidget] = None,
     ):
         super().__init__(parent)
@@ -61,49 +74,82 @@ class PlaylistTreeView(QTreeView):
         self.playlist = playlist
         self.column_manager = column_manager
         self.default_columns_definitions = default_columns_definitions
-        self.song_library = song_library
-
-        self.previous_row = -1
-
-        # self.setSelectionBehavior(QTreeView.SelectionBehavior.SelectRows)
-        self.setDragDropMode(QTreeView.DragDropMode.InternalMove)
+        self.async_song_library = async_song_library
+
+        # Rows are added right away and filled in once their song has been
+        # read from the library
+        self.pending_entries: Dict[CompactId, List[PlaylistEntry]] = {}
+        self.async_song_library.songs_ready.connect(self.on_songs_ready)
+
+        # Entries not requested yet; visible rows are requested as they are
+        # painted, the rest in chunks while the event loop is idle
+        self.prefetch_entries: List[PlaylistEntry] = []
+        self.prefetch_position = 0
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setInterval(0)
+        self.prefetch_timer.timeout.connect(self.prefetch_next_chunk)
+
+        # Songs found missing while filling, dropped from the playlist together
+        # once nothing is pending any more
+        self.missing_song_ids: List[str] = []
+
+        # Built the first time the view is filtered; songs already loaded are
+        # indexed in chunks and show up in the results as they are indexed
+        self.search_filter: Optional[PlaylistFilter] = None
+        self.filter_text = ""
+        self.index_queue: List[Tuple[CompactId, Song]] = []
+        self.index_position = 0
+        self.index_timer = QTimer(self)
+        self.index_timer.setInterval(0)
+        self.index_timer.timeout.connect(self.index_next_chunk)
+
+        # Column and order of a sort requested before all songs were loaded
+        self.pending_sort: Optional[Tuple[str, Qt.SortOrder]] = None
+
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
         self.setDragDropOverwriteMode(False)
         # self.setDefaultDropAction(Qt.DropAction.MoveAction)
-        self.setEditTriggers(QTreeView.EditTrigger.NoEditTriggers)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
 
         # Apply custom style for the drop indicator
         self.setStyle(CustomItemViewStyle(self.style()))
 
         self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.ActionsContextMenu)
-        self.setRootIsDecorated(False)
-        self.header().setMinimumSectionSize(20)
+        # A flat table only lays out the visible rows, unlike a tree view which
+        # walks every row of a large playlist
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        vertical_header = self.verticalHeader()
+        vertical_header.hide()
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(self.fontMetrics().height() + 6)
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
 
         self.doubleClicked.connect(self.on_item_double_clicked)
 
-        self.source_model = PlaylistItemModel(0, len(self.default_columns_definitions))
-
-        column_names = [
-            col_def.get("name", "") for col_def in self.default_columns_definitions
-        ]
-
-        self.setHeader(
-            CustomHeader(self.default_columns_definitions, self.column_manager, self)
+        header = CustomHeader(
+            self.default_columns_definitions, self.column_manager, self
         )
-
-        self.source_model.set_column_names(column_names)
-
-        filtered_cols = self.column_manager.get_visible_column_indices()
-
-        col_proxy = ColumnFilterProxy(set(filtered_cols))
-        col_proxy.setSourceModel(self.source_model)
-
-        reorder_proxy = DragDropReorderProxy()
-        reorder_proxy.setSourceModel(col_proxy)
-        reorder_proxy.rowsReordered.connect(playlist.set_song_order)
-
-        self.setModel(reorder_proxy)
+        header.column_visibility_toggled.connect(self.on_column_visibility_toggled)
+        header.setMinimumSectionSize(20)
+        header.setStretchLastSection(True)
+        header.setSectionsMovable(True)
+        # Sorting is done on click only, setSortingEnabled would also sort
+        # every time the view is built
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        header.sectionClicked.connect(self.on_header_section_clicked)
+        self.setHorizontalHeader(header)
+
+        self.table_model = PlaylistTableModel(
+            playlist, self.column_manager, self.default_columns_definitions, self
+        )
+        self.table_model.song_missing = self.on_song_missing
+        self.table_model.rows_reordered.connect(self.clear_sort_indicator)
+        self.setModel(self.table_model)
 
         selectionModel = QItemSelectionModel(self.model())
         selectionModel.SelectionFlag(
@@ -115,9 +161,24 @@ class PlaylistTreeView(QTreeView):
         self.get_playlist_data()
         self.set_column_widths(self.column_manager.get_column_widths())
 
-        playlist.song_added = self.on_entry_added
+        playlist.songs_added = self.on_entries_added
+        playlist.songs_removed = self.on_songs_removed
         playlist.song_playing = self.set_currently_playing_entry
 
+    def release(self) -> None:
+        # Detach from the playlist and the library before the view is dropped
+        self.async_song_library.songs_ready.disconnect(self.on_songs_ready)
+        self.prefetch_timer.stop()
+        self.prefetch_entries = []
+        self.index_timer.stop()
+        self.index_queue = []
+        self.missing_song_ids = []
+        self.pending_entries.clear()
+        self.table_model.songs.clear()
+        self.playlist.songs_added = None
+        self.playlist.songs_removed = None
+        self.playlist.song_playing = None
+
     def keyPressEvent(self, event: QKeyEvent):
         if event.key() == Qt.Key.Key_Delete:
             self.remove_selected_rows()
@@ -125,120 +186,145 @@ class PlaylistTreeView(QTreeView):
             super().keyPressEvent(event)
 
     def remove_selected_rows(self):
-        selected_rows = self.get_selected_rows()
-        for row in reversed(selected_rows):  # Reverse to avoid index shifting
-            self.remove_row(row)
+        self.playlist.remove_rows(self.get_selected_rows())
 
     def set_selected_item_played(self):
-        index = self.currentIndex()
-        if index.isValid():
-            row = index.row()
+        row = self.get_current_index()
+        if row is not None:
             print(f"Playing item at row {row}")
             self.set_currently_playing_row(row)
 
     def on_item_double_clicked(self, index: QModelIndex) -> None:
-        self.item_double_clicked.emit(index.row())
-
-    def build_row_data(self, entry: PlaylistEntry) -> Dict[str, str]:
-        song = self.song_library.get_song_by_id(entry.song_id)
-
-        if not song:
-            logger.error(f"Song with ID {entry.song_id} not found in library")
-            return {}
-
-        row_data: Dict[str, str] = {}
-        for column_def in self.default_columns_definitions:
-            col_id = column_def.get("id", "")
-            match col_id:
-                case "entry_id":
-                    row_data[col_id] = entry.entry_id
-                case "song_id":
-                    row_data[col_id] = song.id
-                case "title":
-                    row_data[col_id] = song.title
-                case "artist":
-                    row_data[col_id] = song.artist
-                case "file_name":
-                    row_data[col_id] = (
-                        song.file_path.split("/")[-1] if song.file_path else ""
-                    )
-                case "file_path":
-                    row_data[col_id] = song.file_path
-                case "duration":
-                    if not song.duration:
-                        row_data[col_id] = "0:00"
-                        continue
-                    seconds = int(song.duration // 1000)
-                    minutes = seconds // 60
-                    hours = minutes // 60
-                    seconds = seconds % 60
-                    minutes = minutes % 60
-                    if hours > 0:
-                        row_data[col_id] = f"{hours}:{minutes:02}:{seconds:02}"
-                    else:
-                        row_data[col_id] = f"{minutes}:{seconds:02}"
-                case "available_backends":
-                    row_data[col_id] = (
-                        ", ".join(song.available_backends)
-                        if song.available_backends
-                        else ""
-                    )
-                case _:
-                    custom_metadata = song.custom_metadata or {}
-                    row_data[col_id] = custom_metadata.get(col_id, "")
-        logger.debug(f"Loaded song data: {row_data} into playlist tree view")
-        return row_data
+        # Signals and public methods use playlist rows, which differ from the
+        # view rows while filtered
+        self.item_double_clicked.emit(self.table_model.playlist_row(index.row()))
 
     def get_playlist_data(self) -> None:
-        playlist_entries = self.playlist.get_songs_metadata(self.song_library)
+        self.table_model.songs.clear()
+        self.table_model.reset()
 
-        data: List[Dict[str, str]] = []
-        for playlist_entry in playlist_entries:
-            row_data = self.build_row_data(playlist_entry)
-            data.append(row_data)
-            # logger.debug(f"Adding row data: {row_data}")
+        self.prefetch_entries = []
+        self.queue_prefetch(self.playlist.get_entries())
 
-        self.model().removeRows(0, self.model().rowCount())
-        for row_data in data:
-            self.add_row(row_data)
+    def queue_prefetch(self, entries: List[PlaylistEntry]) -> None:
+        if self.prefetch_timer.isActive():
+            self.prefetch_entries.extend(entries)
+        else:
+            self.prefetch_entries = list(entries)
+            self.prefetch_position = 0
+            self.prefetch_timer.start()
+
+    def prefetch_next_chunk(self) -> None:
+        end = self.prefetch_position + PREFETCH_CHUNK_SIZE
+        entries = self.prefetch_entries[self.prefetch_position : end]
+        self.prefetch_position = end
+        if end >= len(self.prefetch_entries):
+            self.prefetch_timer.stop()
+            self.prefetch_entries = []
+        self.request_entries(
+            [entry for entry in entries if entry.song_key not in self.table_model.songs]
+        )
 
-    def add_row(self, row_data: Dict[str, Any]) -> None:
-        tree_cols: List[QStandardItem] = []
-        for column_def in self.default_columns_definitions:
-            col_id = column_def.get("id", "")
+    def on_song_missing(self, entry: PlaylistEntry) -> None:
+        # A visible row without its song, request it ahead of the prefetch
+        if entry.song_key not in self.pending_entries:
+            self.request_entries([entry])
+
+    def request_entries(self, entries: List[PlaylistEntry]) -> None:
+        requested: List[CompactId] = []
+        for entry in entries:
+            pending = self.pending_entries.get(entry.song_key)
+            if pending is None:
+                self.pending_entries[entry.song_key] = pending = []
+                requested.append(entry.song_key)
+            pending.append(entry)
+        self.async_song_library.request_songs(map(expand_id, requested))
+
+    def on_songs_ready(self, songs: List[Song], missing_ids: List[str]) -> None:
+        rows: List[int] = []
+        for song in songs:
+            for entry in self.pending_entries.pop(compact_id(song.id), []):
+                row = self.get_entry_row(entry)
+                if row is not None:
+                    rows.append(row)
+        self.table_model.set_songs(songs, rows)
+        if self.search_filter is not None and self.search_filter.add_songs(
+            (compact_id(song.id), song) for song in songs
+        ):
+            self.table_model.set_filter(self.search_filter.matches)
 
-            # if col_id == "playing":
-            #     continue
+        self.missing_song_ids.extend(
+            song_id
+            for song_id in missing_ids
+            if self.pending_entries.pop(compact_id(song_id), None) is not None
+        )
+        if (
+            self.missing_song_ids
+            and not self.pending_entries
+            and not self.prefetch_timer.isActive()
+        ):
+            missing_ids, self.missing_song_ids = self.missing_song_ids, []
+            logger.warning(
+                f"{len(missing_ids)} songs not found in library, removing from playlist"
+            )
+            self.playlist.remove_songs(missing_ids)
+        if (
+            self.pending_sort is not None
+            and not self.pending_entries
+            and not self.prefetch_timer.isActive()
+        ):
+            col_id, order = self.pending_sort
+            self.pending_sort = None
+            self.sort_by_column(col_id, order)
 
-            item = QStandardItem(row_data.get(col_id, ""))
+    def on_header_section_clicked(self, column: int) -> None:
+        if not self.table_model.is_sortable(column):
+            return
+        header = self.horizontalHeader()
+        order = (
+            Qt.SortOrder.DescendingOrder
+            if header.sortIndicatorSection() == column
+            and header.sortIndicatorOrder() == Qt.SortOrder.AscendingOrder
+            else Qt.SortOrder.AscendingOrder
+        )
+        header.setSortIndicator(column, order)
+        self.sort_by_column(self.table_model.columns[column], order)
 
-            # logger.debug(f"Adding item: {col_id} with value: {item.text()}")
+    def sort_by_column(self, col_id: str, order: Qt.SortOrder) -> None:
+        # Sort keys come from the songs, so wait until all have been read
+        if self.pending_entries or self.prefetch_timer.isActive():
+            self.pending_sort = (col_id, order)
+            return
+        column = self.table_model.column_of(col_id)
+        if column != -1:
+            self.table_model.sort(column, order)
+
+    def clear_sort_indicator(self) -> None:
+        self.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
 
-            tree_cols.append(item)
-        self.source_model.appendRow(tree_cols)
+    def get_entry_row(self, entry: PlaylistEntry) -> Optional[int]:
+        return self.playlist.row_of(entry)
 
     def remove_row(self, row: int) -> None:
-        self.source_model.removeRow(row)
-        song_id = self.playlist.get_song_ids()[row]
-        self.playlist.remove_song(song_id)
+        self.playlist.remove_rows([row])
 
     def update_entry(self, entry: PlaylistEntry) -> None:
-        try:
-            row = self.playlist.get_song_entry_ids().index(entry.entry_id)
-            row_data = self.build_row_data(entry)
-            for col_idx, column_def in enumerate(self.default_columns_definitions):
-                col_id = column_def.get("id", "")
-                item = self.source_model.item(row, col_idx)
-                if item and col_id in row_data:
-                    item.setText(row_data[col_id])
-            logger.info(f"Updated playlist entry at row {row}")
-        except ValueError:
+        if self.get_entry_row(entry) is None:
             logger.warning(
                 f"Playlist entry ID {entry.entry_id} not found in playlist; cannot update row."
             )
+            return
+        self.request_entries([entry])
+
+    def update_entries(self, entries: List[PlaylistEntry]) -> None:
+        # Songs of the entries changed in the library, fetch them again
+        self.request_entries(entries)
 
     def get_selected_rows(self) -> List[int]:
-        return sorted(set(index.row() for index in self.selectedIndexes()))
+        playlist_row = self.table_model.playlist_row
+        return sorted(
+            set(playlist_row(index.row()) for index in self.selectedIndexes())
+        )
 
     def get_selected_entries(self) -> List[PlaylistEntry]:
         selected_rows = self.get_selected_rows()
@@ -248,78 +334,73 @@ class PlaylistTreeView(QTreeView):
                 entries.append(self.playlist.entries[row])
         return entries
 
+    def is_external_drop(self, event: QDropEvent) -> bool:
+        mime_data = event.mimeData()
+        return mime_data.hasUrls() or mime_data.hasFormat(LIBRARY_MIME_TYPE)
+
     def dragEnterEvent(self, event: QDragEnterEvent) -> None:
-        if event.mimeData().hasUrls():
+        if self.is_external_drop(event):
             event.acceptProposedAction()
         else:
             super().dragEnterEvent(event)
 
+    def dragMoveEvent(self, event: QDragMoveEvent) -> None:
+        # Internal moves only accept rows of this view
+        if self.is_external_drop(event):
+            event.acceptProposedAction()
+        else:
+            super().dragMoveEvent(event)
+
     def dropEvent(self, event: QDropEvent) -> None:
-        if event.mimeData().hasUrls():
-            urls = event.mimeData().urls()
+        mime_data = event.mimeData()
+        if mime_data.hasFormat(LIBRARY_MIME_TYPE):
+            self.library_dropped.emit(
+                bytes(mime_data.data(LIBRARY_MIME_TYPE).data()).decode()
+            )
+            event.acceptProposedAction()
+        elif mime_data.hasUrls():
+            urls = mime_data.urls()
             file_paths = [url.toLocalFile() for url in urls]
             self.files_dropped.emit(file_paths)
             event.acceptProposedAction()
         else:
             super().dropEvent(event)
 
-    def _set_play_status(self, row: int, state: "PlaylistTreeView.PlayerState") -> None:
-        item = self.source_model.item(
-            row, self.column_manager.get_column_index("playing")
-        )
-
-        if item:
-            if state == self.PlayerState.PLAYING:
-                item.setIcon(QIcon.fromTheme("media-playback-start"))
-            elif state == self.PlayerState.PAUSED:
-                item.setIcon(QIcon.fromTheme("media-playback-pause"))
-            else:  # STOPPED
-                item.setIcon(QIcon())
-            self.viewport().update()
-
     def set_currently_playing_row(self, row: int) -> None:
-        if self.previous_row != -1:
-            self._set_play_status(self.previous_row, self.PlayerState.STOPPED)
-        self._set_play_status(row, self.PlayerState.PLAYING)
-        self.previous_row = row
+        if 0 <= row < len(self.playlist.entries):
+            entry = self.playlist.entries[row]
+            self.table_model.set_playing(entry.entry_key, self.PlayerState.PLAYING)
 
     def clear_currently_playing(self) -> None:
-        if self.previous_row != -1:
-            self._set_play_status(self.previous_row, self.PlayerState.STOPPED)
-            self.previous_row = -1
+        self.table_model.set_playing(None, self.PlayerState.STOPPED)
 
     def pause_currently_playing(self) -> None:
-        if self.previous_row != -1:
-            self._set_play_status(self.previous_row, self.PlayerState.PAUSED)
+        model = self.table_model
+        if model.playing_key is not None:
+            model.set_playing(model.playing_key, self.PlayerState.PAUSED)
 
     def start_currently_playing(self) -> None:
-        if self.previous_row != -1:
-            self._set_play_status(self.previous_row, self.PlayerState.PLAYING)
+        model = self.table_model
+        if model.playing_key is not None:
+            model.set_playing(model.playing_key, self.PlayerState.PLAYING)
 
     def set_currently_playing_entry(self, entry: Optional[PlaylistEntry]) -> None:
         if entry is None:
             return
 
-        for row in range(self.source_model.rowCount()):
-            item = self.source_model.item(
-                row, self.column_manager.get_column_index("entry_id")
-            )
-            if item and item.text() == entry.entry_id:
-                self.set_currently_playing_row(row)
-                self.setCurrentIndex(self.model().index(row, 0))
-                return
+        row = self.get_entry_row(entry)
+        if row is not None:
+            self.table_model.set_playing(entry.entry_key, self.PlayerState.PLAYING)
+            view_row = self.table_model.view_row(row)
+            if view_row is not None:
+                self.setCurrentIndex(self.model().index(view_row, 0))
+            return
         logger.warning(f"Entry ID {entry.entry_id} not found in playlist view")
 
-    def get_current_item(self) -> Optional[QStandardItem]:
-        index = self.currentIndex()
-        if index.isValid():
-            return self.source_model.itemFromIndex(index)
-        return None
-
     def get_current_index(self) -> Optional[int]:
         index = self.currentIndex()
         if index.isValid():
-            return index.row()
+            return self.table_model.playlist_row(index.row())
         return None
 
     def get_current_entry(self) -> Optional[PlaylistEntry]:
@@ -336,11 +417,12 @@ class PlaylistTreeView(QTreeView):
             return entry.song_id
         return None
 
-    def get_current_song(self) -> Optional[Song]:
+    def request_current_song(
+        self, callback: Callable[[Song], None], with_details: bool = False
+    ) -> None:
         song_id = self.get_current_song_id()
         if song_id:
-            return self.song_library.get_song_by_id(song_id)
-        return None
+            self.async_song_library.request_song(song_id, callback, with_details)
 
     def get_column_widths(self) -> List[int]:
         column_widths: List[int] = []
@@ -360,19 +442,55 @@ class PlaylistTreeView(QTreeView):
                 self.column_manager.set_column_width(column_id, current_width)
                 column_index += 1
 
-    def on_entry_added(self, entry: PlaylistEntry) -> None:
-        song = self.song_library.get_song_by_id(entry.song_id)
-        if song:
-            row_data = self.build_row_data(entry)
-            self.add_row(row_data)
-            logger.info(f"Song added to playlist view: {song.title} by {song.artist}")
-        else:
-            logger.warning(f"Song ID {entry.song_id} not found in library; cannot add.")
+    def on_column_visibility_toggled(self, column_id: str, visible: bool) -> None:
+        self.update_column_width()
+        self.column_manager.set_column_visibility(column_id, visible)
+        self.table_model.update_columns()
+        self.set_column_widths(self.column_manager.get_column_widths())
+
+    def on_entries_added(self, entries: List[PlaylistEntry]) -> None:
+        # Appended as one block; songs are read like those of a fresh view
+        self.table_model.rows_appended(len(entries))
+        self.queue_prefetch(entries)
+
+    def on_songs_removed(self, rows: List[int]) -> None:
+        self.table_model.rows_removed(rows)
 
     def select_current_song(self, index: int) -> None:
-        if 0 <= index < self.source_model.rowCount():
-            self.setCurrentIndex(self.model().index(index, 0))
+        if not 0 <= index < len(self.playlist.entries):
+            return
+        view_row = self.table_model.view_row(index)
+        if view_row is not None:
+            self.setCurrentIndex(self.model().index(view_row, 0))
             self.scrollTo(
-                self.model().index(index, 0),
+                self.model().index(view_row, 0),
                 QAbstractItemView.ScrollHint.PositionAtCenter,
             )
+
+    def set_filter_text(self, text: str) -> None:
+        if self.search_filter is None:
+            if not split_terms(text):
+                self.filter_text = text
+                return
+            self.search_filter = PlaylistFilter()
+            self.index_queue = list(self.table_model.songs.items())
+            self.index_position = 0
+            self.index_timer.start()
+
+        # Typing on narrows the rows shown now instead of checking them all
+        refine = text.startswith(self.filter_text)
+        self.filter_text = text
+        current_row = self.get_current_index()
+        self.table_model.set_filter(self.search_filter.search(text), refine)
+        if current_row is not None:
+            self.select_current_song(current_row)
+
+    def index_next_chunk(self) -> None:
+        end = self.index_position + INDEX_CHUNK_SIZE
+        songs = self.index_queue[self.index_position : end]
+        self.index_position = end
+        if end >= len(self.index_queue):
+            self.index_timer.stop()
+            self.index_queue = []
+        if self.search_filter is not None and self.search_filter.add_songs(songs):
+            self.table_model.set_filter(self.search_filter.matches)
@@ -0,0 +1,99 @@
+import re
+from typing import Any, Dict, List, Optional, Union
+
+from PyRetroPlayer.playlist.song_query import (
+    QUERY_OPERATORS,
+    SongCondition,
+    check_column,
+)
+
+# Suffixes of time values, in seconds
+TIME_UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+CLAUSE_PATTERN = re.compile(
+    r"^\s*(\w+)\s*(<=|>=|!=|=|<|>|like\b)\s*(.+?)\s*$", re.IGNORECASE
+)
+TIME_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhd])$", re.IGNORECASE)
+AND_PATTERN = re.compile(r"\s+and\s+", re.IGNORECASE)
+
+
+def parse_value(text: str) -> Union[int, float, str]:
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def parse_seconds(text: str, default_unit: str) -> float:
+    match = TIME_PATTERN.match(text)
+    if match:
+        return float(match.group(1)) * TIME_UNITS[match.group(2).lower()]
+    value = parse_value(text)
+    if isinstance(value, str):
+        raise ValueError(f"Not a time: {text}")
+    return value * TIME_UNITS[default_unit]
+
+
+class SmartQuery:
+    # A playlist whose entries are the songs matching a query over the
+    # library, written as clauses joined by "and", e.g.
+    #   format = AHX and duration > 3m and rating_member >= 8
+    #   added < 7d
+    # Durations are given in seconds unless a unit follows; "added" is the
+    # age of the song in the library, in days unless a unit follows
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.conditions: List[SongCondition] = []
+        # Songs added longer ago than this many seconds don't match
+        self.added_within: Optional[float] = None
+
+        for clause in AND_PATTERN.split(text.strip()):
+            match = CLAUSE_PATTERN.match(clause)
+            if not match:
+                raise ValueError(f"Invalid condition: {clause}")
+            column, operator, value = match.groups()
+            column = column.lower()
+            operator = operator.upper()
+            if operator not in QUERY_OPERATORS:
+                raise ValueError(f"Unknown operator: {operator}")
+
+            if column == "added":
+                if operator not in ("<", "<="):
+                    raise ValueError("Only added < age is supported")
+                self.added_within = parse_seconds(value, "d")
+            elif column == "duration":
+                # Stored in milliseconds
+                self.conditions.append(
+                    (column, operator, int(parse_seconds(value, "s") * 1000))
+                )
+            else:
+                self.conditions.append(
+                    (check_column(column), operator, parse_value(value))
+                )
+
+        # Latest library change applied to the entries, None until they are
+        # first built
+        self.seq: Optional[int] = None
+        # Oldest time added the entries were built for
+        self.cutoff: Optional[float] = None
+
+    def where(self, now: float) -> List[SongCondition]:
+        if self.added_within is None:
+            return list(self.conditions)
+        return self.conditions + [("added_at", ">=", now - self.added_within)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"text": self.text, "seq": self.seq, "cutoff": self.cutoff}
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "SmartQuery":
+        query = SmartQuery(data["text"])
+        query.seq = data.get("seq")
+        query.cutoff = data.get("cutoff")
+        return query
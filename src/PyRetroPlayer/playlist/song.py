@@ -1,19 +1,36 @@
 import json
+import sys
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
+
+from PyRetroPlayer.playlist.song_details import HEAVY_METADATA_KEYS
 
 
 class Song:
+    __slots__ = (
+        "id",
+        "file_path",
+        "title",
+        "artist",
+        "_available_backends",
+        "duration",
+        "md5",
+        "sha1",
+        "_custom_metadata",
+        "_metadata_loader",
+        "is_ready",
+        "subsongs",
+    )
+
     id: str
     file_path: str
     title: str
     artist: str
-    available_backends: List[str]
     duration: Optional[int]
     md5: Optional[str]
     sha1: Optional[str]
-    custom_metadata: Dict[str, Any]
     is_ready: bool
+    subsongs: int
 
     def __init__(
         self,
@@ -35,11 +52,72 @@ class Song:
         self.duration = duration
         self.md5 = md5
         self.sha1 = sha1
-        self.custom_metadata = custom_metadata or {}
+        self._custom_metadata = custom_metadata or {}
+        # Set for songs read from the library whose heavy metadata has not
+        # been fetched yet
+        self._metadata_loader: Optional[Callable[[], Dict[str, Any]]] = None
         self.is_ready = False
+        self.subsongs = 0
+
+    @property
+    def available_backends(self) -> List[str]:
+        return self._available_backends
+
+    @available_backends.setter
+    def available_backends(self, available_backends: List[str]) -> None:
+        # There are only a handful of backend names, share one string each
+        self._available_backends = [
+            sys.intern(backend) for backend in available_backends
+        ]
+
+    @property
+    def custom_metadata(self) -> Dict[str, Any]:
+        loader = self._metadata_loader
+        if loader is not None:
+            for key, value in loader().items():
+                self._custom_metadata.setdefault(key, value)
+            self._metadata_loader = None
+        return self._custom_metadata
+
+    @custom_metadata.setter
+    def custom_metadata(self, custom_metadata: Dict[str, Any]) -> None:
+        self._custom_metadata = custom_metadata
+        self._metadata_loader = None
+
+    def set_metadata_loader(self, loader: Callable[[], Dict[str, Any]]) -> None:
+        self._metadata_loader = loader
+
+    def copy(self) -> "Song":
+        # The fields and the top level of the metadata; details that are not
+        # loaded yet are loaded by each copy on its own
+        song = Song.__new__(Song)
+        for name in Song.__slots__:
+            setattr(song, name, getattr(self, name))
+        song._available_backends = list(self._available_backends)
+        song._custom_metadata = dict(self._custom_metadata)
+        return song
+
+    def get_metadata(self, key: str, default: Any = None) -> Any:
+        # Only heavy keys trigger loading the song details
+        if key in HEAVY_METADATA_KEYS:
+            return self.custom_metadata.get(key, default)
+        return self._custom_metadata.get(key, default)
 
     def to_json(self) -> str:
-        return json.dumps(self, default=lambda o: o.__dict__, indent=4)
+        return json.dumps(
+            {
+                "id": self.id,
+                "file_path": self.file_path,
+                "title": self.title,
+                "artist": self.artist,
+                "available_backends": self.available_backends,
+                "duration": self.duration,
+                "md5": self.md5,
+                "sha1": self.sha1,
+                "custom_metadata": self.custom_metadata,
+            },
+            indent=4,
+        )
 
     def __str__(self) -> str:
         return f"Song(id={self.id}, title={self.title}, artist={self.artist})"
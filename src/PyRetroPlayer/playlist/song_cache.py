@@ -0,0 +1,67 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from PyRetroPlayer.playlist.song import Song
+
+
+class SongCache:
+    # Holds private copies of songs and hands out copies, so callers may
+    # change the songs they get
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._songs: OrderedDict[str, Song] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, see put()
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, song_id: str) -> Optional[Song]:
+        with self._lock:
+            song = self._songs.get(song_id)
+            if song is None:
+                self.misses += 1
+                return None
+            self._songs.move_to_end(song_id)
+            self.hits += 1
+        return song.copy()
+
+    def put(self, song: Song, generation: Optional[int] = None) -> None:
+        # generation is the one read before the song was selected. If songs
+        # were invalidated since, the row may predate a write and is dropped
+        song = song.copy()
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._songs[song.id] = song
+            self._songs.move_to_end(song.id)
+            while len(self._songs) > self.max_size:
+                self._songs.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, song_ids: Iterable[str]) -> None:
+        with self._lock:
+            self.generation += 1
+            for song_id in song_ids:
+                self._songs.pop(song_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._songs.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._songs),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self) -> int:
+        return len(self._songs)
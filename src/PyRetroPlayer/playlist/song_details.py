@@ -0,0 +1,31 @@
+import json
+import zlib
+from typing import Any, Dict, Tuple
+
+# Bulky custom_metadata keys that list views never show: UADE instrument
+# credits, module messages and scraped ModArchive comments. They live
+# compressed in the song_details table and are loaded on first access.
+HEAVY_METADATA_KEYS = frozenset(
+    ["credits", "message", "message_raw", "comments", "warnings"]
+)
+
+
+def split_custom_metadata(
+    custom_metadata: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    light: Dict[str, Any] = {}
+    heavy: Dict[str, Any] = {}
+    for key, value in custom_metadata.items():
+        if key in HEAVY_METADATA_KEYS:
+            heavy[key] = value
+        else:
+            light[key] = value
+    return light, heavy
+
+
+def compress_details(details: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(details).encode("utf-8"))
+
+
+def decompress_details(data: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(data).decode("utf-8"))
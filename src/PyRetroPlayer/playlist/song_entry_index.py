@@ -0,0 +1,47 @@
+from typing import Dict, Iterable, List, Tuple
+
+from PyRetroPlayer.playlist.playlist_entry import CompactId, PlaylistEntry
+
+
+class SongEntryIndex:
+    # Entries of every song across all playlists, keyed by (playlist id,
+    # entry key). The playlists keep it up to date as entries come and go, so
+    # a change to a song in the library reaches exactly the rows that show it
+    def __init__(self) -> None:
+        self.songs: Dict[CompactId, Dict[Tuple[str, CompactId], PlaylistEntry]] = {}
+
+    def __len__(self) -> int:
+        return len(self.songs)
+
+    def __contains__(self, song_key: CompactId) -> bool:
+        return song_key in self.songs
+
+    def add(self, playlist_id: str, entries: Iterable[PlaylistEntry]) -> None:
+        songs = self.songs
+        for entry in entries:
+            song_entries = songs.get(entry.song_key)
+            if song_entries is None:
+                songs[entry.song_key] = song_entries = {}
+            song_entries[(playlist_id, entry.entry_key)] = entry
+
+    def remove(self, playlist_id: str, entries: Iterable[PlaylistEntry]) -> None:
+        songs = self.songs
+        for entry in entries:
+            song_entries = songs.get(entry.song_key)
+            if song_entries is None:
+                continue
+            song_entries.pop((playlist_id, entry.entry_key), None)
+            if not song_entries:
+                del songs[entry.song_key]
+
+    def entries_by_playlist(
+        self, song_keys: Iterable[CompactId]
+    ) -> Dict[str, List[PlaylistEntry]]:
+        playlists: Dict[str, List[PlaylistEntry]] = {}
+        for song_key in song_keys:
+            for (playlist_id, _), entry in self.songs.get(song_key, {}).items():
+                entries = playlists.get(playlist_id)
+                if entries is None:
+                    playlists[playlist_id] = entries = []
+                entries.append(entry)
+        return playlists
@@ -1,260 +1,967 @@
 import json
-import os
+import queue
 import sqlite3
 import threading
+import time
+from concurrent.futures import Future
 from types import TracebackType
-from typing import List, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 from SettingsManager import SettingsManager
 from loguru import logger
 
+from PyRetroPlayer.playlist.missing_files import find_missing_songs
 from PyRetroPlayer.playlist.song import Song
+from PyRetroPlayer.playlist.song_cache import SongCache
+from PyRetroPlayer.playlist.song_details import (
+    HEAVY_METADATA_KEYS,
+    compress_details,
+    decompress_details,
+    split_custom_metadata,
+)
+from PyRetroPlayer.playlist.song_query import (
+    METADATA_COLUMNS,
+    METADATA_INDEXES,
+    SongCondition,
+    build_where_clause,
+    check_column,
+)
+from PyRetroPlayer.playlist.song_search import (
+    SEARCH_COLUMN_WEIGHTS,
+    build_match_expression,
+    get_search_columns,
+)
 
-_thread_local = threading.local()
+WriteOperation = Callable[[sqlite3.Connection], Any]
+
+MAX_WRITES_PER_COMMIT = 1000
+
+# Stored columns of a song row; SELECT * would also evaluate every generated
+# metadata column
+SONG_COLUMNS = [
+    "id",
+    "file_path",
+    "title",
+    "artist",
+    "duration",
+    "available_backends",
+    "md5",
+    "sha1",
+    "custom_metadata",
+]
+SONG_COLUMNS_SQL = ", ".join(SONG_COLUMNS)
 
 
 class SongLibrary:
-    def __init__(self, db_path: str, settings_manager: SettingsManager):
+    def __init__(
+        self,
+        db_path: str,
+        settings_manager: Optional[SettingsManager] = None,
+        flush_interval: float = 0.05,
+        song_cache_size: int = 0,
+    ):
         self.settings_manager = settings_manager
 
         self.db_path = db_path
-        self._lock = threading.Lock()
-        self.db_path = db_path
+        self.flush_interval = flush_interval
+
+        self.song_cache: Optional[SongCache] = (
+            SongCache(song_cache_size) if song_cache_size > 0 else None
+        )
+
+        # Every thread gets its own connection per library instance
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        # All mutations are funneled through a single writer thread
+        self._write_queue: queue.Queue[
+            Optional[Tuple[WriteOperation, Future[Any], bool]]
+        ] = queue.Queue()
+        self._closed = False
 
         with self.get_connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+        self._migrate(self.get_connection())
+
+        self._writer_thread = threading.Thread(
+            target=self._run_writer, name="SongLibraryWriter", daemon=True
+        )
+        self._writer_thread.start()
+
+        logger.info(f"Initialized SongLibrary with database at {db_path}")
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        # Each entry upgrades the schema by one version, PRAGMA user_version
+        # records how far an existing database has been migrated
+        migrations: List[Callable[[sqlite3.Connection], None]] = [
+            self._create_songs_table,
+            self._create_search_index,
+            self._add_metadata_columns,
+            self._split_song_details,
+            self._create_playlist_tables,
+            self._add_playlist_stats,
+            self._track_library_changes,
+            self._add_smart_playlists,
+            self._add_browse_columns,
+            self._create_play_history,
+        ]
+
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target_version in range(version + 1, len(migrations) + 1):
+            logger.info(f"Migrating song library to schema version {target_version}")
+            conn.execute("BEGIN IMMEDIATE")
+            with conn:
+                migrations[target_version - 1](conn)
+                conn.execute(f"PRAGMA user_version = {target_version}")
+
+    def _create_songs_table(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS songs (
+                id TEXT PRIMARY KEY,
+                file_path TEXT,
+                title TEXT,
+                artist TEXT,
+                duration INTEGER,
+                available_backends TEXT,
+                md5 TEXT,
+                sha1 TEXT,
+                custom_metadata TEXT
+            )
+            """
+        )
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_songs_file_path ON songs(file_path)"
+        )
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_songs_md5_sha1 ON songs(md5, sha1)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_songs_artist ON songs(artist)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_songs_title ON songs(title)")
+
+    def _table_exists(self, conn: sqlite3.Connection, name: str) -> bool:
+        return (
             conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS songs (
-                    id TEXT PRIMARY KEY,
-                    file_path TEXT,
-                    title TEXT,
-                    artist TEXT,
-                    duration INTEGER,
-                    available_backends TEXT,
-                    md5 TEXT,
-                    sha1 TEXT,
-                    custom_metadata TEXT
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (name,),
+            ).fetchone()
+            is not None
+        )
+
+    def _create_search_index(self, conn: sqlite3.Connection) -> None:
+        if self._table_exists(conn, "songs_fts"):
+            return
+
+        # The FTS rowid mirrors the rowid of the song it indexes
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE songs_fts USING fts5(
+                title, artist, file_name, metadata,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+            """
+        )
+        weights = ", ".join(str(weight) for weight in SEARCH_COLUMN_WEIGHTS)
+        conn.execute(
+            "INSERT INTO songs_fts(songs_fts, rank) VALUES ('rank', ?)",
+            (f"bm25({weights})",),
+        )
+
+        # Libraries from before the details split still hold everything in
+        # custom_metadata
+        has_details = self._table_exists(conn, "song_details")
+        cur = conn.execute(f"SELECT rowid, {SONG_COLUMNS_SQL} FROM songs")
+        count = 0
+        while rows := cur.fetchmany(1000):
+            for row in rows:
+                song = self._song_from_row(row, load_details=has_details)
+                self._index_song(conn, row["rowid"], song)
+            count += len(rows)
+        logger.info(f"Built search index for {count} songs")
+
+    def _add_metadata_columns(self, conn: sqlite3.Connection) -> None:
+        existing_columns = {
+            row["name"] for row in conn.execute("PRAGMA table_xinfo(songs)")
+        }
+        for column, column_type, expression in METADATA_COLUMNS:
+            if column not in existing_columns:
+                conn.execute(
+                    f"ALTER TABLE songs ADD COLUMN {column} {column_type} GENERATED ALWAYS AS ({expression}) VIRTUAL"
                 )
+        for index_name, columns in METADATA_INDEXES:
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {index_name} ON songs({', '.join(columns)})"
+            )
+
+    def _split_song_details(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS song_details (id TEXT PRIMARY KEY, data BLOB NOT NULL)"
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS songs_delete_details AFTER DELETE ON songs
+            BEGIN
+                DELETE FROM song_details WHERE id = old.id;
+            END
+            """
+        )
+
+        condition = " OR ".join(
+            f"json_type(custom_metadata, '$.{key}') IS NOT NULL"
+            for key in sorted(HEAVY_METADATA_KEYS)
+        )
+        song_ids = [
+            row["id"] for row in conn.execute(f"SELECT id FROM songs WHERE {condition}")
+        ]
+        for start in range(0, len(song_ids), 500):
+            batch = song_ids[start : start + 500]
+            rows = conn.execute(
+                f"SELECT id, custom_metadata FROM songs WHERE id IN ({','.join('?' for _ in batch)})",
+                batch,
+            ).fetchall()
+            for row in rows:
+                light, heavy = split_custom_metadata(json.loads(row["custom_metadata"]))
+                details = {**self._read_song_details(conn, row["id"]), **heavy}
+                self._write_song_details(conn, row["id"], details)
+                conn.execute(
+                    "UPDATE songs SET custom_metadata = ? WHERE id = ?",
+                    (json.dumps(light), row["id"]),
+                )
+        logger.info(f"Moved heavy metadata of {len(song_ids)} songs to song_details")
+
+    def _create_playlist_tables(self, conn: sqlite3.Connection) -> None:
+        # Positions are fractional so an entry can be placed between two
+        # others by writing only its own row
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS playlists (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                position REAL NOT NULL,
+                current_song_index INTEGER NOT NULL DEFAULT -1
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS playlist_entries (
+                playlist_id TEXT NOT NULL,
+                entry_id TEXT NOT NULL,
+                song_id TEXT NOT NULL,
+                position REAL NOT NULL,
+                PRIMARY KEY (playlist_id, entry_id)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_playlist_entries_position ON playlist_entries(playlist_id, position)"
+        )
+
+    def _add_playlist_stats(self, conn: sqlite3.Connection) -> None:
+        # Totals of each playlist as JSON, so they are known without reading
+        # the entries
+        existing_columns = {
+            row["name"] for row in conn.execute("PRAGMA table_info(playlists)")
+        }
+        if "stats" not in existing_columns:
+            conn.execute("ALTER TABLE playlists ADD COLUMN stats TEXT")
+
+    def _track_library_changes(self, conn: sqlite3.Connection) -> None:
+        # When each song was added, and the latest change to every song in
+        # order; smart playlists only look at songs changed since their last
+        # refresh
+        existing_columns = {
+            row["name"] for row in conn.execute("PRAGMA table_xinfo(songs)")
+        }
+        if "added_at" not in existing_columns:
+            conn.execute("ALTER TABLE songs ADD COLUMN added_at REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_songs_added_at ON songs(added_at)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS library_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                song_id TEXT NOT NULL UNIQUE
+            )
+            """
+        )
+        # One row per song, moved to the end whenever the song changes
+        for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS songs_{event.lower()}_change
+                AFTER {event} ON songs
+                BEGIN
+                    DELETE FROM library_changes WHERE song_id = {row}.id;
+                    INSERT INTO library_changes (song_id) VALUES ({row}.id);
+                END
                 """
             )
+
+    def _add_smart_playlists(self, conn: sqlite3.Connection) -> None:
+        existing_columns = {
+            row["name"] for row in conn.execute("PRAGMA table_info(playlists)")
+        }
+        if "query" not in existing_columns:
+            conn.execute("ALTER TABLE playlists ADD COLUMN query TEXT")
+
+    def _add_browse_columns(self, conn: sqlite3.Connection) -> None:
+        # The library browser groups by these; the folder is the file path up
+        # to its last slash
+        existing_columns = {
+            row["name"] for row in conn.execute("PRAGMA table_xinfo(songs)")
+        }
+        if "folder" not in existing_columns:
             conn.execute(
-                "CREATE UNIQUE INDEX IF NOT EXISTS idx_songs_file_path ON songs(file_path)"
+                "ALTER TABLE songs ADD COLUMN folder TEXT GENERATED ALWAYS AS (rtrim(file_path, replace(file_path, '/', ''))) VIRTUAL"
             )
+        for column in ("artist", "format", "folder"):
             conn.execute(
-                "CREATE UNIQUE INDEX IF NOT EXISTS idx_songs_md5_sha1 ON songs(md5, sha1)"
+                f"CREATE INDEX IF NOT EXISTS idx_songs_{column} ON songs({column})"
             )
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_songs_artist ON songs(artist)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_songs_title ON songs(title)")
 
-        logger.info(f"Initialized SongLibrary with database at {db_path}")
+    def _create_play_history(self, conn: sqlite3.Connection) -> None:
+        # Appended to in batches, paged through newest first by id
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS play_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                song_id TEXT NOT NULL,
+                entry_id TEXT,
+                played_at REAL NOT NULL
+            )
+            """
+        )
+
+    def _write_song_details(
+        self, conn: sqlite3.Connection, song_id: str, details: Dict[str, Any]
+    ) -> None:
+        if details:
+            conn.execute(
+                """
+                INSERT INTO song_details (id, data) VALUES (?, ?)
+                ON CONFLICT(id) DO UPDATE SET data = excluded.data
+                """,
+                (song_id, compress_details(details)),
+            )
+        else:
+            conn.execute("DELETE FROM song_details WHERE id = ?", (song_id,))
+
+    def _read_song_details(
+        self, conn: sqlite3.Connection, song_id: str
+    ) -> Dict[str, Any]:
+        # On the given connection, so it can run inside an open transaction
+        row = conn.execute(
+            "SELECT data FROM song_details WHERE id = ?", (song_id,)
+        ).fetchone()
+        return decompress_details(row["data"]) if row else {}
+
+    def get_song_details(self, song_id: str) -> Dict[str, Any]:
+        with self.get_connection() as conn:
+            return self._read_song_details(conn, song_id)
+
+    def _index_song(self, conn: sqlite3.Connection, rowid: int, song: Song) -> None:
+        conn.execute(
+            "INSERT INTO songs_fts(rowid, title, artist, file_name, metadata) VALUES (?, ?, ?, ?, ?)",
+            (rowid, *get_search_columns(song)),
+        )
+
+    def _unindex_songs(self, conn: sqlite3.Connection, song_ids: List[str]) -> None:
+        placeholders = ",".join("?" for _ in song_ids)
+        conn.execute(
+            f"DELETE FROM songs_fts WHERE rowid IN (SELECT rowid FROM songs WHERE id IN ({placeholders}))",
+            song_ids,
+        )
+
+    def get_connection(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _connect(
+        self,
+        isolation_level: Optional[
+            Literal["DEFERRED", "EXCLUSIVE", "IMMEDIATE"]
+        ] = "DEFERRED",
+    ) -> sqlite3.Connection:
+        # Connections are only used by the thread that created them, but close()
+        # needs to be able to close them from the shutting-down thread
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=30,
+            isolation_level=isolation_level,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def submit_write(
+        self, operation: WriteOperation, urgent: bool = False
+    ) -> Future[Any]:
+        if self._closed:
+            raise RuntimeError("SongLibrary is closed")
+        future: Future[Any] = Future()
+        self._write_queue.put((operation, future, urgent))
+        return future
 
-        # Print all existing songs in the library
-        all_songs = self.get_all_songs()
-        logger.debug(f"Existing songs in library: {[song.title for song in all_songs]}")
+    def _run_writer(self) -> None:
+        conn = self._connect(isolation_level=None)
+        self._local.conn = conn
+        running = True
+        while running:
+            item = self._write_queue.get()
+            if item is None:
+                break
+            batch = [item]
+            running = self._collect_writes(batch)
+            self._commit_writes(conn, batch)
 
-    def get_connection(self):
-        if not hasattr(_thread_local, "conn"):
-            _thread_local.conn = sqlite3.connect(self.db_path)
-            _thread_local.conn.row_factory = sqlite3.Row
-        return _thread_local.conn
+    def _collect_writes(
+        self, batch: List[Tuple[WriteOperation, Future[Any], bool]]
+    ) -> bool:
+        # Group everything that arrives within the flush interval into one commit.
+        # Once somebody is waiting for a result, only drain what is already queued.
+        deadline = time.monotonic() + self.flush_interval
+        urgent = batch[0][2]
+        while len(batch) < MAX_WRITES_PER_COMMIT:
+            timeout = deadline - time.monotonic()
+            try:
+                if urgent or timeout <= 0:
+                    item = self._write_queue.get_nowait()
+                else:
+                    item = self._write_queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return False
+            batch.append(item)
+            urgent = urgent or item[2]
+        return True
+
+    def _commit_writes(
+        self,
+        conn: sqlite3.Connection,
+        batch: List[Tuple[WriteOperation, Future[Any], bool]],
+    ) -> None:
+        results: List[Tuple[Future[Any], Any, Optional[BaseException]]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for operation, future, _ in batch:
+                conn.execute("SAVEPOINT write_operation")
+                try:
+                    result = operation(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_operation")
+                    logger.error(f"Song library write failed: {e}")
+                    results.append((future, None, e))
+                else:
+                    results.append((future, result, None))
+                conn.execute("RELEASE write_operation")
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.error(f"Song library commit failed: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for future, result, exception in results:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+    def flush(self) -> None:
+        self.submit_write(lambda conn: None, urgent=True).result()
+
+    def dont_add_duplicates(self) -> bool:
+        if self.settings_manager is None:
+            return False
+        return self.settings_manager.get("dont_add_duplicates", default=False)
 
     def add_song(self, song: Song) -> str:
-        with self._lock:
-            with self.get_connection() as conn:
-                cur = conn.cursor()
+        return self.add_songs([song])[song]
+
+    def add_songs(
+        self, songs: Iterable[Song], batch_size: int = 500
+    ) -> Dict[Song, str]:
+        futures: List[Future[Dict[Song, str]]] = []
+        batch: List[Song] = []
+        for song in songs:
+            batch.append(song)
+            if len(batch) >= batch_size:
+                futures.append(self._submit_song_batch(batch))
+                batch = []
+        if batch:
+            futures.append(self._submit_song_batch(batch))
+
+        song_ids: Dict[Song, str] = {}
+        for future in futures:
+            song_ids.update(future.result())
+        return song_ids
+
+    def _submit_song_batch(self, songs: List[Song]) -> Future[Dict[Song, str]]:
+        return self.submit_write(
+            lambda conn: self._add_song_batch(conn, songs), urgent=True
+        )
+
+    def _add_song_batch(
+        self, conn: sqlite3.Connection, songs: List[Song]
+    ) -> Dict[Song, str]:
+        song_ids: Dict[Song, str] = {}
+        existing: List[Song] = []
+        added_at = time.time()
+        cur = conn.cursor()
+        for song in songs:
+            light, heavy = split_custom_metadata(song.custom_metadata)
+            cur.execute(
+                """
+                INSERT INTO songs (
+                    id, file_path, title, artist, duration, available_backends, md5, sha1, custom_metadata, added_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT DO NOTHING
+                RETURNING rowid, id
+                """,
+                (
+                    song.id,
+                    song.file_path,
+                    song.title,
+                    song.artist,
+                    song.duration,
+                    json.dumps(song.available_backends),
+                    song.md5,
+                    song.sha1,
+                    json.dumps(light),
+                    added_at,
+                ),
+            )
+            row = cur.fetchone()
+            if row:
+                song_ids[song] = row["id"]
+                if heavy:
+                    self._write_song_details(conn, song.id, heavy)
+                self._index_song(conn, row["rowid"], song)
+            else:
+                existing.append(song)
+
+        existing_ids = self._find_existing_song_ids(cur, existing)
+
+        dont_add_duplicates = self.dont_add_duplicates()
+        for song in existing:
+            existing_id = existing_ids.get(song, "")
+            if not existing_id:
+                logger.warning(
+                    f"Song not added due to integrity error: {song.file_path} (MD5: {song.md5}, SHA1: {song.sha1})"
+                )
+            song_ids[song] = "" if dont_add_duplicates else existing_id
+
+        logger.info(
+            f"Added {len(songs) - len(existing)} songs to library, {len(existing)} already existed"
+        )
+        return song_ids
+
+    def _find_existing_song_ids(
+        self, cur: sqlite3.Cursor, songs: List[Song]
+    ) -> Dict[Song, str]:
+        if not songs:
+            return {}
+
+        placeholders = ",".join("?" for _ in songs)
+        cur.execute(
+            f"SELECT id, file_path FROM songs WHERE file_path IN ({placeholders})",
+            [song.file_path for song in songs],
+        )
+        ids_by_path = {row["file_path"]: row["id"] for row in cur.fetchall()}
+
+        existing_ids: Dict[Song, str] = {}
+        for song in songs:
+            if song.file_path in ids_by_path:
+                existing_ids[song] = ids_by_path[song.file_path]
+            elif song.md5 is not None and song.sha1 is not None:
                 cur.execute(
-                    "SELECT id FROM songs WHERE file_path = ?", (song.file_path,)
+                    "SELECT id FROM songs WHERE md5 = ? AND sha1 = ?",
+                    (song.md5, song.sha1),
                 )
                 row = cur.fetchone()
                 if row:
-                    logger.info(
-                        f"Song already exists: {song.file_path} (ID: {row['id']}). Not adding duplicate."
-                    )
-                    if self.settings_manager.get("dont_add_duplicates", default=False):
-                        return ""
-                    return row["id"]
-                try:
-                    cur.execute(
-                        """
-                        INSERT INTO songs (
-                            id, file_path, title, artist, duration, available_backends, md5, sha1, custom_metadata
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (
-                            song.id,
-                            song.file_path,
-                            song.title,
-                            song.artist,
-                            song.duration,
-                            json.dumps(song.available_backends),
-                            song.md5,
-                            song.sha1,
-                            json.dumps(song.custom_metadata),
-                        ),
-                    )
-                    logger.info(
-                        f"Added song: {song.title} to library with ID: {song.id}"
-                    )
-                    return song.id
-                except sqlite3.IntegrityError as e:
-                    if "UNIQUE constraint failed" in str(e):
-                        # Find the existing song by md5/sha1 or file_path and return its ID
-                        cur.execute(
-                            "SELECT id FROM songs WHERE md5 = ? AND sha1 = ?",
-                            (song.md5, song.sha1),
-                        )
-                        row = cur.fetchone()
-                        if row:
-                            logger.info(
-                                f"Song already exists (MD5/SHA1): {song.file_path} (ID: {row['id']}). Not adding duplicate."
-                            )
-                            if self.settings_manager.get(
-                                "dont_add_duplicates", default=False
-                            ):
-                                return ""
-                        cur.execute(
-                            "SELECT id FROM songs WHERE file_path = ?",
-                            (song.file_path,),
-                        )
-                        row = cur.fetchone()
-                        if row:
-                            logger.info(
-                                f"Song already exists (file_path): {song.file_path} (ID: {row['id']}). Not adding duplicate."
-                            )
-                            if self.settings_manager.get(
-                                "dont_add_duplicates", default=False
-                            ):
-                                return ""
-                            return row["id"]
-                        logger.warning(
-                            f"Song not added due to integrity error: {e} (MD5: {song.md5}, SHA1: {song.sha1})"
-                        )
-                        return ""
-                    else:
-                        logger.warning(
-                            f"Song not added due to integrity error: {e} (MD5: {song.md5}, SHA1: {song.sha1})"
-                        )
-                        return ""
-
-    def remove_song(self, song_id: str) -> None:
+                    existing_ids[song] = row["id"]
+        return existing_ids
+
+    def remove_song(self, song_id: str) -> Future[None]:
+        return self.remove_songs([song_id])
+
+    def remove_songs(
+        self, song_ids: Iterable[str], batch_size: int = 500
+    ) -> Future[None]:
+        song_ids = list(song_ids)
+
+        def remove(conn: sqlite3.Connection) -> None:
+            # A single write operation, so all ids go in one transaction
+            for start in range(0, len(song_ids), batch_size):
+                batch = song_ids[start : start + batch_size]
+                self._unindex_songs(conn, batch)
+                conn.execute(
+                    f"DELETE FROM songs WHERE id IN ({','.join('?' for _ in batch)})",
+                    batch,
+                )
+            logger.info(f"Removed {len(song_ids)} songs from library")
+
+        return self._invalidate_cached_songs(song_ids, self.submit_write(remove))
+
+    def _invalidate_cached_songs(
+        self, song_ids: List[str], future: Future[Any]
+    ) -> Future[Any]:
+        # Once when the write is queued and again after it was committed;
+        # the second bumps the cache generation, so readers that selected the
+        # old rows before the commit don't cache them
+        if self.song_cache is not None:
+            song_cache = self.song_cache
+            song_cache.invalidate(song_ids)
+            future.add_done_callback(lambda _: song_cache.invalidate(song_ids))
+        return future
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        if self.song_cache is None:
+            return {}
+        return self.song_cache.get_stats()
+
+    def _song_from_row(self, row: sqlite3.Row, load_details: bool = True) -> Song:
+        song = Song(
+            id=row["id"],
+            file_path=row["file_path"],
+            title=row["title"],
+            artist=row["artist"],
+            duration=row["duration"],
+            available_backends=(
+                json.loads(row["available_backends"])
+                if row["available_backends"]
+                else []
+            ),
+            md5=row["md5"],
+            sha1=row["sha1"],
+            custom_metadata=(
+                json.loads(row["custom_metadata"]) if row["custom_metadata"] else {}
+            ),  # Deserialize JSON
+        )
+        if load_details:
+            song_id = song.id
+            song.set_metadata_loader(lambda: self.get_song_details(song_id))
+        return song
+
+    def get_song_by_id(self, song_id: str) -> Optional[Song]:
+        generation = 0
+        if self.song_cache is not None:
+            generation = self.song_cache.generation
+            song = self.song_cache.get(song_id)
+            if song is not None:
+                return song
+
         with self.get_connection() as conn:
             cur = conn.cursor()
-            cur.execute("DELETE FROM songs WHERE id = ?", (song_id,))
-            logger.info(f"Removed song with ID from library: {song_id}")
+            cur.execute(
+                f"SELECT {SONG_COLUMNS_SQL} FROM songs WHERE id = ?", (song_id,)
+            )
+            row = cur.fetchone()
+            if row:
+                song = self._song_from_row(row)
+                if self.song_cache is not None:
+                    self.song_cache.put(song, generation)
+                return song
+            return None
 
-    def get_song_by_id(self, song_id: str) -> Optional[Song]:
-        with self._lock:
+    def get_songs(self, song_ids: List[str], batch_size: int = 500) -> List[Song]:
+        if not song_ids:
+            return []
+
+        song_map: Dict[str, Song] = {}
+        missing_ids = song_ids
+        generation = 0
+        if self.song_cache is not None:
+            generation = self.song_cache.generation
+            missing_ids = []
+            for song_id in song_ids:
+                song = self.song_cache.get(song_id)
+                if song is not None:
+                    song_map[song_id] = song
+                else:
+                    missing_ids.append(song_id)
+
+        if missing_ids:
+            # Chunked to stay below the SQLite parameter limit
             with self.get_connection() as conn:
                 cur = conn.cursor()
-                cur.execute("SELECT * FROM songs WHERE id = ?", (song_id,))
-                row = cur.fetchone()
-                if row:
-                    return Song(
-                        id=row["id"],
-                        file_path=row["file_path"],
-                        title=row["title"],
-                        artist=row["artist"],
-                        duration=row["duration"],
-                        available_backends=(
-                            json.loads(row["available_backends"])
-                            if row["available_backends"]
-                            else []
-                        ),
-                        md5=row["md5"],
-                        sha1=row["sha1"],
-                        custom_metadata=(
-                            json.loads(row["custom_metadata"])
-                            if row["custom_metadata"]
-                            else {}
-                        ),  # Deserialize JSON
+                for start in range(0, len(missing_ids), batch_size):
+                    batch = missing_ids[start : start + batch_size]
+                    placeholders = ",".join("?" for _ in batch)
+                    cur.execute(
+                        f"SELECT {SONG_COLUMNS_SQL} FROM songs WHERE id IN ({placeholders})",
+                        batch,
                     )
-                return None
+                    for row in cur.fetchall():
+                        song = self._song_from_row(row)
+                        song_map[song.id] = song
+                        if self.song_cache is not None:
+                            self.song_cache.put(song, generation)
+
+        return [song_map[sid] for sid in song_ids if sid in song_map]
+
+    def get_all_songs(self) -> List[Song]:
+        return list(self.iter_songs())
+
+    def _get_rows_page(
+        self,
+        columns: str,
+        after_id: Optional[str],
+        limit: int,
+        where: Sequence[SongCondition] = (),
+    ) -> List[sqlite3.Row]:
+        # Keyset pagination on the primary key, so every page is an index seek
+        # no matter how deep into the library it is
+        where_clause, params = build_where_clause(where)
+        if after_id is not None:
+            where_clause += " AND id > ?"
+            params.append(after_id)
+        params.append(limit)
 
-    def get_songs(self, song_ids: List[str]) -> List[Song]:
-        if not song_ids:
-            return []
-        placeholders = ",".join("?" for _ in song_ids)
-        query = f"SELECT * FROM songs WHERE id IN ({placeholders})"
         with self.get_connection() as conn:
             cur = conn.cursor()
-            cur.execute(query, song_ids)
-            rows = cur.fetchall()
-            song_map = {
-                row["id"]: Song(
-                    id=row["id"],
-                    file_path=row["file_path"],
-                    title=row["title"],
-                    artist=row["artist"],
-                    duration=row["duration"],
-                    available_backends=(
-                        json.loads(row["available_backends"])
-                        if row["available_backends"]
-                        else []
-                    ),
-                    md5=row["md5"],
-                    sha1=row["sha1"],
-                    custom_metadata=(
-                        json.loads(row["custom_metadata"])
-                        if row["custom_metadata"]
-                        else {}
-                    ),
-                )
-                for row in rows
-            }
-            return [song_map[sid] for sid in song_ids if sid in song_map]
+            cur.execute(
+                f"SELECT {columns} FROM songs WHERE {where_clause} ORDER BY id LIMIT ?",
+                params,
+            )
+            return cur.fetchall()
+
+    def _iter_rows(
+        self, columns: str, batch_size: int, where: Sequence[SongCondition] = ()
+    ) -> Iterator[sqlite3.Row]:
+        # Each batch is its own short read, no transaction is held open while
+        # the caller consumes rows
+        after_id: Optional[str] = None
+        while True:
+            rows = self._get_rows_page(columns, after_id, batch_size, where)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1]["id"]
+
+    def get_songs_page(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 100,
+        where: Sequence[SongCondition] = (),
+    ) -> List[Song]:
+        return [
+            self._song_from_row(row)
+            for row in self._get_rows_page(SONG_COLUMNS_SQL, after_id, limit, where)
+        ]
+
+    def iter_songs(
+        self, batch_size: int = 1000, where: Sequence[SongCondition] = ()
+    ) -> Iterator[Song]:
+        for row in self._iter_rows(SONG_COLUMNS_SQL, batch_size, where):
+            yield self._song_from_row(row)
+
+    def find_songs(
+        self,
+        conditions: Sequence[SongCondition] = (),
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Song]:
+        where_clause, params = build_where_clause(conditions)
+        query = f"SELECT {SONG_COLUMNS_SQL} FROM songs WHERE {where_clause}"
+        if order_by:
+            query += (
+                f" ORDER BY {check_column(order_by)} {'DESC' if descending else 'ASC'}"
+            )
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
 
-    def get_all_songs(self) -> List[Song]:
         with self.get_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM songs")
+            cur.execute(query, params)
+            return [self._song_from_row(row) for row in cur.fetchall()]
+
+    def find_song_ids(
+        self,
+        conditions: Sequence[SongCondition] = (),
+        song_ids: Optional[List[str]] = None,
+        batch_size: int = 500,
+    ) -> List[str]:
+        # Ids only, in the order the songs were added; when song_ids is given
+        # only those songs are looked at
+        where_clause, params = build_where_clause(conditions)
+        found: List[str] = []
+        with self.get_connection() as conn:
+            if song_ids is None:
+                after_rowid = 0
+                while True:
+                    rows = conn.execute(
+                        f"SELECT rowid, id FROM songs WHERE ({where_clause}) AND rowid > ? ORDER BY rowid LIMIT ?",
+                        params + [after_rowid, batch_size],
+                    ).fetchall()
+                    found.extend(row["id"] for row in rows)
+                    if len(rows) < batch_size:
+                        break
+                    after_rowid = rows[-1]["rowid"]
+            else:
+                for start in range(0, len(song_ids), batch_size):
+                    batch = song_ids[start : start + batch_size]
+                    placeholders = ",".join("?" for _ in batch)
+                    rows = conn.execute(
+                        f"SELECT id FROM songs WHERE ({where_clause}) AND id IN ({placeholders}) ORDER BY rowid",
+                        params + batch,
+                    ).fetchall()
+                    found.extend(row["id"] for row in rows)
+        return found
+
+    def group_counts(
+        self, column: str, after: Optional[Any] = None, limit: int = 500
+    ) -> List[Tuple[Any, int]]:
+        # Distinct values of a column and their number of songs, in order and
+        # paged by the last value, so each page is a seek on the column index.
+        # None starts at the beginning, where songs without a value come first
+        check_column(column)
+        query = f"SELECT {column} AS value, COUNT(*) AS count FROM songs"
+        params: List[Any] = []
+        if after is not None:
+            query += f" WHERE {column} > ?"
+            params.append(after)
+        query += f" GROUP BY {column} ORDER BY {column} LIMIT ?"
+        params.append(limit)
+
+        with self.get_connection() as conn:
             return [
-                Song(
-                    id=row["id"],
-                    file_path=row["file_path"],
-                    title=row["title"],
-                    artist=row["artist"],
-                    duration=row["duration"],
-                    available_backends=(
-                        json.loads(row["available_backends"])
-                        if row["available_backends"]
-                        else []
-                    ),
-                    md5=row["md5"],
-                    sha1=row["sha1"],
-                    custom_metadata=(
-                        json.loads(row["custom_metadata"])
-                        if row["custom_metadata"]
-                        else {}
-                    ),  # Deserialize JSON
-                )
-                for row in cur.fetchall()
+                (row["value"], row["count"])
+                for row in conn.execute(query, params).fetchall()
             ]
 
-    def check_song_exists(self, song_id: str) -> bool:
+    def group_song_rows(
+        self, column: str, value: Any, after_rowid: int = 0, limit: int = 200
+    ) -> List[sqlite3.Row]:
+        # Songs with the given value, in the order they were added
+        where_clause, params = build_where_clause([(column, "=", value)])
         with self.get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT 1 FROM songs WHERE id = ?", (song_id,))
-            return cur.fetchone() is not None
+            return conn.execute(
+                f"SELECT rowid, id, title, file_path FROM songs WHERE {where_clause} AND rowid > ? ORDER BY rowid LIMIT ?",
+                params + [after_rowid, limit],
+            ).fetchall()
 
-    def remove_missing_files(self) -> None:
+    def get_ratings(
+        self, song_ids: Optional[List[str]] = None, batch_size: int = 500
+    ) -> Dict[str, float]:
+        # ModArchive member rating of every rated song, or of the given ones
+        query = "SELECT id, rating_member FROM songs WHERE rating_member IS NOT NULL"
         with self.get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT id, file_path FROM songs")
-            rows = cur.fetchall()
-            for row in rows:
-                song_id, file_path = row["id"], row["file_path"]
-                if not os.path.exists(file_path):
-                    logger.warning(f"Removing missing file: {file_path}")
-                    self.remove_song(song_id)
+            if song_ids is None:
+                return {row["id"]: row["rating_member"] for row in conn.execute(query)}
+            ratings: Dict[str, float] = {}
+            for start in range(0, len(song_ids), batch_size):
+                batch = song_ids[start : start + batch_size]
+                placeholders = ",".join("?" for _ in batch)
+                for row in conn.execute(f"{query} AND id IN ({placeholders})", batch):
+                    ratings[row["id"]] = row["rating_member"]
+            return ratings
+
+    def last_change(self) -> int:
+        with self.get_connection() as conn:
+            return conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM library_changes"
+            ).fetchone()[0]
+
+    def changes_since(self, seq: int) -> Tuple[int, List[str]]:
+        # Songs added, updated or removed after the given change, along with
+        # the latest change
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT seq, song_id FROM library_changes WHERE seq > ? ORDER BY seq",
+                (seq,),
+            ).fetchall()
+        if not rows:
+            return seq, []
+        return rows[-1]["seq"], [row["song_id"] for row in rows]
+
+    def search(self, query: str, limit: int = 50) -> List[Song]:
+        match_expression = build_match_expression(query)
+        if not match_expression:
+            return []
 
-    def update_song(self, song: Song) -> None:
         with self.get_connection() as conn:
             cur = conn.cursor()
+            columns = ", ".join(f"songs.{column}" for column in SONG_COLUMNS)
             cur.execute(
+                f"""
+                SELECT {columns} FROM (
+                    SELECT rowid, rank FROM songs_fts
+                    WHERE songs_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                ) AS matches
+                JOIN songs ON songs.rowid = matches.rowid
+                ORDER BY matches.rank
+                """,
+                (match_expression, limit),
+            )
+            return [self._song_from_row(row) for row in cur.fetchall()]
+
+    def check_song_exists(self, song_id: str) -> bool:
+        with self.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT 1 FROM songs WHERE id = ?", (song_id,))
+            return cur.fetchone() is not None
+
+    def iter_song_paths(self, batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        for row in self._iter_rows("id, file_path", batch_size):
+            yield row["id"], row["file_path"]
+
+    def remove_missing_files(
+        self,
+        max_workers: int = 8,
+        progress: Optional[Callable[[int, int], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> List[str]:
+        # Nothing is removed once the sweep is cancelled
+        missing_ids = find_missing_songs(
+            self.iter_song_paths(), max_workers, progress, cancel_event
+        )
+        if cancel_event is not None and cancel_event.is_set():
+            return []
+        if missing_ids:
+            logger.warning(f"Removing {len(missing_ids)} missing files from library")
+            self.remove_songs(missing_ids).result()
+        return missing_ids
+
+    def update_song(self, song: Song) -> Future[None]:
+        # Resolve lazily loaded metadata on the calling thread
+        light, heavy = split_custom_metadata(song.custom_metadata)
+
+        def update(conn: sqlite3.Connection) -> None:
+            self._unindex_songs(conn, [song.id])
+            row = conn.execute(
                 """
                 UPDATE songs
                 SET file_path = ?, title = ?, artist = ?, duration = ?, available_backends = ?, md5 = ?, sha1 = ?, custom_metadata = ?
                 WHERE id = ?
+                RETURNING rowid
                 """,
                 (
                     song.file_path,
@@ -264,20 +971,44 @@ class SongLibrary:
                     json.dumps(song.available_backends),
                     song.md5,
                     song.sha1,
-                    json.dumps(song.custom_metadata),
+                    json.dumps(light),
                     song.id,
                 ),
-            )
+            ).fetchone()
+            if row:
+                self._write_song_details(conn, song.id, heavy)
+                self._index_song(conn, row["rowid"], song)
             logger.info(f"Updated song in library: {song.title} (ID: {song.id})")
 
-    def clear(self) -> None:
-        with self.get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute("DELETE FROM songs")
+        return self._invalidate_cached_songs([song.id], self.submit_write(update))
+
+    def clear(self) -> Future[None]:
+        def clear(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM song_details")
+            conn.execute("DELETE FROM songs")
+            conn.execute("DELETE FROM songs_fts")
             logger.debug("Cleared song library")
 
+        future = self.submit_write(clear)
+        if self.song_cache is not None:
+            song_cache = self.song_cache
+            song_cache.clear()
+            future.add_done_callback(lambda _: song_cache.clear())
+        return future
+
     def close(self) -> None:
-        pass
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._write_queue.put(None)
+        self._writer_thread.join()
+
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
 
     def __enter__(self) -> "SongLibrary":
         return self
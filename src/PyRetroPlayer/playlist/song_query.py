@@ -0,0 +1,83 @@
+from typing import Any, List, Sequence, Tuple
+
+# (column, operator, value), e.g. ("format", "=", "AHX")
+SongCondition = Tuple[str, str, Any]
+
+# Hot custom_metadata keys exposed as indexed generated columns on the songs
+# table: (column, type, expression)
+METADATA_COLUMNS: List[Tuple[str, str, str]] = [
+    (
+        "format",
+        "TEXT",
+        "COALESCE(json_extract(custom_metadata, '$.type'), json_extract(custom_metadata, '$.formatname'))",
+    ),
+    ("tracker", "TEXT", "json_extract(custom_metadata, '$.tracker')"),
+    ("player", "TEXT", "json_extract(custom_metadata, '$.playername')"),
+    ("subsong_count", "INTEGER", "json_extract(custom_metadata, '$.subsongs.max')"),
+    (
+        "modarchive_id",
+        "INTEGER",
+        "CAST(json_extract(custom_metadata, '$.modarchive_id') AS INTEGER)",
+    ),
+    (
+        "rating_member",
+        "REAL",
+        "CAST(json_extract(custom_metadata, '$.ratings.member') AS REAL)",
+    ),
+    (
+        "rating_reviewer",
+        "REAL",
+        "CAST(json_extract(custom_metadata, '$.ratings.reviewer') AS REAL)",
+    ),
+]
+
+METADATA_INDEXES: List[Tuple[str, List[str]]] = [
+    ("idx_songs_format_artist_duration", ["format", "artist", "duration"]),
+    ("idx_songs_tracker", ["tracker"]),
+    ("idx_songs_player", ["player"]),
+    ("idx_songs_modarchive_id", ["modarchive_id"]),
+    ("idx_songs_rating_member", ["rating_member"]),
+    ("idx_songs_duration", ["duration"]),
+]
+
+QUERY_COLUMNS = {
+    "id",
+    "title",
+    "artist",
+    "file_path",
+    "duration",
+    "md5",
+    "sha1",
+    "added_at",
+    "folder",
+} | {column for column, _, _ in METADATA_COLUMNS}
+
+QUERY_OPERATORS = {"=", "!=", "<", "<=", ">", ">=", "LIKE", "IN"}
+
+
+def check_column(column: str) -> str:
+    if column not in QUERY_COLUMNS:
+        raise ValueError(f"Unknown song column: {column}")
+    return column
+
+
+def build_where_clause(conditions: Sequence[SongCondition]) -> Tuple[str, List[Any]]:
+    clauses: List[str] = []
+    params: List[Any] = []
+    for column, operator, value in conditions:
+        check_column(column)
+        operator = operator.upper()
+        if operator not in QUERY_OPERATORS:
+            raise ValueError(f"Unknown operator: {operator}")
+
+        if operator == "IN":
+            values = list(value)
+            clauses.append(f"{column} IN ({','.join('?' for _ in values)})")
+            params.extend(values)
+        elif value is None and operator in ("=", "!="):
+            clauses.append(f"{column} IS {'NOT ' if operator == '!=' else ''}NULL")
+        else:
+            clauses.append(f"{column} {operator} ?")
+            params.append(value)
+
+    return " AND ".join(clauses) or "1", params
@@ -0,0 +1,72 @@
+import re
+from typing import Any, Dict, List
+
+from PyRetroPlayer.playlist.song import Song
+
+# Plain string values in custom_metadata worth searching for
+SEARCHABLE_METADATA_KEYS = [
+    "message",
+    "tracker",
+    "type_long",
+    "formatname",
+    "playername",
+    "Genre",
+]
+
+# Keys inside the UADE credits (see songinfo.get_credits)
+SEARCHABLE_CREDITS_KEYS = ["song_title", "modulename", "artistname", "specialinfo"]
+
+# Relative weights for title, artist, file_name and metadata when ranking
+SEARCH_COLUMN_WEIGHTS = (10.0, 8.0, 5.0, 1.0)
+
+
+def get_file_name(file_path: str) -> str:
+    return file_path.split("/")[-1] if file_path else ""
+
+
+def _collect_strings(value: Any, strings: List[str]) -> None:
+    if isinstance(value, str):
+        if value:
+            strings.append(value)
+    elif isinstance(value, list):
+        for item in value:  # type: ignore
+            _collect_strings(item, strings)
+
+
+def get_searchable_metadata(custom_metadata: Dict[str, Any]) -> str:
+    strings: List[str] = []
+
+    for key in SEARCHABLE_METADATA_KEYS:
+        _collect_strings(custom_metadata.get(key), strings)
+
+    credits = custom_metadata.get("credits") or {}
+    if isinstance(credits, dict):
+        for key in SEARCHABLE_CREDITS_KEYS:
+            _collect_strings(credits.get(key), strings)  # type: ignore
+        for instrument in credits.get("instruments", []):  # type: ignore
+            if isinstance(instrument, dict):
+                _collect_strings(instrument.get("name"), strings)  # type: ignore
+
+    # Scraped ModArchive comments
+    for comment in custom_metadata.get("comments", []):
+        if isinstance(comment, dict):
+            _collect_strings(comment.get("meta"), strings)  # type: ignore
+            _collect_strings(comment.get("content"), strings)  # type: ignore
+
+    return "\n".join(strings)
+
+
+def get_search_columns(song: Song) -> tuple[str, str, str, str]:
+    return (
+        song.title or "",
+        song.artist or "",
+        get_file_name(song.file_path),
+        get_searchable_metadata(song.custom_metadata),
+    )
+
+
+def build_match_expression(query: str) -> str:
+    # Every word has to match, each one as a prefix; quoting keeps FTS5 syntax
+    # characters in user input from being interpreted
+    tokens = re.findall(r"\w+", query)
+    return " ".join(f'"{token}"*' for token in tokens)
@@ -0,0 +1,36 @@
+import threading
+
+from loguru import logger
+from PySide6.QtCore import QObject, Signal
+
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+
+class RemoveMissingFilesWorker(QObject):
+    # finished carries the removed song ids; a cancelled sweep removes
+    # nothing and only emits cancelled
+    finished = Signal(list)
+    progress = Signal(int, int)
+    cancelled = Signal()
+
+    def __init__(self, song_library: SongLibrary, max_workers: int = 8) -> None:
+        super().__init__()
+        self.song_library = song_library
+        self.max_workers = max_workers
+        self.cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        # Called from the UI thread while run() is busy, so no queued slot
+        self.cancel_event.set()
+
+    def run(self) -> None:
+        missing_ids = self.song_library.remove_missing_files(
+            self.max_workers, self.progress.emit, self.cancel_event
+        )
+
+        if self.cancel_event.is_set():
+            logger.info("Missing file sweep cancelled")
+            self.cancelled.emit()
+            return
+
+        self.finished.emit(missing_ids)
@@ -37,7 +37,7 @@ class ScanEntriesWorker(QObject):
             self.scraper.scrape_by_song(song)
             self.scraper.apply_scraped_data_to_song(song)
             self.scraper.reset()
-            self.song_library.update_song(song)
+            self.song_library.update_song(song).result()
             self.entry_updated.emit(entry, i + 1, total)
 
             threading.Event().wait(0.5)
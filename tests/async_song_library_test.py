@@ -0,0 +1,124 @@
+import os
+import tempfile
+import threading
+import time
+import typing
+from concurrent.futures import Future
+
+import pytest
+from PySide6.QtCore import QCoreApplication
+
+from PyRetroPlayer.playlist.async_song_library import AsyncSongLibrary
+from PyRetroPlayer.playlist.song import Song
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+
+@pytest.fixture
+def app() -> QCoreApplication:
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def song_library() -> typing.Generator[SongLibrary, None, None]:
+    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tf:
+        db_path = tf.name
+    lib = SongLibrary(db_path)
+    try:
+        yield lib
+    finally:
+        lib.close()
+        os.remove(db_path)
+
+
+def wait_for(app: QCoreApplication, condition: typing.Callable[[], bool]) -> None:
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    assert condition()
+
+
+def test_requests_in_one_tick_are_coalesced(
+    app: QCoreApplication, song_library: SongLibrary
+) -> None:
+    songs = [Song(file_path=f"song_{i}.mod", md5=str(i), sha1=str(i)) for i in range(3)]
+    song_library.add_songs(songs)
+
+    calls: typing.List[typing.List[str]] = []
+    get_songs = song_library.get_songs
+
+    def counting_get_songs(song_ids: typing.List[str]) -> typing.List[Song]:
+        calls.append(song_ids)
+        return get_songs(song_ids)
+
+    song_library.get_songs = counting_get_songs  # type: ignore
+    async_library = AsyncSongLibrary(song_library)
+    ready: typing.List[typing.Tuple[typing.List[Song], typing.List[str]]] = []
+    async_library.songs_ready.connect(
+        lambda found, missing: ready.append((found, missing))
+    )
+
+    futures: typing.List[Future[typing.Optional[Song]]] = [
+        async_library.get_song(song.id) for song in songs
+    ]
+    futures.append(async_library.get_song("missing"))
+    async_library.request_songs([songs[0].id])
+
+    wait_for(app, lambda: all(future.done() for future in futures))
+    assert len(calls) == 1
+    assert [future.result().id for future in futures[:3]] == [s.id for s in songs]  # type: ignore
+    assert futures[3].result() is None
+    assert ready[0][1] == ["missing"]
+    async_library.close()
+
+
+def test_request_song_with_details(
+    app: QCoreApplication, song_library: SongLibrary
+) -> None:
+    song = Song(file_path="song.mod", custom_metadata={"message": "hello"})
+    song_library.add_song(song)
+    async_library = AsyncSongLibrary(song_library)
+
+    loaded: typing.List[Song] = []
+    async_library.request_song(song.id, loaded.append, with_details=True)
+    wait_for(app, lambda: bool(loaded))
+    assert loaded[0]._metadata_loader is None
+    assert loaded[0].get_metadata("message") == "hello"
+    async_library.close()
+
+
+def test_overlapping_requests_get_their_own_results(
+    app: QCoreApplication, song_library: SongLibrary
+) -> None:
+    song = Song(
+        file_path="song.mod", md5="1", sha1="1", custom_metadata={"message": ["hi"]}
+    )
+    song_library.add_song(song)
+
+    release = threading.Event()
+    calls: typing.List[typing.List[str]] = []
+    get_songs = song_library.get_songs
+
+    def blocking_get_songs(song_ids: typing.List[str]) -> typing.List[Song]:
+        calls.append(song_ids)
+        if len(calls) == 1:
+            release.wait(5)
+        return get_songs(song_ids)
+
+    song_library.get_songs = blocking_get_songs  # type: ignore
+    async_library = AsyncSongLibrary(song_library)
+
+    first = async_library.get_song(song.id)
+    wait_for(app, lambda: len(calls) == 1)
+    second = async_library.get_song(song.id, with_details=True)
+    app.processEvents()
+    release.set()
+
+    wait_for(app, lambda: first.done() and second.done())
+    assert len(calls) == 2
+    first_song, second_song = first.result(), second.result()
+    assert first_song is not None and second_song is not None
+    assert first_song._metadata_loader is not None
+    # Loaded with its details on the reader thread, not on first access
+    assert second_song._metadata_loader is None
+    async_library.close()
@@ -0,0 +1,95 @@
+import json
+import typing
+
+import pytest
+from PySide6.QtCore import QCoreApplication, QModelIndex
+
+from PyRetroPlayer.playlist import library_browser_model
+from PyRetroPlayer.playlist.library_browser_model import LibraryBrowserModel
+from PyRetroPlayer.playlist.song import Song
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+
+@pytest.fixture
+def app() -> QCoreApplication:
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def song_library(tmp_path: typing.Any) -> typing.Generator[SongLibrary, None, None]:
+    library = SongLibrary(str(tmp_path / "library.db"))
+    library.add_songs(
+        Song(
+            file_path=f"/mods/{'ahx' if i % 3 else 'mod'}/song{i}.mod",
+            title=f"Song {i}",
+            artist=f"Artist {i % 5}" if i % 7 else "",
+            custom_metadata={"type": "AHX" if i % 3 else "MOD"},
+        )
+        for i in range(100)
+    )
+    try:
+        yield library
+    finally:
+        library.close()
+
+
+def test_groups_and_songs_are_loaded_by_page(
+    app: QCoreApplication,
+    song_library: SongLibrary,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(library_browser_model, "GROUP_PAGE_SIZE", 2)
+    monkeypatch.setattr(library_browser_model, "SONG_PAGE_SIZE", 10)
+    model = LibraryBrowserModel(song_library, "artist")
+    root = QModelIndex()
+    assert model.rowCount() == 0 and model.canFetchMore(root)
+
+    while model.canFetchMore(root):
+        model.fetchMore(root)
+    labels = [model.data(model.index(row, 0)) for row in range(model.rowCount())]
+    assert labels == ["Unknown (15)"] + [f"Artist {i} (17)" for i in range(5)]
+
+    group = model.index(1, 0)
+    assert model.hasChildren(group) and model.rowCount(group) == 0
+    model.fetchMore(group)
+    assert model.rowCount(group) == 10 and model.canFetchMore(group)
+    while model.canFetchMore(group):
+        model.fetchMore(group)
+    assert model.rowCount(group) == 17
+    song = model.index(16, 0, group)
+    assert model.parent(song) == group
+    assert model.data(song) == "Song 95"
+
+    model.set_column("folder")
+    while model.canFetchMore(root):
+        model.fetchMore(root)
+    assert [model.data(model.index(row, 0)) for row in range(2)] == [
+        "/mods/ahx/ (66)",
+        "/mods/mod/ (34)",
+    ]
+
+
+def test_dragged_groups_resolve_to_songs(
+    app: QCoreApplication, song_library: SongLibrary
+) -> None:
+    model = LibraryBrowserModel(song_library, "format")
+    model.fetchMore(QModelIndex())
+    mod_group = model.index(1, 0)
+    model.fetchMore(model.index(0, 0))
+    model.fetchMore(mod_group)
+
+    indexes = [
+        mod_group,
+        model.index(0, 0, mod_group),
+        model.index(0, 0, model.index(0, 0)),
+    ]
+    payload = model.mime_payload(indexes)
+    ahx_song_id = model.groups[0].songs[0][1]
+    assert json.loads(payload) == {
+        "column": "format",
+        "groups": ["MOD"],
+        "songs": [ahx_song_id],
+    }
+    song_ids = model.song_ids_of(payload)
+    assert len(song_ids) == 35 and song_ids[-1] == ahx_song_id
+    assert model.mimeData(indexes).hasFormat(library_browser_model.LIBRARY_MIME_TYPE)
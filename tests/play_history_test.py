@@ -0,0 +1,101 @@
+import typing
+
+import pytest
+
+from PyRetroPlayer.playing.play_history import PlayHistory
+from PyRetroPlayer.playing.queue_manager import QueueManager
+from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+
+@pytest.fixture
+def song_library(tmp_path: typing.Any) -> typing.Generator[SongLibrary, None, None]:
+    library = SongLibrary(str(tmp_path / "library.db"))
+    try:
+        yield library
+    finally:
+        library.close()
+
+
+def test_history_is_bounded_and_persisted(song_library: SongLibrary) -> None:
+    history = PlayHistory(song_library, max_length=3, batch_size=4)
+    entries = [PlaylistEntry(f"song-{i}") for i in range(10)]
+    for entry in entries:
+        history.add(entry)
+    assert [item.entry for item in history.items] == entries[-3:]
+    # Written in batches, the rest on flush
+    assert len(history.pending) == 2
+    history.flush()
+    song_library.flush()
+
+    reloaded = PlayHistory(song_library, max_length=5)
+    reloaded.load()
+    assert [item.entry.song_id for item in reloaded.items] == [
+        f"song-{i}" for i in range(5, 10)
+    ]
+    assert reloaded.items[-1].entry.entry_key == entries[-1].entry_key
+
+    first = history.page(limit=4)
+    second = history.page(first[-1].id, limit=4)
+    third = history.page(second[-1].id, limit=4)
+    assert [row.song_id for row in first + second + third] == [
+        f"song-{i}" for i in reversed(range(10))
+    ]
+
+
+def test_previous_replays_history(song_library: SongLibrary) -> None:
+    queue_manager = QueueManager(PlayHistory(song_library))
+    entries = [PlaylistEntry(f"song-{i}") for i in range(4)]
+    queue_manager.add_entries(entries)
+
+    assert queue_manager.pop_next_entry() is entries[0]
+    assert queue_manager.pop_next_entry() is entries[1]
+    assert queue_manager.pop_next_entry() is entries[2]
+    assert queue_manager.previous_entry() is entries[1]
+    assert queue_manager.pop_next_entry() is entries[1]
+    assert queue_manager.previous_entry() is entries[0]
+    assert queue_manager.pop_next_entry() is entries[0]
+    assert queue_manager.previous_entry() is None
+
+    # Going on plays forward through the history, then the queue
+    assert queue_manager.pop_next_entry() is entries[1]
+    assert queue_manager.pop_next_entry() is entries[2]
+    assert queue_manager.pop_next_entry() is entries[3]
+    assert len(queue_manager.history) == 4
+
+    queue_manager.previous_entry()
+    queue_manager.clear()
+    assert queue_manager.pop_next_entry() is None
+
+
+def test_play_counts_are_kept_in_memory(song_library: SongLibrary) -> None:
+    history = PlayHistory(song_library, batch_size=2)
+    for song_id in ["a", "b", "a"]:
+        history.add(PlaylistEntry(song_id))
+    # One play is still pending, the counts include it anyway
+    assert len(history.pending) == 1
+    assert history.play_counts() == {"a": 2, "b": 1}
+    history.flush()
+    song_library.flush()
+
+    reloaded = PlayHistory(song_library)
+    reloaded.add(PlaylistEntry("b"))
+    reloaded.load()
+    assert reloaded.play_counts() == {"a": 2, "b": 2}
+    reloaded.add(PlaylistEntry("c"))
+    assert reloaded.play_counts() == {"a": 2, "b": 2, "c": 1}
+
+
+def test_drop_auto_entries_keeps_entries_queued_by_hand() -> None:
+    queue_manager = QueueManager(PlayHistory())
+    hand = [PlaylistEntry("hand-0"), PlaylistEntry("hand-1")]
+    auto = [PlaylistEntry(f"auto-{i}") for i in range(3)]
+    queue_manager.add_entry(hand[0])
+    queue_manager.add_entries(auto, auto=True)
+    queue_manager.add_entries([hand[1]])
+    queue_manager.prioritize_entry(auto[2])
+
+    queue_manager.drop_auto_entries()
+    assert queue_manager.get_queue() == [auto[2], hand[0], hand[1]]
+    queue_manager.drop_auto_entries()
+    assert queue_manager.get_queue() == [auto[2], hand[0], hand[1]]
@@ -0,0 +1,67 @@
+from PyRetroPlayer.playlist.playlist_entry import compact_id
+from PyRetroPlayer.playlist.playlist_filter import PlaylistFilter
+from PyRetroPlayer.playlist.song import Song
+
+
+def make_songs():
+    return [
+        Song(
+            title="Space Debris",
+            artist="Captain",
+            file_path="/mods/space_debris.mod",
+            custom_metadata={"type": "MOD"},
+        ),
+        Song(
+            title="Stardust Memories",
+            artist="Jester",
+            file_path="/mods/stardust.mod",
+            custom_metadata={"type": "MOD"},
+        ),
+        Song(
+            title="Hybrid Song",
+            artist="Jester",
+            file_path="/ahx/hybrid.ahx",
+            custom_metadata={"type": "AHX"},
+        ),
+    ]
+
+
+def keys(*songs: Song):
+    return {compact_id(song.id) for song in songs}
+
+
+def items(*songs: Song):
+    return [(compact_id(song.id), song) for song in songs]
+
+
+def test_terms_match_word_prefixes() -> None:
+    songs = make_songs()
+    search_filter = PlaylistFilter()
+    search_filter.add_songs(items(*songs))
+
+    assert search_filter.search("") is None
+    assert search_filter.search("jes") == keys(songs[1], songs[2])
+    assert search_filter.search("jester ahx") == keys(songs[2])
+    assert search_filter.search("deb") == keys(songs[0])
+    assert search_filter.search("ebris") == set()
+    assert search_filter.search("MOD st") == keys(songs[1])
+
+
+def test_typing_refines_previous_matches() -> None:
+    songs = make_songs()
+    search_filter = PlaylistFilter()
+    search_filter.add_songs(items(*songs))
+
+    assert search_filter.search("s") == keys(*songs)
+    assert search_filter.search("st") == keys(songs[1])
+    assert search_filter.search("s") == keys(*songs)
+
+    # Songs read later or read again are matched against the current query
+    assert search_filter.search("st") == keys(songs[1])
+    late = Song(title="Stardust 2", artist="Jester")
+    assert search_filter.add_songs(items(late))
+    songs[0].title = "Starfield"
+    assert search_filter.add_songs(items(songs[0]))
+    assert search_filter.matches == keys(songs[0], songs[1], late)
+    assert not search_filter.add_songs(items(songs[1]))
+    assert search_filter.search("sta") == keys(songs[0], songs[1], late)
@@ -1,5 +1,6 @@
 import json
 import os
+import sys
 import uuid
 from pathlib import Path
 from typing import List
@@ -7,6 +8,8 @@ from typing import List
 import pytest
 
 from PyRetroPlayer.playlist.playlist import Playlist
+from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry
+from PyRetroPlayer.playlist.song import Song
 
 
 class DummySong:
@@ -110,3 +113,71 @@ def test_load_playlist_missing_file(tmp_path: Path) -> None:
     file_path = tmp_path / "missing.json"
     loaded = Playlist.load_playlist(str(file_path))
     assert loaded is None
+
+
+def test_playlist_entry_round_trip() -> None:
+    song_id = str(uuid.uuid4())
+    entry = PlaylistEntry(song_id)
+    assert isinstance(entry.entry_key, int)
+    assert PlaylistEntry.from_dict(entry.to_dict()).to_dict() == entry.to_dict()
+    assert entry.song_id == song_id
+
+    # Ids that are not canonical uuids are kept verbatim
+    for entry_id in ["custom", str(uuid.uuid4()).upper()]:
+        data = {"song_id": "", "entry_id": entry_id}
+        assert PlaylistEntry.from_dict(data).to_dict() == data
+
+
+def test_slotted_song() -> None:
+    # Built at runtime, so not interned by the compiler
+    backend = "".join(["Lib", "UADE"])
+    song = Song(available_backends=[backend])
+    assert not hasattr(song, "__dict__")
+    assert song.available_backends[0] is sys.intern("LibUADE")
+    assert json.loads(song.to_json())["available_backends"] == ["LibUADE"]
+
+
+def test_entry_row_index(playlist: Playlist, song_ids: List[str]) -> None:
+    entries = [playlist.add_song(song_id) for song_id in song_ids * 2]
+    assert [playlist.row_of(entry) for entry in entries] == list(range(6))
+
+    playlist.current_song_index = 4
+    removed = playlist.remove_rows([1, 3])
+    assert removed == [entries[1], entries[3]]
+    assert playlist.row_of(entries[1]) is None
+    assert playlist.row_of(entries[4]) == 2
+    assert playlist.current_song_index == 2
+
+    playlist.set_song_order([3, 2, 1, 0])
+    assert [playlist.row_of(entry) for entry in entries if entry not in removed] == [
+        3,
+        2,
+        1,
+        0,
+    ]
+
+    playlist.set_currently_playing_entry(entries[5])
+    assert playlist.current_song_index == 0
+
+    playlist.remove_song(song_ids[2])
+    assert playlist.row_of(entries[5]) is None
+    assert playlist.row_of(entries[0]) == 2
+
+
+def test_batched_add_and_remove(playlist: Playlist, song_ids: List[str]) -> None:
+    added: List[List[PlaylistEntry]] = []
+    removed: List[List[int]] = []
+    changed: List[List[PlaylistEntry]] = []
+    playlist.songs_added = added.append
+    playlist.songs_removed = removed.append
+    playlist.entries_changed = changed.append
+
+    entries = playlist.add_songs(song_ids * 3)
+    assert added == [entries]
+    assert changed == [entries]
+    positions = [entry.position for entry in entries]
+    assert positions == sorted(positions)
+
+    playlist.remove_entries([entries[7], entries[1], entries[2]])
+    assert removed == [[1, 2, 7]]
+    assert [playlist.row_of(entry) for entry in entries[3:7]] == [1, 2, 3, 4]
@@ -0,0 +1,107 @@
+import typing
+
+from PyRetroPlayer.playlist.playlist import Playlist
+from PyRetroPlayer.playlist.playlist_entry import CompactId, PlaylistEntry
+from PyRetroPlayer.playlist.playlist_stats import PlaylistStats, SongSummary
+
+SUMMARIES = {
+    "a": SongSummary(100, "MOD", ("libopenmpt",), True),
+    "b": SongSummary(200, "AHX", ("libuade",), True),
+    "c": SongSummary(0, "", (), False),
+}
+
+
+def lookup(
+    song_keys: typing.List[CompactId], looked_up: typing.List[CompactId]
+) -> typing.Dict[CompactId, SongSummary]:
+    looked_up.extend(song_keys)
+    return {key: SUMMARIES[key] for key in song_keys if key in SUMMARIES}
+
+
+def test_stats_follow_added_and_removed_entries() -> None:
+    looked_up: typing.List[CompactId] = []
+    playlist = Playlist(name="Stats")
+    changes: typing.List[int] = []
+    playlist.stats.changed = lambda: changes.append(1)
+
+    playlist.add_songs(["a", "b", "a", "c", "missing"])
+    stats = playlist.stats
+    assert stats.entry_count == 5
+    assert stats.needs_update()
+    stats.update(playlist.entries, lambda keys: lookup(keys, looked_up))
+    assert sorted(looked_up) == ["a", "b", "c", "missing"]
+    assert stats.total_duration == 400
+    assert stats.format_counts == {"MOD": 2, "AHX": 1}
+    assert stats.backend_counts == {"libopenmpt": 2, "libuade": 1}
+    assert stats.unscanned_count == 1
+    assert stats.unplayable_count == 2
+
+    # Removals are applied without looking anything up
+    looked_up.clear()
+    playlist.remove_entries([playlist.entries[0], playlist.entries[3]])
+    assert not stats.needs_update()
+    assert stats.entry_count == 3
+    assert stats.total_duration == 300
+    assert stats.format_counts == {"MOD": 1, "AHX": 1}
+    assert stats.unscanned_count == 0
+    assert stats.unplayable_count == 1
+
+    # Only the added song is looked up
+    playlist.add_songs(["b"])
+    stats.update(playlist.entries, lambda keys: lookup(keys, looked_up))
+    assert looked_up == ["b"]
+    assert stats.total_duration == 500
+    assert stats.backend_counts == {"libopenmpt": 1, "libuade": 2}
+    assert len(changes) == 3
+
+
+def test_changed_song_is_looked_up_again() -> None:
+    looked_up: typing.List[CompactId] = []
+    stats = PlaylistStats()
+    entries = [PlaylistEntry("a"), PlaylistEntry("c"), PlaylistEntry("c")]
+    stats.entries_added(entries)
+    stats.update(entries, lambda keys: lookup(keys, looked_up))
+    assert stats.unscanned_count == 2
+
+    stats.song_changed("b")
+    assert not stats.needs_update()
+    stats.song_changed("c")
+    looked_up.clear()
+    scanned = {
+        "a": SUMMARIES["a"],
+        "c": SongSummary(50, "SID", ("libsidplayfp",), True),
+    }
+    stats.update(entries, lambda keys: {key: scanned[key] for key in keys})
+    assert stats.total_duration == 200
+    assert stats.format_counts == {"MOD": 1, "SID": 2}
+    assert stats.unscanned_count == 0
+    assert stats.unplayable_count == 0
+
+
+def test_loaded_stats_are_rebuilt_when_stale() -> None:
+    looked_up: typing.List[CompactId] = []
+    entries = [PlaylistEntry("a"), PlaylistEntry("b")]
+    stats = PlaylistStats.from_dict(
+        {"entry_count": 2, "total_duration": 300, "formats": {"MOD": 1, "AHX": 1}}
+    )
+    assert not stats.needs_update()
+    assert PlaylistStats.from_dict(stats.to_dict()).to_dict() == stats.to_dict()
+
+    # What a removed entry added to loaded totals is not known
+    stats.entries_removed(entries[:1])
+    assert stats.needs_update()
+    stats.update(entries[1:], lambda keys: lookup(keys, looked_up))
+    assert looked_up == ["b"]
+    assert stats.entry_count == 1
+    assert stats.total_duration == 200
+    assert stats.format_counts == {"AHX": 1}
+
+    # After that one rebuild, changes are applied by deltas again
+    looked_up.clear()
+    stats.entries_removed(entries[1:])
+    assert not stats.needs_update()
+    assert stats.total_duration == 0 and looked_up == []
+
+    loaded = PlaylistStats.from_dict({"entry_count": 1, "total_duration": 100})
+    loaded.song_changed("a")
+    assert loaded.stale
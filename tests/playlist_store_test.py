@@ -0,0 +1,321 @@
+import json
+import os
+import typing
+import uuid
+
+import pytest
+
+from PyRetroPlayer.playlist.playlist import Playlist
+from PyRetroPlayer.playlist.playlist_entry import PlaylistEntry
+from PyRetroPlayer.playlist.playlist_manager import PlaylistManager
+from PyRetroPlayer.playlist.playlist_positions import reassign_positions
+from PyRetroPlayer.playlist.smart_playlist import SmartQuery
+from PyRetroPlayer.playlist.song import Song
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+
+@pytest.fixture
+def song_library(tmp_path: typing.Any) -> typing.Generator[SongLibrary, None, None]:
+    library = SongLibrary(str(tmp_path / "library.db"))
+    try:
+        yield library
+    finally:
+        library.close()
+
+
+def make_manager(song_library: SongLibrary, tmp_path: typing.Any) -> PlaylistManager:
+    return PlaylistManager("test", song_library, str(tmp_path / "playlist"))
+
+
+def test_reassign_positions() -> None:
+    assert reassign_positions([1.0, 2.0, 3.0]) == {}
+    # Moving the last entry to the front only touches that entry
+    assert reassign_positions([4.0, 1.0, 2.0, 3.0]) == {0: 0.0}
+    assert reassign_positions([1.0, 3.0, 2.0, 4.0]) == {1: 1.5}
+    # No room left between neighbours
+    assert reassign_positions([1.0, 1.5, 1.0 + 1e-12]) is None
+
+
+def test_store_round_trip(song_library: SongLibrary, tmp_path: typing.Any) -> None:
+    manager = make_manager(song_library, tmp_path)
+    song_ids = [str(uuid.uuid4()) for _ in range(5)]
+
+    first = Playlist(name="First")
+    second = Playlist(name="Second")
+    manager.add_playlist(first)
+    manager.add_playlist(second)
+    for song_id in song_ids:
+        first.add_song(song_id)
+    second.add_song(song_ids[0])
+
+    first.remove_songs([song_ids[1]])
+    first.set_song_order([3, 0, 1, 2])
+    manager.reorder_playlists(1, 0)
+    second.name = "Renamed"
+    manager.save_playlists()
+
+    reloaded = make_manager(song_library, tmp_path)
+    reloaded.load_playlists()
+    assert [p.name for p in reloaded.playlists] == ["Renamed", "First"]
+    assert reloaded.playlists[1].get_song_ids() == [
+        song_ids[4],
+        song_ids[0],
+        song_ids[2],
+        song_ids[3],
+    ]
+    assert reloaded.playlists[0].get_song_ids() == [song_ids[0]]
+
+    manager.delete_playlist(0)
+    song_library.flush()
+    reloaded.load_playlists()
+    assert [p.name for p in reloaded.playlists] == ["First"]
+
+
+def test_move_persists_only_changed_rows(
+    song_library: SongLibrary, tmp_path: typing.Any
+) -> None:
+    manager = make_manager(song_library, tmp_path)
+    playlist = Playlist(name="Moves")
+    manager.add_playlist(playlist)
+    for _ in range(100):
+        playlist.add_song(str(uuid.uuid4()))
+
+    saved: typing.List[int] = []
+    save_entries = manager.store.save_entries
+    playlist.entries_changed = lambda entries: (
+        saved.append(len(entries)),
+        save_entries(playlist.id, entries),
+    )
+
+    order = list(range(100))
+    order.insert(10, order.pop(90))
+    playlist.set_song_order(order)
+    assert saved == [1]
+
+
+def test_json_playlists_are_imported_once(
+    song_library: SongLibrary, tmp_path: typing.Any
+) -> None:
+    playlists_path = tmp_path / "playlist"
+    os.makedirs(playlists_path)
+    song_ids = [str(uuid.uuid4()) for _ in range(3)]
+    for index, name in [(2, "Two"), (10, "Ten"), (1, "One")]:
+        with open(playlists_path / f"{index}.json", "w") as f:
+            json.dump(
+                {
+                    "id": str(uuid.uuid4()),
+                    "name": name,
+                    "entries": [{"song_id": song_id} for song_id in song_ids],
+                },
+                f,
+            )
+    with open(playlists_path / "3.json", "w") as f:
+        f.write("not json")
+
+    manager = make_manager(song_library, tmp_path)
+    manager.load_playlists()
+    assert [p.name for p in manager.playlists] == ["One", "Two", "Ten"]
+    assert manager.playlists[0].get_song_ids() == song_ids
+    assert sorted(os.listdir(playlists_path)) == [
+        "1.json.bak",
+        "10.json.bak",
+        "2.json.bak",
+        "3.json.failed",
+    ]
+
+    manager.load_playlists()
+    assert len(manager.playlists) == 3
+
+
+def test_imported_playlist_is_a_copy(
+    song_library: SongLibrary, tmp_path: typing.Any
+) -> None:
+    manager = make_manager(song_library, tmp_path)
+    song_ids = [str(uuid.uuid4()) for _ in range(3)]
+    original = Playlist(name="Original")
+    manager.add_playlist(original)
+    original.add_songs(song_ids)
+    file_path = str(tmp_path / "export.json")
+    Playlist.save_playlist(original, file_path)
+
+    imported = Playlist.load_playlist(file_path, new_ids=True)
+    assert imported is not None
+    assert imported.id != original.id
+    assert not {entry.entry_id for entry in imported.entries} & {
+        entry.entry_id for entry in original.entries
+    }
+    manager.add_playlist(imported)
+    imported.remove_rows([0])
+    manager.delete_playlist(0)
+    manager.save_playlists()
+
+    reloaded = make_manager(song_library, tmp_path)
+    reloaded.load_playlists()
+    assert [p.get_song_ids() for p in reloaded.playlists] == [song_ids[1:]]
+
+
+def test_stats_are_stored_with_the_playlist(
+    song_library: SongLibrary, tmp_path: typing.Any
+) -> None:
+    song_ids = [
+        song_library.add_song(
+            Song(
+                file_path=f"/music/song{i}.mod",
+                duration=1000 * (i + 1),
+                available_backends=["libopenmpt"],
+                custom_metadata={"type": "MOD"},
+            )
+        )
+        for i in range(3)
+    ]
+    manager = make_manager(song_library, tmp_path)
+    playlist = Playlist(name="Stats")
+    manager.add_playlist(playlist)
+    playlist.add_songs(song_ids + [str(uuid.uuid4())])
+    manager.update_stats(playlist)
+    assert playlist.stats.total_duration == 6000
+    assert playlist.stats.format_counts == {"MOD": 3}
+    assert playlist.stats.unplayable_count == 1
+    manager.save_playlists()
+
+    reloaded = make_manager(song_library, tmp_path)
+    reloaded.load_playlists()
+    stats = reloaded.playlists[0].stats
+    assert not stats.needs_update()
+    assert stats.to_dict() == playlist.stats.to_dict()
+
+    # Changes not applied yet are applied before saving
+    playlist.remove_rows([0])
+    playlist.add_songs(song_ids[2:])
+    assert playlist.stats.needs_update()
+    manager.save_playlists()
+    reloaded.load_playlists()
+    stats = reloaded.playlists[0].stats
+    assert not stats.needs_update()
+    assert stats.total_duration == 8000
+
+    # Stale totals are not stored, they are rebuilt after loading
+    reloaded.playlists[0].stats.stale = True
+    reloaded.save_playlists()
+    reloaded.load_playlists()
+    assert reloaded.playlists[0].stats.stale
+
+
+def test_song_changes_reach_every_playlist(
+    song_library: SongLibrary, tmp_path: typing.Any
+) -> None:
+    manager = make_manager(song_library, tmp_path)
+    song_ids = [str(uuid.uuid4()) for _ in range(3)]
+    first = Playlist(name="First", entries=[PlaylistEntry(song_ids[0])])
+    second = Playlist(name="Second")
+    manager.add_playlist(first)
+    manager.add_playlist(second)
+    first.add_songs(song_ids)
+    second.add_songs([song_ids[0], song_ids[2]])
+
+    affected = manager.songs_changed([song_ids[0]])
+    assert {
+        playlist_id: [entry.song_id for entry in entries]
+        for playlist_id, entries in affected.items()
+    } == {first.id: [song_ids[0]] * 2, second.id: [song_ids[0]]}
+
+    assert manager.remove_songs([song_ids[0], str(uuid.uuid4())]) == 3
+    assert first.get_song_ids() == song_ids[1:]
+    assert second.get_song_ids() == [song_ids[2]]
+    assert song_ids[0] not in manager.song_index
+
+    # Deleted playlists leave the index
+    manager.delete_playlist(1)
+    assert manager.songs_changed([song_ids[2]]).keys() == {first.id}
+    first.remove_rows([1])
+    assert manager.songs_changed([song_ids[2]]) == {}
+    assert len(manager.song_index) == 1
+
+
+def test_remove_song_uses_the_song_index(
+    song_library: SongLibrary, tmp_path: typing.Any
+) -> None:
+    manager = make_manager(song_library, tmp_path)
+    song_ids = [str(uuid.uuid4()) for _ in range(3)]
+    playlist = Playlist(name="Remove")
+    manager.add_playlist(playlist)
+    playlist.add_songs(song_ids + song_ids[:1])
+    removed: typing.List[typing.List[int]] = []
+    single: typing.List[PlaylistEntry] = []
+    playlist.songs_removed = removed.append
+    playlist.song_removed = single.append
+
+    # Only the first entry of the song goes, reported once
+    playlist.remove_song(song_ids[0])
+    assert removed == [[0]] and single == []
+    assert playlist.get_song_ids()[1:] == [song_ids[2], song_ids[0]]
+
+    playlist.songs_removed = None
+    playlist.remove_songs([song_ids[0], song_ids[2]])
+    assert [entry.song_id for entry in single] == [song_ids[2], song_ids[0]]
+    assert playlist.get_song_ids() == [song_ids[1]]
+
+
+def test_smart_playlist_follows_library_changes(
+    song_library: SongLibrary, tmp_path: typing.Any
+) -> None:
+    songs = [
+        Song(
+            file_path=f"/music/song{i}.ahx",
+            duration=60000 * i,
+            custom_metadata={"type": "AHX" if i % 2 else "MOD"},
+        )
+        for i in range(6)
+    ]
+    song_library.add_songs(songs)
+    manager = make_manager(song_library, tmp_path)
+    playlist = Playlist(name="Long AHX")
+    playlist.query = SmartQuery("format = AHX and duration >= 2m and added < 7d")
+    manager.add_playlist(playlist)
+    manager.refresh_smart_playlist(playlist)
+    assert playlist.get_song_ids() == [songs[3].id, songs[5].id]
+
+    looked_up: typing.List[typing.List[str]] = []
+    find_song_ids = song_library.find_song_ids
+    song_library.find_song_ids = lambda conditions=(), song_ids=None: (  # type: ignore
+        looked_up.append(song_ids),
+        find_song_ids(conditions, song_ids),
+    )[1]
+    songs[1].duration = 240000
+    song_library.update_song(songs[1])
+    songs[5].duration = 0
+    song_library.update_song(songs[5])
+    song_library.flush()
+    manager.refresh_smart_playlist(playlist)
+    assert playlist.get_song_ids() == [songs[3].id, songs[1].id]
+    # Only the changed songs are queried again
+    assert sorted(looked_up[-1]) == sorted([songs[1].id, songs[5].id])
+
+    song_library.remove_song(songs[3].id).result()
+    manager.refresh_smart_playlist(playlist)
+    assert playlist.get_song_ids() == [songs[1].id]
+    manager.save_playlists()
+
+    reloaded = make_manager(song_library, tmp_path)
+    reloaded.load_playlists()
+    smart = reloaded.playlists[0]
+    assert smart.query is not None and smart.query.seq == playlist.query.seq
+    reloaded.refresh_smart_playlist(smart)
+    assert smart.get_song_ids() == [songs[1].id]
+
+
+def test_smart_query_parsing() -> None:
+    query = SmartQuery("format = 'AHX' AND duration > 3m and rating_member >= 8")
+    assert query.conditions == [
+        ("format", "=", "AHX"),
+        ("duration", ">", 180000),
+        ("rating_member", ">=", 8),
+    ]
+    assert query.added_within is None
+    assert SmartQuery("added < 2").added_within == 2 * 24 * 60 * 60
+    assert SmartQuery("added <= 12h").where(100000.0) == [
+        ("added_at", ">=", 100000.0 - 12 * 60 * 60)
+    ]
+    for text in ("format", "custom_metadata = 1", "added > 7d", "duration > x"):
+        with pytest.raises(ValueError):
+            SmartQuery(text)
@@ -0,0 +1,207 @@
+import uuid
+
+import pytest
+from PySide6.QtCore import QCoreApplication, QModelIndex, QPersistentModelIndex, Qt
+
+from PyRetroPlayer.playlist.column_manager import ColumnManager
+from PyRetroPlayer.playlist.playlist import Playlist
+from PyRetroPlayer.playlist.playlist_sort import natural_key, value_key
+from PyRetroPlayer.playlist.playlist_table_model import (
+    PlayerState,
+    PlaylistTableModel,
+)
+from PyRetroPlayer.playlist.song import Song
+
+COLUMNS = [
+    {"id": "entry_id", "name": "Entry ID", "width": 50, "visible": False},
+    {"id": "title", "name": "Title", "width": 150, "visible": True},
+    {"id": "duration", "name": "Duration", "width": 100, "visible": True},
+    {"id": "artist", "name": "Artist", "width": 150, "visible": True},
+]
+
+
+@pytest.fixture
+def app() -> QCoreApplication:
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def make_model(count: int):
+    songs = [
+        Song(
+            id=str(uuid.uuid4()),
+            title=f"Song {i}",
+            artist="Artist",
+            duration=61000 * (i + 1),
+        )
+        for i in range(count)
+    ]
+    playlist = Playlist(name="Test")
+    for song in songs:
+        playlist.add_song(song.id)
+    # Copies, the column manager changes its definitions in place
+    columns = [dict(column) for column in COLUMNS]
+    model = PlaylistTableModel(playlist, ColumnManager(columns), columns)
+    return model, playlist, songs
+
+
+def column_values(model: PlaylistTableModel, column_id: str):
+    column = model.column_of(column_id)
+    return [model.data(model.index(row, column)) for row in range(model.rowCount())]
+
+
+def test_cells_are_formatted_from_loaded_songs(app: QCoreApplication) -> None:
+    model, _, songs = make_model(3)
+    assert model.rowCount() == 3
+    assert model.columns == ["title", "duration", "artist"]
+    assert model.headerData(0, Qt.Orientation.Horizontal) == "Title"
+    assert column_values(model, "title") == ["", "", ""]
+
+    model.set_songs(songs[:2], [0, 1])
+    assert column_values(model, "title") == ["Song 0", "Song 1", ""]
+    assert column_values(model, "duration") == ["1:01", "2:02", ""]
+
+
+def test_rows_follow_playlist_changes(app: QCoreApplication) -> None:
+    model, playlist, songs = make_model(3)
+    model.set_songs(songs, range(3))
+
+    playlist.add_song(songs[0].id)
+    model.rows_appended(1)
+    assert column_values(model, "title") == ["Song 0", "Song 1", "Song 2", "Song 0"]
+
+    rows = [
+        row
+        for row, entry in enumerate(playlist.entries)
+        if entry.song_id != songs[1].id
+    ]
+    playlist.remove_songs([songs[1].id])
+    model.rows_removed([row for row in range(4) if row not in rows])
+    assert column_values(model, "title") == ["Song 0", "Song 2", "Song 0"]
+
+
+def test_drop_reorders_playlist(app: QCoreApplication) -> None:
+    model, playlist, songs = make_model(5)
+    model.set_songs(songs, range(5))
+
+    mime_data = model.mimeData([model.index(0, 0), model.index(1, 1)])
+    assert model.dropMimeData(mime_data, Qt.DropAction.MoveAction, 4, 0, QModelIndex())
+    assert column_values(model, "title") == [
+        "Song 2",
+        "Song 3",
+        "Song 0",
+        "Song 1",
+        "Song 4",
+    ]
+    assert playlist.get_song_ids()[2] == songs[0].id
+
+
+def test_drop_moves_rows_without_reset(app: QCoreApplication) -> None:
+    model, playlist, songs = make_model(8)
+    model.set_songs(songs, range(8))
+    playlist.current_song_index = 5
+    tracked = QPersistentModelIndex(model.index(5, 0))
+    resets = []
+    model.modelReset.connect(lambda: resets.append(True))
+    changed = []
+    playlist.entries_changed = changed.extend
+
+    # Two runs above the drop row and one below it
+    rows = [1, 2, 4, 7]
+    mime_data = model.mimeData([model.index(row, 0) for row in rows])
+    assert model.dropMimeData(mime_data, Qt.DropAction.MoveAction, 6, 0, QModelIndex())
+    assert column_values(model, "title") == [
+        f"Song {i}" for i in [0, 3, 5, 1, 2, 4, 7, 6]
+    ]
+    assert not resets
+    assert tracked.row() == 2
+    assert playlist.current_song_index == 2
+    assert len(changed) == 4
+    positions = [entry.position for entry in playlist.entries]
+    assert positions == sorted(positions)
+
+
+def test_toggling_a_column(app: QCoreApplication) -> None:
+    model, _, _ = make_model(1)
+    model.column_manager.set_column_visibility("entry_id", True)
+    model.update_columns()
+    assert model.columns == ["entry_id", "title", "duration", "artist"]
+    model.column_manager.set_column_visibility("title", False)
+    model.update_columns()
+    assert model.columns == ["entry_id", "duration", "artist"]
+
+
+def test_sort_by_column(app: QCoreApplication) -> None:
+    model, playlist, songs = make_model(4)
+    for song, title, path in zip(
+        songs,
+        ["b", "B", "a", "C"],
+        ["/m/song10.mod", "/m/Song2.mod", "/m/song1.mod", "/m/song9.mod"],
+    ):
+        song.title = title
+        song.file_path = path
+    songs[0].duration = 603000
+    model.set_songs(songs, range(4))
+    playlist.current_song_index = 0
+    tracked = QPersistentModelIndex(model.index(1, 0))
+
+    model.sort(model.column_of("duration"), Qt.SortOrder.DescendingOrder)
+    assert column_values(model, "duration") == ["10:03", "4:04", "3:03", "2:02"]
+    assert playlist.current_song_index == 0
+    assert tracked.row() == 3
+
+    # Stable and case insensitive
+    model.sort(model.column_of("title"))
+    assert column_values(model, "title") == ["a", "b", "B", "C"]
+    assert playlist.current_song_index == 1
+
+    # A reloaded song replaces its cached key
+    renamed = Song(id=songs[3].id, title="0")
+    model.set_songs([renamed], [3])
+    model.sort(model.column_of("title"))
+    assert column_values(model, "title") == ["0", "a", "b", "B"]
+
+
+def test_natural_sort_keys() -> None:
+    paths = ["/m/song10.mod", "/m/Song2.mod", "/m/song1.mod", "/m/song9.mod"]
+    assert sorted(paths, key=natural_key) == [
+        "/m/song1.mod",
+        "/m/Song2.mod",
+        "/m/song9.mod",
+        "/m/song10.mod",
+    ]
+    assert value_key(3) < value_key("2") < value_key("10")
+
+
+def test_filter_maps_rows(app: QCoreApplication) -> None:
+    model, playlist, songs = make_model(6)
+    model.set_songs(songs, range(6))
+    model.set_playing(playlist.entries[4].entry_key, PlayerState.PLAYING)
+
+    model.set_filter({playlist.entries[row].song_key for row in (1, 3, 4)})
+    assert column_values(model, "title") == ["Song 1", "Song 3", "Song 4"]
+    assert model.playlist_row(2) == 4
+    assert model.view_row(4) == 2
+    assert model.view_row(0) is None
+    assert model.playing_row() == 2
+    assert not model.flags(model.index(0, 0)) & Qt.ItemFlag.ItemIsDragEnabled
+
+    model.set_filter({playlist.entries[row].song_key for row in (3, 4)}, refine=True)
+    assert column_values(model, "title") == ["Song 3", "Song 4"]
+
+    playlist.remove_rows([0, 3])
+    model.rows_removed([0, 3])
+    assert column_values(model, "title") == ["Song 4"]
+    assert model.view_row(2) == 0
+
+    playlist.add_song(songs[3].id)
+    model.rows_appended(1)
+    assert column_values(model, "title") == ["Song 4", "Song 3"]
+
+    model.set_filter(None)
+    assert column_values(model, "title") == [
+        "Song 1",
+        "Song 2",
+        "Song 4",
+        "Song 5",
+        "Song 3",
+    ]
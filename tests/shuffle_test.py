@@ -0,0 +1,133 @@
+import random
+import typing
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from PyRetroPlayer.playing.rating_cache import RatingCache
+from PyRetroPlayer.playing.shuffle import (
+    LazyShuffle,
+    WeightedShuffle,
+    build_alias_table,
+)
+from PyRetroPlayer.playlist.playlist import Playlist
+from PyRetroPlayer.playlist.song import Song
+from PyRetroPlayer.playlist.song_library import SongLibrary
+
+
+def make_playlist(count: int) -> Playlist:
+    playlist = Playlist(name="Shuffle")
+    playlist.add_songs(f"song-{i}" for i in range(count))
+    return playlist
+
+
+def test_lazy_shuffle_plays_every_entry_once() -> None:
+    playlist = make_playlist(1000)
+    shuffle = LazyShuffle(playlist, random.Random(1))
+
+    picked = shuffle.next_entries(2000)
+    assert len(picked) == 1000
+    assert set(entry.entry_key for entry in picked) == set(
+        entry.entry_key for entry in playlist.entries
+    )
+    assert [entry.song_id for entry in picked] != playlist.get_song_ids()
+    # The round is over, the next one starts from scratch
+    assert shuffle.swaps == {} and shuffle.played == set()
+    assert len(shuffle.next_entries(1000)) == 1000
+
+
+def test_lazy_shuffle_follows_playlist_edits() -> None:
+    playlist = make_playlist(100)
+    shuffle = LazyShuffle(playlist, random.Random(2))
+    picked = shuffle.next_entries(30)
+
+    removed = playlist.remove_rows(range(0, 100, 2))
+    added = playlist.add_songs(f"new-{i}" for i in range(20))
+    playlist.sort_entries([entry.song_id for entry in playlist.entries], True)
+    picked += shuffle.next_entries(1000)
+
+    keys = [entry.entry_key for entry in picked]
+    assert len(keys) == len(set(keys))
+    removed_keys = set(entry.entry_key for entry in removed)
+    assert set(keys) - removed_keys == set(
+        entry.entry_key for entry in playlist.entries
+    )
+    assert set(entry.entry_key for entry in added) <= set(keys)
+
+
+def test_alias_table_matches_weights() -> None:
+    weights = [1.0, 2.0, 3.0, 4.0]
+    prob, alias = build_alias_table(weights)
+    shares = [0.0] * len(weights)
+    for column, (keep, other) in enumerate(zip(prob, alias)):
+        shares[column] += keep / len(weights)
+        shares[other] += (1.0 - keep) / len(weights)
+    assert [round(share, 9) for share in shares] == [0.1, 0.2, 0.3, 0.4]
+
+
+def test_weighted_shuffle_prefers_high_scores() -> None:
+    playlist = make_playlist(200)
+    scores = {f"song-{i}": 10.0 for i in range(100)}
+    first_halves: Counter[bool] = Counter()
+    rng = random.Random(3)
+    for _ in range(20):
+        shuffle = WeightedShuffle(playlist, scores, rng)
+        picked = shuffle.next_entries(300)
+        assert len(set(entry.entry_key for entry in picked)) == 200
+        first_halves.update(entry.song_id in scores for entry in picked[:50])
+    assert first_halves[True] > 4 * first_halves[False]
+
+    shuffle = WeightedShuffle(playlist, scores, rng)
+    shuffle.mark_played(playlist.entries[0])
+    picked = shuffle.next_entries(10)
+    playlist.remove_rows([playlist.row_of(entry) for entry in picked[5:]])
+    picked += shuffle.next_entries(300)
+    assert playlist.entries[0] not in picked
+    assert len(picked) == 199
+
+
+def test_rating_cache_reads_in_the_background(tmp_path: typing.Any) -> None:
+    library = SongLibrary(str(tmp_path / "library.db"))
+    executor = ThreadPoolExecutor(max_workers=1)
+    rated = Song(
+        file_path="/mods/rated.mod", custom_metadata={"ratings": {"member": "8"}}
+    )
+    unrated = Song(file_path="/mods/unrated.mod")
+    library.add_songs([rated, unrated])
+    cache = RatingCache(library, executor)
+
+    def settle() -> typing.Dict[str, float]:
+        assert cache.future is not None
+        cache.future.result()
+        return cache.get()
+
+    try:
+        # Nothing is read yet, the first call does not wait for it
+        assert cache.get() == {}
+        assert settle() == {rated.id: 8.0}
+        first = cache.get()
+
+        # Only changed songs are read again; dicts handed out stay the same
+        rated.custom_metadata = {}
+        unrated.custom_metadata = {"ratings": {"member": "3"}}
+        library.update_song(rated).result()
+        library.update_song(unrated).result()
+        settle()
+        assert settle() == {unrated.id: 3.0}
+        assert first == {rated.id: 8.0}
+
+        library.remove_songs([unrated.id]).result()
+        settle()
+        assert settle() == {}
+    finally:
+        executor.shutdown()
+        library.close()
+
+
+def test_weighted_shuffle_takes_new_scores() -> None:
+    playlist = make_playlist(100)
+    shuffle = WeightedShuffle(playlist, {}, random.Random(3))
+    shuffle.next_entries(10)
+    shuffle.set_scores({"song-99": 1000.0})
+    assert shuffle.size == -1
+    picked = [entry.song_id for entry in shuffle.next_entries(90)]
+    assert len(picked) == 90 and "song-99" in picked
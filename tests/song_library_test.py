@@ -1,10 +1,14 @@
 import os
+import sqlite3
+import threading
 import tempfile
 import typing
 import uuid
 
 import pytest
 
+from PyRetroPlayer.playlist.missing_files import find_missing_songs
+from PyRetroPlayer.playlist.playlist import Playlist
 from PyRetroPlayer.playlist.song import Song
 from PyRetroPlayer.playlist.song_library import SongLibrary
 
@@ -59,6 +63,7 @@ def test_remove_song(temp_db: str, sample_song: Song) -> None:
     lib = SongLibrary(temp_db)
     lib.add_song(sample_song)
     lib.remove_song(sample_song.id)
+    lib.flush()
     assert lib.get_song_by_id(sample_song.id) is None
     lib.close()
 
@@ -117,6 +122,7 @@ def test_clear_library(temp_db: str, sample_song: Song) -> None:
     lib = SongLibrary(temp_db)
     lib.add_song(sample_song)
     lib.clear()
+    lib.flush()
     assert lib.get_all_songs() == []
     lib.close()
 
@@ -125,3 +131,466 @@ def test_context_manager(temp_db: str, sample_song: Song) -> None:
     with SongLibrary(temp_db) as lib:
         lib.add_song(sample_song)
         assert lib.get_song_by_id(sample_song.id) is not None
+
+
+class DummySettingsManager:
+    def __init__(self, settings: typing.Dict[str, typing.Any]) -> None:
+        self.settings = settings
+
+    def get(self, key: str, default: typing.Any = None) -> typing.Any:
+        return self.settings.get(key, default)
+
+
+def make_songs(count: int) -> typing.List[Song]:
+    return [
+        Song(
+            file_path=f"song_{i}.mod",
+            title=f"Song {i}",
+            md5=f"md5_{i}",
+            sha1=f"sha1_{i}",
+        )
+        for i in range(count)
+    ]
+
+
+def test_add_songs(temp_db: str) -> None:
+    lib = SongLibrary(temp_db)
+    songs = make_songs(5)
+    song_ids = lib.add_songs(songs, batch_size=2)
+    assert [song_ids[song] for song in songs] == [song.id for song in songs]
+    assert len(lib.get_all_songs()) == 5
+    lib.close()
+
+
+def test_add_songs_existing(temp_db: str, sample_song: Song) -> None:
+    lib = SongLibrary(temp_db)
+    lib.add_song(sample_song)
+    same_path = Song(file_path=sample_song.file_path)
+    same_hashes = Song(
+        file_path="elsewhere.mp3", md5=sample_song.md5, sha1=sample_song.sha1
+    )
+    song_ids = lib.add_songs([same_path, same_hashes])
+    assert song_ids[same_path] == sample_song.id
+    assert song_ids[same_hashes] == sample_song.id
+    assert len(lib.get_all_songs()) == 1
+    lib.close()
+
+
+def test_add_songs_dont_add_duplicates(temp_db: str, sample_song: Song) -> None:
+    lib = SongLibrary(temp_db, DummySettingsManager({"dont_add_duplicates": True}))
+    lib.add_song(sample_song)
+    new_song = make_songs(1)[0]
+    duplicate = Song(file_path=sample_song.file_path)
+    song_ids = lib.add_songs([new_song, duplicate])
+    assert song_ids[new_song] == new_song.id
+    assert song_ids[duplicate] == ""
+    lib.close()
+
+
+def test_separate_libraries_use_separate_connections(
+    temp_db: str, sample_song: Song, tmp_path: typing.Any
+) -> None:
+    lib = SongLibrary(temp_db)
+    other_lib = SongLibrary(str(tmp_path / "other.db"))
+    lib.add_song(sample_song)
+    assert other_lib.get_song_by_id(sample_song.id) is None
+    assert lib.get_connection() is not other_lib.get_connection()
+    other_lib.close()
+    lib.close()
+
+
+def test_wal_journal_mode(temp_db: str) -> None:
+    lib = SongLibrary(temp_db)
+    row = lib.get_connection().execute("PRAGMA journal_mode").fetchone()
+    assert row[0] == "wal"
+    lib.close()
+
+
+def test_flush_commits_queued_writes(temp_db: str, sample_song: Song) -> None:
+    lib = SongLibrary(temp_db, flush_interval=10.0)
+    lib.add_song(sample_song)
+    sample_song.title = "Updated"
+    lib.update_song(sample_song)
+    lib.flush()
+    fetched = lib.get_song_by_id(sample_song.id)
+    assert fetched is not None
+    assert fetched.title == "Updated"
+    lib.close()
+
+
+def test_song_cache(temp_db: str, sample_song: Song) -> None:
+    lib = SongLibrary(temp_db, song_cache_size=2)
+    songs = make_songs(3)
+    lib.add_songs(songs)
+
+    first = lib.get_song_by_id(songs[0].id)
+    assert first is not None
+    first.title = "Changed by the caller"
+    second = lib.get_song_by_id(songs[0].id)
+    # Served from the cache, but as a copy of its own
+    assert second is not None and second is not first
+    assert second.title == songs[0].title
+    assert lib.get_cache_stats()["hits"] == 1
+    assert lib.get_cache_stats()["misses"] == 1
+
+    lib.get_songs([song.id for song in songs])
+    stats = lib.get_cache_stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    lib.close()
+
+
+def test_song_cache_invalidation(temp_db: str, sample_song: Song) -> None:
+    lib = SongLibrary(temp_db, song_cache_size=10)
+    lib.add_song(sample_song)
+    cached = lib.get_song_by_id(sample_song.id)
+    assert cached is not None
+
+    updated = Song(id=sample_song.id, file_path=sample_song.file_path, title="New")
+    lib.update_song(updated)
+    lib.flush()
+    fetched = lib.get_song_by_id(sample_song.id)
+    assert fetched is not None
+    assert fetched.title == "New"
+
+    lib.remove_song(sample_song.id)
+    lib.flush()
+    assert lib.get_song_by_id(sample_song.id) is None
+    lib.close()
+
+
+def test_song_cache_skips_rows_read_before_a_write(
+    temp_db: str, sample_song: Song, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    lib = SongLibrary(temp_db, song_cache_size=10)
+    lib.add_song(sample_song)
+    lib.flush()
+
+    # The reader selects the old row, then waits until the update is committed
+    selected = threading.Event()
+    committed = threading.Event()
+    song_from_row = lib._song_from_row
+
+    def slow_song_from_row(row: sqlite3.Row, load_details: bool = True) -> Song:
+        song = song_from_row(row, load_details)
+        if threading.current_thread().name == "reader":
+            selected.set()
+            committed.wait(5)
+        return song
+
+    monkeypatch.setattr(lib, "_song_from_row", slow_song_from_row)
+    reader = threading.Thread(
+        target=lib.get_song_by_id, args=(sample_song.id,), name="reader"
+    )
+    reader.start()
+    assert selected.wait(5)
+    updated = Song(id=sample_song.id, file_path=sample_song.file_path, title="New")
+    lib.update_song(updated).result()
+    committed.set()
+    reader.join(5)
+
+    fetched = lib.get_song_by_id(sample_song.id)
+    assert fetched is not None and fetched.title == "New"
+    lib.close()
+
+
+def test_song_cache_disabled_by_default(temp_db: str, sample_song: Song) -> None:
+    lib = SongLibrary(temp_db)
+    lib.add_song(sample_song)
+    assert lib.get_song_by_id(sample_song.id) is not lib.get_song_by_id(sample_song.id)
+    assert lib.get_cache_stats() == {}
+    lib.close()
+
+
+def test_search(temp_db: str) -> None:
+    lib = SongLibrary(temp_db)
+    ahx_song = Song(
+        file_path="/mods/ahx/cool_tune.ahx",
+        title="Zone Runner",
+        artist="Pink",
+        custom_metadata={
+            "credits": {"instruments": [{"name": "hyperbass"}, {"name": "lead"}]},
+            "tracker": "AHX Tracker",
+        },
+    )
+    mod_song = Song(
+        file_path="/mods/mod/zonetrack.mod",
+        title="Other",
+        artist="Jester",
+        custom_metadata={"message": "greetings to everyone"},
+    )
+    lib.add_songs([ahx_song, mod_song])
+
+    assert [song.id for song in lib.search("hyper")] == [ahx_song.id]
+    assert [song.id for song in lib.search("greet")] == [mod_song.id]
+    assert [song.id for song in lib.search("cool_tune")] == [ahx_song.id]
+    # Title matches outrank file name matches
+    assert [song.id for song in lib.search("zone")] == [ahx_song.id, mod_song.id]
+    assert lib.search("") == []
+    assert lib.search('"unbalanced') == []
+    lib.close()
+
+
+def test_search_index_follows_updates(temp_db: str, sample_song: Song) -> None:
+    lib = SongLibrary(temp_db)
+    lib.add_song(sample_song)
+    assert lib.search("renamed") == []
+
+    sample_song.title = "Renamed"
+    lib.update_song(sample_song)
+    lib.flush()
+    assert len(lib.search("renamed")) == 1
+
+    lib.remove_song(sample_song.id)
+    lib.flush()
+    assert lib.search("renamed") == []
+    lib.close()
+
+
+def test_search_index_is_built_for_existing_library(
+    temp_db: str, sample_song: Song
+) -> None:
+    lib = SongLibrary(temp_db)
+    lib.add_song(sample_song)
+    conn = lib.get_connection()
+    conn.execute("DROP TABLE songs_fts")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    lib.close()
+
+    lib = SongLibrary(temp_db)
+    assert [song.id for song in lib.search("test")] == [sample_song.id]
+    lib.close()
+
+
+def test_migrate_legacy_library(temp_db: str) -> None:
+    conn = sqlite3.connect(temp_db)
+    conn.execute(
+        "CREATE TABLE songs (id TEXT PRIMARY KEY, file_path TEXT, title TEXT, artist TEXT, duration INTEGER, available_backends TEXT, md5 TEXT, sha1 TEXT, custom_metadata TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO songs VALUES ('legacy', 'old.ahx', 'Old', 'Someone', 100, '[]', 'a', 'b', ?)",
+        ('{"type": "AHX", "tracker": "AHX Tracker", "message": ["hello"]}',),
+    )
+    conn.commit()
+    conn.close()
+
+    lib = SongLibrary(temp_db)
+    conn = lib.get_connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 10
+    row = conn.execute("SELECT format, tracker, custom_metadata FROM songs").fetchone()
+    assert (row["format"], row["tracker"]) == ("AHX", "AHX Tracker")
+    assert "message" not in row["custom_metadata"]
+    assert [song.id for song in lib.search("hello")] == ["legacy"]
+
+    song = lib.get_song_by_id("legacy")
+    assert song is not None
+    assert song.get_metadata("message") == ["hello"]
+    lib.close()
+
+
+def test_failed_migration_is_rolled_back(
+    temp_db: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    conn = sqlite3.connect(temp_db)
+    conn.execute(
+        "CREATE TABLE songs (id TEXT PRIMARY KEY, file_path TEXT, title TEXT, artist TEXT, duration INTEGER, available_backends TEXT, md5 TEXT, sha1 TEXT, custom_metadata TEXT)"
+    )
+    for song_id in ["first", "second"]:
+        conn.execute(
+            "INSERT INTO songs VALUES (?, ?, 'Old', '', 100, '[]', ?, ?, ?)",
+            (song_id, f"{song_id}.ahx", song_id, song_id, '{"message": ["hello"]}'),
+        )
+    conn.commit()
+    conn.close()
+
+    written: typing.List[str] = []
+
+    def write_song_details(*args: typing.Any) -> None:
+        written.append(args[2])
+        if len(written) == 2:
+            raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(SongLibrary, "_write_song_details", write_song_details)
+    with pytest.raises(sqlite3.OperationalError):
+        SongLibrary(temp_db)
+
+    # Nothing of the interrupted migration was committed
+    conn = sqlite3.connect(temp_db)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 3
+    assert conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE name = 'song_details'"
+    ).fetchone() == (0,)
+    assert {row[0] for row in conn.execute("SELECT custom_metadata FROM songs")} == {
+        '{"message": ["hello"]}'
+    }
+    conn.close()
+
+
+def test_find_songs(temp_db: str) -> None:
+    lib = SongLibrary(temp_db)
+    songs = [
+        Song(
+            file_path=f"/mods/{i}.ahx",
+            artist="Pink" if i % 2 else "Jester",
+            duration=300 - i,
+            custom_metadata={"type": "AHX" if i < 4 else "MOD", "modarchive_id": i},
+        )
+        for i in range(6)
+    ]
+    lib.add_songs(songs)
+
+    found = lib.find_songs(
+        [("format", "=", "AHX"), ("artist", "=", "Pink")], order_by="duration"
+    )
+    assert [song.id for song in found] == [songs[3].id, songs[1].id]
+    assert len(lib.find_songs([("modarchive_id", "IN", [0, 5])])) == 2
+    assert len(lib.find_songs([("player", "=", None)], limit=2)) == 2
+
+    with pytest.raises(ValueError):
+        lib.find_songs([("custom_metadata", "=", "x")])
+    with pytest.raises(ValueError):
+        lib.find_songs(order_by="duration; DROP TABLE songs")
+
+    plan = lib.get_connection().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM songs WHERE format = ? AND artist = ? ORDER BY duration",
+        ("AHX", "Pink"),
+    )
+    assert "idx_songs_format_artist_duration" in " ".join(row[3] for row in plan)
+    lib.close()
+
+
+def test_library_changes_are_tracked(temp_db: str) -> None:
+    lib = SongLibrary(temp_db)
+    assert lib.last_change() == 0
+    songs = [Song(file_path=f"/mods/{i}.ahx", duration=i) for i in range(3)]
+    lib.add_songs(songs)
+    seq = lib.last_change()
+    assert lib.changes_since(0) == (seq, [song.id for song in songs])
+    assert lib.find_song_ids([("duration", ">", 0)]) == [songs[1].id, songs[2].id]
+    assert lib.find_song_ids([("added_at", "<=", 0)]) == []
+
+    songs[0].duration = 10
+    lib.update_song(songs[0])
+    lib.remove_song(songs[2].id)
+    lib.flush()
+    # Only the latest change of each song is kept
+    assert lib.changes_since(seq) == (seq + 2, [songs[0].id, songs[2].id])
+    assert lib.find_song_ids([("duration", ">", 0)], [songs[0].id, songs[2].id]) == [
+        songs[0].id
+    ]
+    lib.close()
+
+
+def test_iter_songs(temp_db: str) -> None:
+    lib = SongLibrary(temp_db)
+    songs = make_songs(25)
+    lib.add_songs(songs)
+
+    assert sorted(song.id for song in lib.iter_songs(batch_size=10)) == sorted(
+        song.id for song in songs
+    )
+    assert (
+        len(list(lib.iter_songs(batch_size=5, where=[("title", "LIKE", "Song 1%")])))
+        == 11
+    )
+    lib.close()
+
+
+def test_get_songs_page(temp_db: str) -> None:
+    lib = SongLibrary(temp_db)
+    lib.add_songs(make_songs(25))
+
+    ids: typing.List[str] = []
+    page = lib.get_songs_page(limit=10)
+    while page:
+        ids.extend(song.id for song in page)
+        page = lib.get_songs_page(after_id=page[-1].id, limit=10)
+
+    assert ids == sorted(ids)
+    assert len(ids) == 25
+    lib.close()
+
+
+def test_remove_missing_files_in_batch(temp_db: str, tmp_path: typing.Any) -> None:
+    existing = tmp_path / "existing.mod"
+    existing.write_text("")
+    songs = [
+        Song(file_path=str(existing), md5="1", sha1="1"),
+        Song(file_path=str(tmp_path / "gone.mod"), md5="2", sha1="2"),
+        Song(file_path=str(tmp_path / "missing_dir" / "gone.mod"), md5="3", sha1="3"),
+    ]
+    lib = SongLibrary(temp_db)
+    lib.add_songs(songs)
+
+    removed = lib.remove_missing_files(max_workers=2)
+    assert sorted(removed) == sorted([songs[1].id, songs[2].id])
+    assert [song.id for song in lib.iter_songs()] == [songs[0].id]
+    lib.close()
+
+
+def test_find_missing_songs_cancel(tmp_path: typing.Any) -> None:
+    cancel_event = threading.Event()
+    cancel_event.set()
+    songs = [(str(i), str(tmp_path / str(i) / "gone.mod")) for i in range(10)]
+    assert find_missing_songs(songs, cancel_event=cancel_event) == []
+
+    progress: typing.List[typing.Tuple[int, int]] = []
+    assert len(find_missing_songs(songs, 4, lambda *p: progress.append(p))) == 10
+    assert progress[-1] == (10, 10)
+
+
+def test_heavy_metadata_is_loaded_lazily(temp_db: str, sample_song: Song) -> None:
+    sample_song.custom_metadata["comments"] = [{"meta": "x", "content": "great"}]
+    lib = SongLibrary(temp_db)
+    lib.add_song(sample_song)
+
+    row = (
+        lib.get_connection()
+        .execute("SELECT custom_metadata FROM songs WHERE id = ?", (sample_song.id,))
+        .fetchone()
+    )
+    assert "comments" not in row["custom_metadata"]
+
+    song = lib.get_song_by_id(sample_song.id)
+    assert song is not None
+    assert song.get_metadata("genre") == "rock"
+    assert song._metadata_loader is not None
+    assert song.custom_metadata["comments"][0]["content"] == "great"
+    assert song._metadata_loader is None
+
+    # Dropping the heavy keys on update removes the details row
+    del song.custom_metadata["comments"]
+    lib.update_song(song).result()
+    assert lib.get_song_details(song.id) == {}
+
+    song.custom_metadata["message"] = "hi"
+    lib.update_song(song).result()
+    assert lib.get_song_details(song.id) == {"message": "hi"}
+
+    lib.remove_song(song.id).result()
+    assert (
+        lib.get_connection().execute("SELECT COUNT(*) FROM song_details").fetchone()[0]
+        == 0
+    )
+    lib.close()
+
+
+def test_playlist_resolve_songs(temp_db: str) -> None:
+    lib = SongLibrary(temp_db)
+    songs = make_songs(12)
+    lib.add_songs(songs)
+    missing_id = str(uuid.uuid4())
+
+    playlist = Playlist(name="Test")
+    for song in songs[:6] + [songs[0]]:
+        playlist.add_song(song.id)
+    playlist.add_song(missing_id)
+    for song in songs[6:]:
+        playlist.add_song(song.id)
+
+    resolved = playlist.resolve_songs(lib, batch_size=5)
+    assert sorted(resolved) == sorted(song.id for song in songs)
+    assert missing_id not in playlist.get_song_ids()
+    assert len(playlist.entries) == 13
+    lib.close()